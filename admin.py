@@ -0,0 +1,65 @@
+import calendar
+from datetime import date, timedelta
+import pandas as pd
+import streamlit as st
+from contact_store import CONTACTS_DB, FEEDBACK_TYPES, connect, get_contact_store, query_contacts
+
+PAGE_SIZE = 50
+
+
+def _day_start(day: date) -> int:
+    return calendar.timegm(day.timetuple())
+
+
+# Admin page: triage "Get In Touch" submissions without loading the table
+def show_admin():
+    st.title("🗂️ Feedback Admin")
+    # Opening the store applies any pending schema migration
+    get_contact_store()
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    feedback_type = col1.selectbox("Type of Feedback", ["All"] + FEEDBACK_TYPES)
+    today = date.today()
+    days = col2.date_input("Submitted between", (today - timedelta(days=30), today))
+    search = col3.text_input("Search messages")
+
+    start = end = None
+    if isinstance(days, (tuple, list)) and len(days) == 2:
+        start = _day_start(days[0])
+        end = _day_start(days[1] + timedelta(days=1))
+
+    # Page cursors for the current filters; reset whenever a filter changes
+    filters = (feedback_type, start, end, search)
+    if st.session_state.get("admin_filters") != filters:
+        st.session_state["admin_filters"] = filters
+        st.session_state["admin_cursors"] = [None]
+    cursors = st.session_state["admin_cursors"]
+
+    conn = connect(CONTACTS_DB)
+    try:
+        rows, next_cursor = query_contacts(
+            conn,
+            feedback_type=None if feedback_type == "All" else feedback_type,
+            start=start,
+            end=end,
+            search=search,
+            after=cursors[-1],
+            limit=PAGE_SIZE,
+        )
+    finally:
+        conn.close()
+
+    st.write(f"Page {len(cursors)}")
+    st.dataframe(
+        pd.DataFrame(rows, columns=["ID", "Name", "Email", "Message", "Type", "Timestamp", "Created At"])
+        .drop(columns="Created At"),
+        hide_index=True,
+    )
+
+    prev_col, next_col = st.columns([1, 1])
+    if prev_col.button("⬅️ Previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if next_col.button("Next ➡️", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
@@ -0,0 +1,54 @@
+import pandas as pd
+
+# Pre-aggregated Area x Year cube. Every cell holds the sum, non-null count and
+# mean of each numeric column for one (Area, Year) pair, so chart aggregates for
+# any sidebar selection are answered by combining cells instead of raw rows.
+CUBE_KEYS = ["Area", "Year"]
+
+
+# Build the cube from a raw emission frame (done once per dataset version)
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    columns = df.select_dtypes("number").columns.drop("Year", errors="ignore")
+    # Accumulate in float64 even when the frame stores float32 columns
+    values = df[list(columns)].astype("float64")
+    grouped = values.groupby([df[key] for key in CUBE_KEYS], sort=True, observed=True)
+    sums = grouped.sum()
+    counts = grouped.count()
+    return pd.concat({"sum": sums, "count": counts, "mean": sums / counts}, axis=1)
+
+
+# Cells belonging to the selected areas/years (None selects everything)
+def select_cells(cube: pd.DataFrame, areas=None, years=None) -> pd.DataFrame:
+    mask = None
+    if areas is not None:
+        mask = cube.index.get_level_values("Area").isin(areas)
+    if years is not None:
+        year_mask = cube.index.get_level_values("Year").isin(years)
+        mask = year_mask if mask is None else mask & year_mask
+    return cube if mask is None else cube[mask]
+
+
+# Per-area totals of the given columns
+def area_sums(cells: pd.DataFrame, columns) -> pd.DataFrame:
+    return cells["sum"][columns].groupby(level="Area", observed=True).sum()
+
+
+# Per-area means of the given columns, same as groupby("Area").mean() on raw rows
+def area_means(cells: pd.DataFrame, columns) -> pd.DataFrame:
+    grouped = cells[["sum", "count"]].groupby(level="Area", observed=True).sum()
+    return grouped["sum"][columns] / grouped["count"][columns]
+
+
+# No latest year and zero totals, for a selection without rows
+def no_year_totals(columns):
+    return None, pd.Series(0.0, index=list(columns))
+
+
+# Totals of the given columns over the latest year present in the cells
+# (no_year_totals when there are no cells)
+def latest_year_totals(cells: pd.DataFrame, columns):
+    if cells.empty:
+        return no_year_totals(columns)
+    latest = cells.index.get_level_values("Year").max()
+    year_cells = cells.xs(latest, level="Year", drop_level=False)
+    return latest, year_cells["sum"][columns].sum()
@@ -1,19 +1,15 @@
 import streamlit as st
-import json
-import time
 from streamlit_lottie import st_lottie
+from assets import load_lottie
 from signin import signin
 from signup import signup
 from menuBar import main_app
-
-# Load local Lottie file
-def load_lottiefile(filepath: str):
-    with open(filepath, "r") as file:
-        return json.load(file)
+from warmup import warm_up, is_warm
+from instrumentation import span, show_debug_panel
 
 # Splash screen
 def splash_screen():
-    lottie_data = load_lottiefile("splash.json")
+    lottie_data = load_lottie("splash.json")
     st_lottie(lottie_data, speed=1, loop=True, quality="high")
     st.markdown("<h2 style='text-align:center;'>Loading The Carbonivore...</h2>", unsafe_allow_html=True)
     st.markdown("""
@@ -21,13 +17,17 @@ def splash_screen():
             Made with ❤️ by sukhman.singh.codes
         </p>
     """, unsafe_allow_html=True)
-    time.sleep(3)  # Show for 2 seconds
+    warm_up()  # Stays on screen while datasets, assets and figures are cached
     st.session_state.splash_done = True
     st.rerun()  # Move on automatically
 
 def main():
     if "splash_done" not in st.session_state:
-        splash_screen()
+        # Once the process is warm there is nothing left to wait for
+        if is_warm():
+            st.session_state.splash_done = True
+        else:
+            splash_screen()
 
     # After splash, go to app
     if st.session_state.get('user'):
@@ -35,10 +35,16 @@ def main():
     else:
         st.sidebar.title("Signin/Signup")
         auth_choice = st.sidebar.radio("Select", ["Sign In", "Sign Up"])
-        if auth_choice == "Sign In":
-            signin()
-        else:
-            signup()
+        with span(f"page.{auth_choice}"):
+            if auth_choice == "Sign In":
+                signin()
+            else:
+                signup()
+
+    # Opt-in timings panel (CARBONIVORE_TIMING=1)
+    show_debug_panel()
 
+# Process pool workers run this script as __mp_main__ (see pool_worker.py):
+# everything but the imports and definitions stays under this guard
 if __name__ == "__main__":
     main()
@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Shared registry of parsed Lottie animations. Each file is parsed once per
+# process and kept in a small LRU cache, so reruns only pay a dict lookup.
+MAX_ASSETS = int(os.environ.get("CARBONIVORE_MAX_ASSETS", "16"))
+# Decimal places kept for float values when compacting animations
+LOTTIE_PRECISION = 3
+# Editor-only keys that lottie-web never reads (layer/shape names, match names)
+_UNUSED_KEYS = {"nm", "mn", "cl", "ln"}
+
+_LOCK = threading.Lock()
+_ASSETS = OrderedDict()
+_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+# Round floats and drop editor-only keys to shrink the payload sent to the browser
+def compact_lottie(node, precision: int = LOTTIE_PRECISION):
+    if isinstance(node, dict):
+        return {
+            key: compact_lottie(value, precision)
+            for key, value in node.items()
+            if key not in _UNUSED_KEYS
+        }
+    if isinstance(node, list):
+        return [compact_lottie(value, precision) for value in node]
+    if isinstance(node, float):
+        rounded = round(node, precision)
+        return int(rounded) if rounded.is_integer() else rounded
+    return node
+
+
+# Load a Lottie animation from file through the shared cache
+def load_lottie(filepath: str, compact: bool = True):
+    path = os.path.abspath(filepath)
+    key = (path, os.stat(path).st_mtime_ns, compact)
+
+    with _LOCK:
+        if key in _ASSETS:
+            _ASSETS.move_to_end(key)
+            _STATS["hits"] += 1
+            return _ASSETS[key]
+        _STATS["misses"] += 1
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if compact:
+        data = compact_lottie(data)
+
+    with _LOCK:
+        _ASSETS[key] = data
+        _ASSETS.move_to_end(key)
+        while len(_ASSETS) > MAX_ASSETS:
+            _ASSETS.popitem(last=False)
+            _STATS["evictions"] += 1
+    return data
+
+
+# Cache hit/miss counters plus current size
+def asset_stats() -> dict:
+    with _LOCK:
+        lookups = _STATS["hits"] + _STATS["misses"]
+        return {
+            **_STATS,
+            "entries": len(_ASSETS),
+            "hit_rate": _STATS["hits"] / lookups if lookups else 0.0,
+        }
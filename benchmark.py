@@ -0,0 +1,267 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Headless rerun benchmark. Each page is a rerun of app.py driven through
+# Streamlit's AppTest, with a stubbed signed-in session (Firebase is never
+# touched), the splash screen marked done and the page picked by setting the
+# menu's selection (menuBar.PAGE_KEY), so every run goes through main_app's
+# routing. It runs against the real CSVs and against synthetic copies scaled
+# 10x/100x/1000x by replicating every Area under new names. Results go to a
+# JSON report that can be compared with an earlier one:
+#
+#   python benchmark.py --output bench_report.json
+#   python benchmark.py --scales 1,10 --baseline bench_report.json
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILES = ["cleaned_data.csv", "the_Carbonivore.csv"]
+ASSET_FILES = ["analytics.json", "data_preprocessing.json", "contact us.json"]
+SIDECAR_SUFFIXES = [".feather", ".parquet", ".profile.json", ".profile.npz"]
+DEFAULT_SCALES = "1,10,100,1000"
+# Metrics compared against a baseline report (lower is better)
+COMPARED_METRICS = ["warm_median_s", "rerun_peak_mb", "payload_bytes"]
+
+
+APP_SCRIPT = os.path.join(REPO_DIR, "app.py")
+
+
+# (label, menu selection, extra session state)
+def benchmark_pages():
+    sys.path.insert(0, REPO_DIR)
+    from visualization import SECTIONS
+    all_sections = {f"viz_section_{section_id}": True for section_id, *_ in SECTIONS}
+    return [
+        ("About", "About", {}),
+        ("Pre-Processing", "Pre-Processing", {}),
+        ("Visualization", "Visualization", {}),
+        ("Visualization (all sections)", "Visualization", all_sections),
+        ("Get In Touch", "Get In Touch", {}),
+    ]
+
+
+# Write source replicated scale times; copy k renames every Area to "<Area> #k"
+def write_scaled_csv(source: str, target: str, scale: int):
+    import pandas as pd
+    df = pd.read_csv(source)
+    tmp = target + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        df.iloc[:0].to_csv(f, index=False)
+        for k in range(scale):
+            part = df if k == 0 else df.assign(Area=df["Area"] + f" #{k}")
+            part.to_csv(f, header=False, index=False)
+    os.replace(tmp, target)
+
+
+# Directory holding the data and assets for one scale, generated on first use.
+# Unless keep_sidecars, cached copies are dropped, host-wide shared frames included.
+def prepare_scale_dir(root: str, scale: int, keep_sidecars: bool) -> str:
+    from shared_dataset import remove_shared
+    scale_dir = os.path.join(root, f"scale_{scale}")
+    os.makedirs(scale_dir, exist_ok=True)
+    for name in ASSET_FILES:
+        link = os.path.join(scale_dir, name)
+        if not os.path.exists(link):
+            os.symlink(os.path.join(REPO_DIR, name), link)
+    for name in DATA_FILES:
+        target = os.path.join(scale_dir, name)
+        if not os.path.exists(target):
+            if scale == 1:
+                os.symlink(os.path.join(REPO_DIR, name), target)
+            else:
+                write_scaled_csv(os.path.join(REPO_DIR, name), target, scale)
+        if not keep_sidecars:
+            base = os.path.splitext(target)[0]
+            for suffix in SIDECAR_SUFFIXES:
+                if os.path.exists(base + suffix):
+                    os.remove(base + suffix)
+            remove_shared(target)
+    return scale_dir
+
+
+# Serialized size of every element the run produced
+def payload_bytes(at) -> int:
+    total = 0
+    stack = [at._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            total += proto.ByteSize()
+        stack.extend(getattr(node, "children", {}).values())
+    return total
+
+
+def _count_rows(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for _ in f) - 1
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_page(label, page, state, runs: int, timeout: float) -> dict:
+    from streamlit.testing.v1 import AppTest
+    from menuBar import PAGE_KEY
+
+    at = AppTest.from_file(APP_SCRIPT, default_timeout=timeout)
+    at.session_state["user"] = {"email": "benchmark@example.com"}
+    at.session_state["splash_done"] = True
+    at.session_state[PAGE_KEY] = page
+    for key, value in state.items():
+        at.session_state[key] = value
+
+    result = {"page": label}
+    try:
+        start = time.perf_counter()
+        at.run()
+        result["cold_s"] = time.perf_counter() - start
+        result["max_rss_mb"] = _max_rss_mb()
+
+        warm = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            at.run()
+            warm.append(time.perf_counter() - start)
+        result["warm_median_s"] = statistics.median(warm)
+        result["warm_max_s"] = max(warm)
+
+        # Separate traced rerun so tracemalloc overhead stays out of the timings
+        gc.collect()
+        tracemalloc.start()
+        at.run()
+        result["rerun_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+        result["payload_bytes"] = payload_bytes(at)
+        result["exceptions"] = [e.message for e in at.exception]
+    except RuntimeError as e:
+        # AppTest raises RuntimeError when a run exceeds the timeout
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        result["error"] = str(e)
+    return result
+
+
+def run_benchmark(scales, runs: int, timeout: float, data_root: str, keep_sidecars: bool) -> dict:
+    pages = benchmark_pages()
+    from data_store import clear_datasets
+    from figure_cache import clear_figure_cache
+    from ranking import clear_top_n_cache
+
+    results = []
+    cwd = os.getcwd()
+    try:
+        for scale in scales:
+            scale_dir = prepare_scale_dir(data_root, scale, keep_sidecars)
+            rows = _count_rows(os.path.join(scale_dir, DATA_FILES[0]))
+            clear_datasets()
+            clear_figure_cache()
+            clear_top_n_cache()
+            gc.collect()
+            os.chdir(scale_dir)
+            for label, page, state in pages:
+                result = run_page(label, page, state, runs, timeout)
+                result.update({"scale": scale, "rows": rows})
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    finally:
+        os.chdir(cwd)
+
+    return {"meta": _meta(runs), "results": results}
+
+
+def _meta(runs: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    import pandas
+    import streamlit
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "streamlit": streamlit.__version__,
+        "pandas": pandas.__version__,
+        "warm_runs": runs,
+    }
+
+
+# Metrics that got worse than the baseline by more than tolerance (a fraction)
+def compare_reports(report: dict, baseline: dict, tolerance: float) -> list:
+    previous = {(r["scale"], r["page"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["scale"], result["page"]))
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append({
+                    "scale": result["scale"],
+                    "page": result["page"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": new / old,
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless per-page rerun benchmark for The Carbonivore")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="comma separated row multipliers (default: 1,10,100,1000)")
+    parser.add_argument("--runs", type=int, default=5, help="warm reruns per page")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per page run")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "carbonivore-bench"),
+                        help="where synthetic datasets are generated and kept between runs")
+    parser.add_argument("--keep-sidecars", action="store_true",
+                        help="reuse Feather/profile sidecars and shared frames, measuring a restart instead of a first start")
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    # Keep benchmark submissions out of the real database
+    os.environ.setdefault("CARBONIVORE_CONTACTS_DB", os.path.join(args.data_dir, "contacts.db"))
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    scales = [int(scale) for scale in args.scales.split(",") if scale]
+    report = run_benchmark(scales, args.runs, args.timeout, args.data_dir, args.keep_sidecars)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output} ({len(report['results'])} page runs)")
+    for regression in regressions:
+        print(
+            f"REGRESSION scale={regression['scale']} page={regression['page']} "
+            f"{regression['metric']}: {regression['baseline']:.4g} -> {regression['current']:.4g} "
+            f"({regression['ratio']:.2f}x)"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
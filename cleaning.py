@@ -0,0 +1,273 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_store import SOURCE_VERSION_KEY, dataset_version, parquet_path, with_derived_columns
+
+# Cleaning pipeline: the_Carbonivore.csv -> cleaned_data.csv (+ cleaned_data.parquet).
+# It replaces the notebook step that produced cleaned_data.csv. Missing values
+# in a numeric column are filled with the column's mean over the whole file,
+# or its median for the columns listed in IMPUTE_MEDIAN, and the derived
+# columns from data_store.DERIVED_COLUMNS are appended.
+#
+# The raw file is split into byte ranges on line boundaries and processed in
+# two passes, each range in a worker process: the first collects the column
+# statistics behind the fill values, the second cleans the range and writes
+# it as a CSV part and a Parquet part, which are then concatenated in order.
+# A manifest next to the output records the input's sha256, so an unchanged
+# input is skipped; --watch polls the input and reruns on every new drop.
+#
+#   python cleaning.py
+#   python cleaning.py --workers 8 --chunk-mb 32 --watch 5
+DEFAULT_INPUT = "the_Carbonivore.csv"
+DEFAULT_OUTPUT = "cleaned_data.csv"
+# Bump when the cleaning rules change so existing outputs are rebuilt
+CLEANING_VERSION = 1
+IMPUTE_MEDIAN = ["Crop Residues", "IPPU", "On-farm energy use"]
+# Columns never imputed
+KEY_COLUMNS = ["Area", "Year"]
+_HASH_CHUNK = 1024 * 1024
+
+
+def manifest_path(output: str) -> str:
+    return os.path.splitext(output)[0] + ".pipeline.json"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Header line plus (start, end) byte ranges of about chunk_bytes, each ending
+# on a line boundary (fields must not contain embedded newlines)
+def chunk_ranges(path: str, chunk_bytes: int):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+# Column dtypes from the first rows: text stays str, Year stays integer and
+# every other numeric column is float64, so every range parses the same way
+def column_dtypes(path: str) -> dict:
+    sample = pd.read_csv(path, nrows=10000)
+    dtypes = {}
+    for column, dtype in sample.dtypes.items():
+        if not pd.api.types.is_numeric_dtype(dtype):
+            dtypes[column] = "str"
+        elif column == "Year" and pd.api.types.is_integer_dtype(dtype):
+            dtypes[column] = "int64"
+        else:
+            dtypes[column] = "float64"
+    return dtypes
+
+
+def _read_range(path: str, start: int, end: int, dtypes: dict) -> pd.DataFrame:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=list(dtypes), dtype=dtypes)
+
+
+def _imputed_columns(dtypes: dict) -> list:
+    return [column for column, dtype in dtypes.items() if dtype == "float64" and column not in KEY_COLUMNS]
+
+
+# Pass 1 (worker): per-column sums and non-null counts, plus the non-null
+# values of the median columns
+def _range_stats(task):
+    path, start, end, dtypes = task
+    df = _read_range(path, start, end, dtypes)
+    columns = _imputed_columns(dtypes)
+    return {
+        "rows": len(df),
+        "sum": df[columns].sum(),
+        "count": df[columns].count(),
+        "values": {c: df[c].dropna().to_numpy() for c in IMPUTE_MEDIAN if c in df.columns},
+    }
+
+
+# Pass 2 (worker): clean one range and write it as numbered CSV and Parquet parts
+def _clean_range(task):
+    path, start, end, dtypes, fills, part = task
+    df = with_derived_columns(_read_range(path, start, end, dtypes).fillna(fills))
+    df.to_csv(f"{part}.csv", header=False, index=False)
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), f"{part}.parquet")
+    return len(df)
+
+
+# Fill value per column with missing values, from the combined pass 1 statistics
+def fill_values(stats: list, dtypes: dict) -> dict:
+    rows = sum(part["rows"] for part in stats)
+    sums = sum(part["sum"] for part in stats)
+    counts = sum(part["count"] for part in stats)
+    fills = {}
+    for column in _imputed_columns(dtypes):
+        if counts[column] == rows:
+            continue
+        if column in IMPUTE_MEDIAN:
+            values = np.concatenate([part["values"][column] for part in stats])
+            value = float(np.median(values)) if len(values) else np.nan
+        else:
+            value = sums[column] / counts[column] if counts[column] else np.nan
+        if not pd.isna(value):
+            fills[column] = float(value)
+    return fills
+
+
+def _map(executor, function, tasks):
+    return list(executor.map(function, tasks)) if executor else [function(task) for task in tasks]
+
+
+# Concatenate the parts into output and its Parquet copy, swapping both in at the end
+def _write_outputs(parts: list, header: bytes, output: str):
+    first = pq.read_table(f"{parts[0]}.parquet")
+    names = header.decode("utf-8").rstrip("\r\n").split(",")
+    names += [column for column in first.column_names if column not in names]
+
+    tmp_csv = f"{output}.{os.getpid()}.tmp"
+    parquet = parquet_path(output)
+    tmp_parquet = f"{parquet}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_csv, "w", encoding="utf-8", newline="") as out:
+            pd.DataFrame(columns=names).to_csv(out, index=False)
+        with open(tmp_csv, "ab") as out:
+            for part in parts:
+                with open(f"{part}.csv", "rb") as f:
+                    shutil.copyfileobj(f, out)
+
+        # The Parquet copy is tagged with the new CSV's version, so the query
+        # backends use it directly instead of converting the CSV again
+        version = dataset_version(tmp_csv)
+        schema = first.schema.remove_metadata().with_metadata({SOURCE_VERSION_KEY: version.encode()})
+        with pq.ParquetWriter(tmp_parquet, schema) as writer:
+            for part in parts:
+                table = pq.read_table(f"{part}.parquet").replace_schema_metadata(None)
+                writer.write_table(table.cast(schema))
+
+        # CSV first: until the Parquet copy follows, readers just see a stale copy
+        os.replace(tmp_csv, output)
+        os.replace(tmp_parquet, parquet)
+    finally:
+        for tmp in (tmp_csv, tmp_parquet):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return version
+
+
+def _read_manifest(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Whether output is already the cleaned form of an input with this sha256
+def is_current(manifest, sha: str, output: str) -> bool:
+    if not manifest or manifest.get("input", {}).get("sha256") != sha:
+        return False
+    if manifest.get("cleaning_version") != CLEANING_VERSION:
+        return False
+    try:
+        return dataset_version(output) == manifest["output"]["version"] and os.path.exists(parquet_path(output))
+    except OSError:
+        return False
+
+
+# Run the pipeline; returns the manifest (with "skipped": True when nothing changed)
+def clean(input_path: str = DEFAULT_INPUT, output: str = DEFAULT_OUTPUT, workers: int = None,
+          chunk_bytes: int = 64 * 1024 * 1024, force: bool = False) -> dict:
+    start = time.perf_counter()
+    sha = file_sha256(input_path)
+    manifest = _read_manifest(manifest_path(output))
+    if not force and is_current(manifest, sha, output):
+        return dict(manifest, skipped=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    dtypes = column_dtypes(input_path)
+    header, ranges = chunk_ranges(input_path, chunk_bytes)
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(ranges))) if workers > 1 and len(ranges) > 1 else None
+    try:
+        stats = _map(executor, _range_stats, [(input_path, s, e, dtypes) for s, e in ranges])
+        fills = fill_values(stats, dtypes)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output))) as tmp_dir:
+            parts = [os.path.join(tmp_dir, f"part-{i:05d}") for i in range(len(ranges))]
+            rows = _map(executor, _clean_range, [
+                (input_path, s, e, dtypes, fills, part) for (s, e), part in zip(ranges, parts)
+            ])
+            version = _write_outputs(parts, header, output)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    manifest = {
+        "cleaning_version": CLEANING_VERSION,
+        "input": {"path": os.path.abspath(input_path), "sha256": sha, "bytes": os.path.getsize(input_path)},
+        "output": {"path": os.path.abspath(output), "version": version, "rows": sum(rows)},
+        "fills": fills,
+        "chunks": len(ranges),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    tmp = f"{manifest_path(output)}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path(output))
+    return dict(manifest, skipped=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the raw Carbonivore CSV into the dashboard dataset")
+    parser.add_argument("--input", default=DEFAULT_INPUT)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=float, default=64, help="raw CSV bytes per chunk")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the input is unchanged")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep running, re-cleaning whenever the input file changes")
+    args = parser.parse_args(argv)
+
+    def run():
+        result = clean(args.input, args.output, args.workers, int(args.chunk_mb * 1024 * 1024), args.force)
+        print(json.dumps({key: result[key] for key in ("skipped", "output", "chunks", "seconds") if key in result}))
+
+    if args.watch is None:
+        run()
+        return 0
+
+    seen = None
+    while True:
+        try:
+            version = dataset_version(args.input)
+        except FileNotFoundError:
+            version = None
+        if version is not None and version != seen:
+            run()
+            seen = version
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import atexit
+import calendar
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# Store for "Get In Touch" submissions. The schema is migrated once when the
+# store is created, the database runs in WAL mode, and all inserts go through
+# one background writer thread that commits queued rows in a single
+# transaction per flush, so concurrent submits never fight over the file lock.
+CONTACTS_DB = os.environ.get("CARBONIVORE_CONTACTS_DB", "contacts.db")
+# Longest a queued row waits for more rows to join its batch
+FLUSH_INTERVAL = float(os.environ.get("CARBONIVORE_CONTACTS_FLUSH_INTERVAL", "0.05"))
+BATCH_SIZE = int(os.environ.get("CARBONIVORE_CONTACTS_BATCH_SIZE", "200"))
+# SQLite synchronous level: NORMAL is safe with WAL (a power cut may lose the
+# last commits), FULL also syncs every commit to disk
+SYNCHRONOUS = os.environ.get("CARBONIVORE_CONTACTS_SYNCHRONOUS", "NORMAL").upper()
+# When set, submit() waits until its row is committed before returning
+DURABLE_SUBMIT = os.environ.get("CARBONIVORE_CONTACTS_DURABLE", "1") == "1"
+
+FEEDBACK_TYPES = ["Suggestion", "Bug Report", "Compliment", "Question", "Others"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Schema migrations, applied in order; PRAGMA user_version records the last one
+MIGRATIONS = [
+    '''
+    CREATE TABLE IF NOT EXISTS contacts (
+        name TEXT,
+        email TEXT,
+        message TEXT,
+        feedback_type TEXT,
+        timestamp TEXT
+    )
+    ''',
+    # v2: integer primary key, sortable created_at (seconds, same clock as the
+    # timestamp text), indexes for the admin filters and an FTS5 index over
+    # message kept in sync by triggers
+    '''
+    ALTER TABLE contacts RENAME TO contacts_v1;
+    CREATE TABLE contacts (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        email TEXT,
+        message TEXT,
+        feedback_type TEXT,
+        timestamp TEXT,
+        created_at INTEGER NOT NULL
+    );
+    INSERT INTO contacts (name, email, message, feedback_type, timestamp, created_at)
+        SELECT name, email, message, feedback_type, timestamp,
+               COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), 0)
+        FROM contacts_v1 ORDER BY rowid;
+    DROP TABLE contacts_v1;
+    CREATE INDEX idx_contacts_created ON contacts (created_at, id);
+    CREATE INDEX idx_contacts_type_created ON contacts (feedback_type, created_at, id);
+    CREATE VIRTUAL TABLE contacts_fts USING fts5(message, content='contacts', content_rowid='id');
+    INSERT INTO contacts_fts (contacts_fts) VALUES ('rebuild');
+    CREATE TRIGGER contacts_fts_insert AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts (rowid, message) VALUES (new.id, new.message);
+    END;
+    CREATE TRIGGER contacts_fts_delete AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts (contacts_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END;
+    CREATE TRIGGER contacts_fts_update AFTER UPDATE OF message ON contacts BEGIN
+        INSERT INTO contacts_fts (contacts_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO contacts_fts (rowid, message) VALUES (new.id, new.message);
+    END
+    ''',
+]
+
+INSERT_CONTACT = (
+    "INSERT INTO contacts (name, email, message, feedback_type, timestamp, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+# Sortable seconds for a timestamp string, matching SQLite's strftime('%s', ...)
+def timestamp_seconds(timestamp: str) -> int:
+    return calendar.timegm(time.strptime(timestamp, TIMESTAMP_FORMAT))
+
+
+def connect(path: str = CONTACTS_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    return conn
+
+
+# The statements of a migration script, split where sqlite3 sees a complete
+# statement (so trigger bodies stay whole)
+def _statements(script: str):
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ""
+    if statement.strip(" \n;"):
+        yield statement.strip()
+
+
+# Bring the database schema up to date. Pending migrations run in one
+# BEGIN IMMEDIATE transaction, which holds the write lock from the start, and
+# the version is read again inside it, so processes starting together apply
+# each migration exactly once; any error rolls the whole upgrade back.
+def migrate(conn: sqlite3.Connection):
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            for statement in _statements(script):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={number}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+class ContactStore:
+    def __init__(self, path: str = CONTACTS_DB, flush_interval: float = FLUSH_INTERVAL,
+                 batch_size: int = BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._conn = connect(path)
+        try:
+            migrate(self._conn)
+        except BaseException:
+            self._conn.close()
+            raise
+        self._writer = threading.Thread(target=self._run, name="contact-writer", daemon=True)
+        self._writer.start()
+
+    # Queue one submission; the returned future resolves once it is committed
+    def submit(self, name, email, message, feedback_type, timestamp) -> Future:
+        future = Future()
+        row = (name, email, message, feedback_type, timestamp, timestamp_seconds(timestamp))
+        self._queue.put((row, future))
+        return future
+
+    # Stop the writer after committing everything already queued
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._conn.close()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                with self._conn:
+                    self._conn.executemany(INSERT_CONTACT, [row for row, _ in batch])
+            except sqlite3.Error as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(True)
+
+
+_LOCK = threading.Lock()
+_store = None
+
+
+# Process-wide store, created (and migrated) on first use
+def get_contact_store() -> ContactStore:
+    global _store
+    with _LOCK:
+        if _store is None:
+            _store = ContactStore()
+            atexit.register(_store.close)
+        return _store
+
+
+# Record a submission, waiting for its commit when DURABLE_SUBMIT is set
+def save_contact(name, email, message, feedback_type, timestamp):
+    future = get_contact_store().submit(name, email, message, feedback_type, timestamp)
+    if DURABLE_SUBMIT:
+        future.result()
+
+
+# Quote each word so user input is matched literally by FTS5
+def _fts_query(text: str) -> str:
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+# One page of submissions, newest first, using keyset pagination: pass the
+# cursor returned with the previous page as after. Filters use the
+# (feedback_type, created_at) and created_at indexes; search uses the FTS5
+# index over message. Returns (rows, cursor for the next page or None).
+def query_contacts(conn: sqlite3.Connection, feedback_type: str = None, start: int = None,
+                   end: int = None, search: str = None, after=None, limit: int = 50):
+    clauses = []
+    params = []
+    if feedback_type:
+        clauses.append("feedback_type = ?")
+        params.append(feedback_type)
+    if start is not None:
+        clauses.append("created_at >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("created_at < ?")
+        params.append(end)
+    if search and search.strip():
+        clauses.append("id IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH ?)")
+        params.append(_fts_query(search))
+    if after is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(after)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = conn.execute(
+        f"SELECT id, name, email, message, feedback_type, timestamp, created_at FROM contacts {where} "
+        "ORDER BY created_at DESC, id DESC LIMIT ?",
+        params + [limit + 1],
+    ).fetchall()
+
+    cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        cursor = (rows[-1][6], rows[-1][0])
+    return rows, cursor
@@ -0,0 +1,228 @@
+import os
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from schema import apply_schema
+from shared_dataset import attach_shared, publish_shared
+
+# Process-wide cache of parsed datasets, shared by every Streamlit session.
+# Entries are keyed on the absolute CSV path (and whether the compact schema
+# was applied) and invalidated when the file's mtime/size changes, so a new
+# data drop is picked up on the next rerun.
+# The frames themselves are mapped from host-wide shared copies when possible
+# (see shared_dataset.py), so several worker processes hold them only once.
+_LOCK = threading.RLock()
+_DATASETS = {}
+# Schema reports for compact datasets, same keys as _DATASETS
+_SCHEMA_REPORTS = {}
+# Artifacts computed from a dataset (aggregates, indexes, ...), rebuilt per version
+_DERIVED = {}
+# Schema metadata key recording which CSV version a columnar copy was made from
+SOURCE_VERSION_KEY = b"carbonivore.source_version"
+# Bump when the CSV parsing or the compact schema changes, so sidecars and
+# shared copies made by an older release are not reused for the same CSV
+LOAD_FORMAT = "2"
+
+
+# Version token for a CSV file (changes whenever the file is rewritten)
+def dataset_version(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+# Binary columnar copy kept next to the CSV, e.g. cleaned_data.feather
+def sidecar_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".feather"
+
+
+def _read_sidecar(sidecar: str, version: str):
+    # Only trust the sidecar if it was converted from this exact CSV version
+    try:
+        table = feather.read_table(sidecar, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(SOURCE_VERSION_KEY) != f"{version}:{LOAD_FORMAT}".encode():
+        return None
+    return table.to_pandas()
+
+
+def _write_sidecar(df: pd.DataFrame, sidecar: str, version: str):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_VERSION_KEY] = f"{version}:{LOAD_FORMAT}".encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temp file and swap it in so concurrent readers never see a partial file
+    tmp = f"{sidecar}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, sidecar)
+    except OSError:
+        # Read-only deployments still work, they just parse the CSV on cold start
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _kind(compact: bool) -> str:
+    return f"{'compact' if compact else 'raw'}{LOAD_FORMAT}"
+
+
+def _load(path: str, compact: bool):
+    key = (path, compact)
+    version = dataset_version(path)
+
+    with _LOCK:
+        cached = _DATASETS.get(key)
+        if cached is not None and cached[0] == version:
+            return cached
+
+        # Another process on the host may already have published this version
+        kind = _kind(compact)
+        shared = attach_shared(path, kind, version)
+        if shared is None:
+            sidecar = sidecar_path(path)
+            df = _read_sidecar(sidecar, version)
+            if df is None:
+                # Correctly rounded floats, the same values as the Parquet copy
+                # (and so the exports) get from Arrow's parser
+                df = pd.read_csv(path, float_precision="round_trip")
+                _write_sidecar(df, sidecar, version)
+            report = None
+            if compact:
+                df, report = apply_schema(df)
+                report = report.to_dict(orient="records")
+            # Keep the mapped copy, not this process's private one
+            shared = publish_shared(path, kind, version, df, report) or (df, report)
+        df, report = shared
+        if compact:
+            _SCHEMA_REPORTS[key] = pd.DataFrame(report)
+
+        _DATASETS[key] = (version, df)
+        return version, df
+
+
+# Load a CSV once per process (raises FileNotFoundError like pd.read_csv).
+# compact=True returns the frame converted to the compact schema (see schema.py).
+def load_dataset(path: str, compact: bool = False) -> pd.DataFrame:
+    return _load(os.path.abspath(path), compact)[1]
+
+
+# Report of the compact schema conversion for a loaded dataset
+def schema_report(path: str) -> pd.DataFrame:
+    key = os.path.abspath(path)
+    _load(key, True)
+    with _LOCK:
+        return _SCHEMA_REPORTS[(key, True)]
+
+
+# Build (once per dataset version) and return an artifact derived from a dataset.
+# With shared=True a DataFrame artifact is also published host-wide like the
+# dataset itself (see shared_dataset.py), for frames too big to keep per process.
+def get_derived(path: str, name: str, build, compact: bool = False, shared: bool = False):
+    key = (os.path.abspath(path), compact)
+    version, df = _load(*key)
+    with _LOCK:
+        cached = _DERIVED.get((key, name))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    # Built outside the lock; a concurrent duplicate build is harmless
+    kind = f"{_kind(compact)}-{name}"
+    mapped = attach_shared(key[0], kind, version) if shared else None
+    if mapped is not None:
+        value = mapped[0]
+    else:
+        value = build(df)
+        if shared and isinstance(value, pd.DataFrame) and value is not df:
+            value = (publish_shared(key[0], kind, version, value) or (value,))[0]
+    with _LOCK:
+        _DERIVED[(key, name)] = (version, value)
+    return value
+
+
+# Parquet copy kept next to the CSV for the out-of-core query backends
+def parquet_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+# Arrow types for a CSV, inferred from its first rows: text stays string, Year
+# stays integer and every other numeric column is float64, so a later block
+# with a decimal or missing value can not break a streamed conversion
+def _csv_column_types(path: str) -> dict:
+    sample = pd.read_csv(path, nrows=10000)
+    types = {}
+    for column, dtype in sample.dtypes.items():
+        if not pd.api.types.is_numeric_dtype(dtype):
+            types[column] = pa.string()
+        elif column == "Year" and pd.api.types.is_integer_dtype(dtype):
+            types[column] = pa.int64()
+        else:
+            types[column] = pa.float64()
+    return types
+
+
+# Path of a Parquet copy of the CSV for its current version, converting it in
+# bounded-memory blocks when missing or stale (the CSV is never loaded whole)
+def ensure_parquet(path: str, row_group_size: int = 1 << 17) -> str:
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    path = os.path.abspath(path)
+    version = dataset_version(path)
+    target = parquet_path(path)
+    with _LOCK:
+        try:
+            metadata = pq.read_schema(target).metadata or {}
+            if metadata.get(SOURCE_VERSION_KEY) == version.encode():
+                return target
+        except (OSError, pa.ArrowInvalid):
+            pass
+
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=16 << 20),
+            convert_options=pacsv.ConvertOptions(column_types=_csv_column_types(path)),
+        )
+        schema = reader.schema.with_metadata({SOURCE_VERSION_KEY: version.encode()})
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with pq.ParquetWriter(tmp, schema) as writer:
+                for batch in reader:
+                    writer.write_table(pa.Table.from_batches([batch], schema=schema), row_group_size=row_group_size)
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return target
+
+
+# Drop cached datasets (all of them, or a single path) and anything derived from them
+def clear_datasets(path: str = None):
+    with _LOCK:
+        path = None if path is None else os.path.abspath(path)
+        for cache in (_DATASETS, _SCHEMA_REPORTS):
+            for key in [k for k in cache if path is None or k[0] == path]:
+                del cache[key]
+        for key in [k for k in _DERIVED if path is None or k[0][0] == path]:
+            del _DERIVED[key]
+
+
+# Columns computed from other columns. They are supplied once by the shared
+# dataset so charts never assign into (and copy) a filtered frame.
+DERIVED_COLUMNS = {
+    "Agri_total_Emission": ["Pesticides Manufacturing", "Fertilizers Manufacturing", "Food Transport"],
+    "Total Population": ["Total Population - Male", "Total Population - Female"],
+}
+
+
+# Add any derived columns the frame is missing (returns the frame itself if none are)
+def with_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    missing = {
+        name: sources for name, sources in DERIVED_COLUMNS.items()
+        if name not in df.columns and all(source in df.columns for source in sources)
+    }
+    if not missing:
+        return df
+    return df.assign(**{name: sum(df[source] for source in sources) for name, sources in missing.items()})
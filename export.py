@@ -0,0 +1,185 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from data_store import dataset_version, ensure_parquet, with_derived_columns
+from figure_cache import ALL
+
+# Downloads of the filtered Area/Year slice as CSV, gzip CSV or Parquet. Rows
+# are streamed from the dataset's Parquet copy (the CSV's own column types,
+# whatever the query backend) one row group batch at a time: each batch is
+# filtered, gets the derived columns and is written out before the next is
+# read, so memory stays at about one batch however large the slice is.
+#
+# Finished files are cached on disk under a hash of everything that defines
+# their bytes (dataset version, selection, format, EXPORT_VERSION), so a
+# repeated export of the same selection is served from the file. The cache is
+# trimmed to EXPORT_CACHE_BYTES, least recently served first; files written
+# or served in the last _TRIM_GRACE_SECONDS are kept, so a file is never
+# unlinked between export_file returning it and its caller opening it.
+#
+# The download button reads the whole file into memory (Streamlit keeps the
+# bytes for the session), so exports estimated over EXPORT_SERVE_BYTES are
+# not offered; big slices fit as gzip CSV or Parquet, or with narrower filters.
+_DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "carbonivore-exports")
+EXPORT_DIR = os.environ.get("CARBONIVORE_EXPORT_DIR", _DEFAULT_DIR)
+EXPORT_CACHE_BYTES = int(os.environ.get("CARBONIVORE_EXPORT_CACHE_BYTES", str(1024 * 1024 * 1024)))
+EXPORT_CHUNK_ROWS = int(os.environ.get("CARBONIVORE_EXPORT_CHUNK_ROWS", "65536"))
+EXPORT_SERVE_BYTES = int(os.environ.get("CARBONIVORE_EXPORT_SERVE_BYTES", str(64 * 1024 * 1024)))
+# Bump when the exported layout changes so cached files are not served
+EXPORT_VERSION = 1
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+# Rough export size per byte of source CSV rows, by format
+_SIZE_RATIO = {"csv": 1.0, "csv.gz": 0.4, "parquet": 0.6}
+_TRIM_GRACE_SECONDS = 30
+
+_LOCK = threading.Lock()
+
+
+# The selection's rows as pandas frames of at most chunk_rows rows, in file
+# order, with the derived columns; always at least one (possibly empty) frame
+def export_chunks(path: str, selection, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    source = pq.ParquetFile(ensure_parquet(path))
+    schema = source.schema_arrow
+    filters = [
+        (column, pa.array(list(key), type=schema.field(column).type))
+        for column, key in zip(("Area", "Year"), selection) if key != ALL
+    ]
+    emitted = False
+    for batch in source.iter_batches(batch_size=chunk_rows):
+        for column, values in filters:
+            batch = batch.filter(pc.is_in(batch.column(column), value_set=values))
+        if batch.num_rows or not emitted:
+            emitted = True
+            yield with_derived_columns(batch.to_pandas())
+    if not emitted:
+        yield with_derived_columns(schema.empty_table().to_pandas())
+
+
+# CSV bytes of the chunks, header first
+def csv_blocks(chunks):
+    first = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=first).encode("utf-8")
+        first = False
+
+
+# The blocks gzip-compressed (no timestamp, so equal input gives equal bytes)
+def gzip_blocks(blocks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _write_parquet(chunks, target: str):
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write(chunks, fmt: str, target: str):
+    if fmt == "parquet":
+        _write_parquet(chunks, target)
+        return
+    blocks = csv_blocks(chunks)
+    with open(target, "wb") as f:
+        for block in gzip_blocks(blocks) if fmt == "csv.gz" else blocks:
+            f.write(block)
+
+
+# Cache file for an export of the selection from this CSV version
+def export_path(path: str, selection, fmt: str) -> str:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {list(EXPORT_FORMATS)}")
+    spec = [EXPORT_VERSION, dataset_version(path), [k if k == ALL else list(k) for k in selection], fmt]
+    digest = hashlib.sha256(json.dumps(spec, default=str).encode()).hexdigest()
+    return os.path.join(EXPORT_DIR, f"{digest}.{EXPORT_FORMATS[fmt][0]}")
+
+
+def is_exported(path: str, selection, fmt: str) -> bool:
+    return os.path.exists(export_path(path, selection, fmt))
+
+
+# Bytes of the export of a selection with rows of the CSV's total_rows: exact
+# when cached, else estimated from the CSV's bytes per row
+def export_size(path: str, selection, fmt: str, rows: int, total_rows: int) -> int:
+    try:
+        return os.path.getsize(export_path(path, selection, fmt))
+    except OSError:
+        pass
+    per_row = os.path.getsize(path) / max(total_rows, 1)
+    return int(rows * per_row * _SIZE_RATIO[fmt])
+
+
+# Path of the export file for the selection, written now unless cached
+def export_file(path: str, selection, fmt: str) -> str:
+    path = os.path.abspath(path)
+    target = export_path(path, selection, fmt)
+    if os.path.exists(target):
+        try:
+            os.utime(target)
+            return target
+        except OSError:
+            pass
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        _write(export_chunks(path, selection), fmt, tmp)
+        # A concurrent export of the same selection writes identical bytes
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    trim_export_cache(keep=target)
+    return target
+
+
+# Remove the least recently served exports until the cache fits its budget
+# (never those written or served within _TRIM_GRACE_SECONDS)
+def trim_export_cache(budget: int = None, keep: str = None):
+    budget = EXPORT_CACHE_BYTES if budget is None else budget
+    recent = time.time() - _TRIM_GRACE_SECONDS
+    with _LOCK:
+        files = []
+        for name in glob.glob(os.path.join(glob.escape(EXPORT_DIR), "*")):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(name)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for mtime, size, name in sorted(files):
+            if total <= budget or mtime >= recent:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(name)
+                total -= size
+            except OSError:
+                pass
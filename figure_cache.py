@@ -0,0 +1,81 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Process-wide cache of built Plotly figures, shared by every session.
+# Keys are (chart id, dataset version, normalized filter selection); values are
+# the go.Figure itself with its JSON size, so a hit needs no re-parsing or
+# re-validation. Least recently used entries are evicted once the total JSON
+# size goes over the byte budget. Cached figures are shared and must not be
+# modified; st.plotly_chart only reads them (it serializes a copy).
+FIGURE_CACHE_BYTES = int(os.environ.get("CARBONIVORE_FIGURE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+_LOCK = threading.Lock()
+_FIGURES = OrderedDict()
+_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+# Selection key used when every value of a filter is selected
+ALL = "*"
+
+
+# Normalize one multiselect so equivalent selections share a cache entry
+def selection_key(selected, universe):
+    selected = set(selected)
+    if selected.issuperset(universe):
+        return ALL
+    return tuple(sorted(selected))
+
+
+# Cached figure for the key, or None (counted as a hit or a miss)
+def lookup_figure(chart_id: str, version: str, selection):
+    key = (chart_id, version, selection)
+    with _LOCK:
+        entry = _FIGURES.get(key)
+        if entry is not None:
+            _FIGURES.move_to_end(key)
+            _STATS["hits"] += 1
+            return entry[0]
+        _STATS["misses"] += 1
+        return None
+
+
+# Add a figure of nbytes JSON under the key, evicting least recently used
+# entries over budget
+def store_figure(chart_id: str, version: str, selection, fig, nbytes: int):
+    key = (chart_id, version, selection)
+    with _LOCK:
+        if key not in _FIGURES:
+            _FIGURES[key] = (fig, nbytes)
+            _STATS["bytes"] += nbytes
+        while _STATS["bytes"] > FIGURE_CACHE_BYTES and _FIGURES:
+            _, (_, evicted) = _FIGURES.popitem(last=False)
+            _STATS["bytes"] -= evicted
+            _STATS["evictions"] += 1
+
+
+# Return the cached figure for key, building and caching it on a miss
+def cached_figure(chart_id: str, version: str, selection, build):
+    fig = lookup_figure(chart_id, version, selection)
+    if fig is not None:
+        return fig
+
+    fig = build()
+    store_figure(chart_id, version, selection, fig, len(fig.to_json()))
+    return fig
+
+
+# Hit/miss counters plus current size
+def figure_cache_stats() -> dict:
+    with _LOCK:
+        lookups = _STATS["hits"] + _STATS["misses"]
+        return {
+            **_STATS,
+            "entries": len(_FIGURES),
+            "hit_rate": _STATS["hits"] / lookups if lookups else 0.0,
+        }
+
+
+def clear_figure_cache():
+    with _LOCK:
+        _FIGURES.clear()
+        _STATS["bytes"] = 0
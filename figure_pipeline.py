@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import plotly.io as pio
+from figure_cache import lookup_figure, store_figure
+
+# Figure pipeline for the Visualization page. Each open chart is declared as a
+# job: a plain dict with its figure cache id, chart id, parameters, selection,
+# dataset version and the backend to read ("path", "kind"), over the page's
+# shared read-only view. start_figures looks every job up in the figure cache
+# and starts the misses together on a pool; each section then waits only for
+# its own figure, in page order, so the page takes about as long as its
+# slowest chart instead of the sum of all of them. Builders never call st.
+#
+# CARBONIVORE_FIGURE_POOL picks where jobs run:
+#   thread   a thread pool in the app process (default); pandas, numpy and
+#            Arrow release the GIL for much of the work
+#   process  worker processes that open the dataset themselves, cheap with
+#            the host-wide copies from shared_dataset.py; for hosts where the
+#            Python-level figure code dominates (needs forkserver, else the
+#            thread pool is used)
+#   off      each figure is built when its section renders
+# CARBONIVORE_FIGURE_WORKERS sets the pool size (default: CPU count, at most
+# 8); a single worker means no pool.
+FIGURE_POOL = os.environ.get("CARBONIVORE_FIGURE_POOL", "thread")
+FIGURE_WORKERS = int(os.environ.get("CARBONIVORE_FIGURE_WORKERS", str(min(8, os.cpu_count() or 1))))
+POOL_KINDS = ["thread", "process", "off"]
+
+_LOCK = threading.Lock()
+_POOL = None
+
+
+def pool_enabled() -> bool:
+    if FIGURE_POOL not in POOL_KINDS:
+        raise ValueError(f"Unknown CARBONIVORE_FIGURE_POOL {FIGURE_POOL!r}, expected one of {POOL_KINDS}")
+    return FIGURE_POOL != "off" and FIGURE_WORKERS > 1
+
+
+# Context for process pools inside the app, or None where there is no
+# forkserver (e.g. Windows) and work stays in the app process. Forking the
+# threaded Streamlit server is unsafe; the forkserver preloads pool_worker,
+# which keeps the app script's run in each worker down to its imports. Like
+# the app, the forkserver resolves imports from the directory it started in.
+def process_context():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["pool_worker"])
+    return context
+
+
+def _pool():
+    global _POOL
+    with _LOCK:
+        if _POOL is None:
+            context = process_context() if FIGURE_POOL == "process" else None
+            if context is not None:
+                _POOL = ProcessPoolExecutor(FIGURE_WORKERS, mp_context=context)
+            else:
+                _POOL = ThreadPoolExecutor(FIGURE_WORKERS, thread_name_prefix="figure")
+        return _POOL
+
+
+def _store(job, fig, nbytes: int):
+    store_figure(job["id"], job["version"], job["selection"], fig, nbytes)
+
+
+# Thread pool / inline: build and cache the figure
+def _build(build, job, backend):
+    fig = build(job, backend)
+    _store(job, fig, len(fig.to_json()))
+    return fig
+
+
+# Worker process: the builder opens the backend itself; only JSON comes back
+def _build_spec(build, job) -> str:
+    return build(job, None).to_json()
+
+
+# Future of the figure for a worker's JSON, parsed once and cached when it arrives
+def _figure_future(job, spec_future) -> Future:
+    figure = Future()
+
+    def done(f):
+        try:
+            spec = f.result()
+            fig = pio.from_json(spec)
+        except BaseException as exc:
+            figure.set_exception(exc)
+            return
+        _store(job, fig, len(spec))
+        figure.set_result(fig)
+
+    spec_future.add_done_callback(done)
+    return figure
+
+
+class FigureHandle:
+    __slots__ = ("_figure", "_future", "_build")
+
+    def __init__(self, figure=None, future=None, build=None):
+        self._figure = figure
+        self._future = future
+        self._build = build
+
+    # The job's figure (None for an empty selection), waiting for it if needed
+    def result(self):
+        if self._build is not None:
+            self._figure, self._build = self._build(), None
+        if self._future is not None:
+            return self._future.result()
+        return self._figure
+
+
+# Handles for jobs, keyed by job id. build(job, backend) returns the figure;
+# it must be a module-level function when the pool runs processes, which get
+# backend=None and open their own.
+def start_figures(jobs, build, backend) -> dict:
+    handles = {}
+    for job in jobs:
+        if job["id"] in handles:
+            continue
+        if job["empty"]:
+            handles[job["id"]] = FigureHandle()
+            continue
+        fig = lookup_figure(job["id"], job["version"], job["selection"])
+        if fig is not None:
+            handles[job["id"]] = FigureHandle(figure=fig)
+        elif not pool_enabled():
+            handles[job["id"]] = FigureHandle(build=lambda job=job: _build(build, job, backend))
+        elif isinstance(_pool(), ProcessPoolExecutor):
+            future = _pool().submit(_build_spec, build, job)
+            handles[job["id"]] = FigureHandle(future=_figure_future(job, future))
+        else:
+            handles[job["id"]] = FigureHandle(future=_pool().submit(_build, build, job, backend))
+    return handles
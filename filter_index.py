@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# Row index for the Area/Year sidebar filters, built once per dataset version.
+# Each Area and Year maps to the sorted row positions holding it, so any
+# selection is resolved by OR-ing positions within a filter and AND-ing the
+# two filters, without hashing the whole frame on every rerun.
+
+
+def _positions_by_value(values: pd.Series) -> dict:
+    codes, uniques = pd.factorize(values, sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {
+        value: order[bounds[i]:bounds[i + 1]]
+        for i, value in enumerate(uniques.tolist())
+    }
+
+
+def build_filter_index(df: pd.DataFrame) -> dict:
+    return {
+        "rows": len(df),
+        "Area": _positions_by_value(df["Area"]),
+        "Year": _positions_by_value(df["Year"]),
+    }
+
+
+# Row mask for one filter; None when every value is selected
+def _column_mask(index: dict, column: str, selected):
+    positions = index[column]
+    selected = set(selected)
+    if selected.issuperset(positions):
+        return None
+    mask = np.zeros(index["rows"], dtype=bool)
+    for value in selected:
+        if value in positions:
+            mask[positions[value]] = True
+    return mask
+
+
+# Sorted row positions matching the selection; None means every row matches
+def select_positions(index: dict, areas, years):
+    area_mask = _column_mask(index, "Area", areas)
+    year_mask = _column_mask(index, "Year", years)
+    if area_mask is None and year_mask is None:
+        return None
+    if area_mask is None:
+        return np.flatnonzero(year_mask)
+    if year_mask is None:
+        return np.flatnonzero(area_mask)
+    return np.flatnonzero(area_mask & year_mask)
+
+
+# Filtered view of df. The full selection and contiguous selections are served
+# without copying; anything else gathers the matching rows once.
+def filter_view(df: pd.DataFrame, index: dict, areas, years) -> pd.DataFrame:
+    return rows_at(df, select_positions(index, areas, years))
+
+
+# Whether rows_at(df, positions) is a view of df rather than a copy
+def rows_share_frame(positions) -> bool:
+    return positions is None or len(positions) == 0 or positions[-1] - positions[0] + 1 == len(positions)
+
+
+# Rows of df at sorted positions (None means all rows), copying only when needed
+def rows_at(df: pd.DataFrame, positions) -> pd.DataFrame:
+    if positions is None:
+        return df
+    if len(positions) == 0:
+        return df.iloc[0:0]
+    if rows_share_frame(positions):
+        return df.iloc[positions[0]:positions[-1] + 1]
+    return df.take(positions)
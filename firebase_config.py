@@ -1,17 +1,29 @@
-import pyrebase
+import threading
 import streamlit as st
 
+# Firebase is initialized on the first auth call, not at import time, so
+# starting the app (and every page that never signs anyone in) stays cheap.
+_LOCK = threading.Lock()
+_auth = None
 
-firebaseConfig = {
-    "apiKey": st.secrets["firebase"]["apiKey"],
-    "authDomain": st.secrets["firebase"]["authDomain"],
-    "databaseURL": st.secrets["firebase"]["databaseURL"],
-    "projectId": st.secrets["firebase"]["projectId"],
-    "storageBucket": st.secrets["firebase"]["storageBucket"],
-    "messagingSenderId": st.secrets["firebase"]["messagingSenderId"],
-    "appId": st.secrets["firebase"]["appId"],
-    "measurementId": st.secrets["firebase"]["measurementId"]
-}
 
-firebase = pyrebase.initialize_app(firebaseConfig)
-auth = firebase.auth()
+def get_auth():
+    global _auth
+    with _LOCK:
+        if _auth is None:
+            import pyrebase
+
+            firebaseConfig = {
+                "apiKey": st.secrets["firebase"]["apiKey"],
+                "authDomain": st.secrets["firebase"]["authDomain"],
+                "databaseURL": st.secrets["firebase"]["databaseURL"],
+                "projectId": st.secrets["firebase"]["projectId"],
+                "storageBucket": st.secrets["firebase"]["storageBucket"],
+                "messagingSenderId": st.secrets["firebase"]["messagingSenderId"],
+                "appId": st.secrets["firebase"]["appId"],
+                "measurementId": st.secrets["firebase"]["measurementId"]
+            }
+
+            firebase = pyrebase.initialize_app(firebaseConfig)
+            _auth = firebase.auth()
+        return _auth
@@ -0,0 +1,218 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from figure_cache import ALL
+from figure_pipeline import process_context
+
+# Per-Area forecasts of one column over Year. The column's Area x Year sums
+# form one matrix (NaN where an Area has no value that year) and every Area
+# is fitted at once:
+#   linear, quadratic  polynomial trends, fitted as one batched weighted least
+#                      squares problem (a (k x k) normal system per Area,
+#                      solved together); milliseconds for all Areas
+#   holt               damped Holt exponential smoothing, whose smoothing
+#                      parameters are optimized per Area (a few ms each); from
+#                      CARBONIVORE_FORECAST_POOL_AREAS Areas on, they are split
+#                      over a process pool of CARBONIVORE_FORECAST_WORKERS, as
+#                      below that starting the workers costs more than it saves
+#
+# Fitted parameters are kept per (CSV, model, column) for the dataset version,
+# in memory and in a sidecar next to the CSV (cleaned_data.forecast.npz), so
+# neither a rerun nor a restart refits them.
+FORECAST_WORKERS = int(os.environ.get("CARBONIVORE_FORECAST_WORKERS", str(os.cpu_count() or 1)))
+FORECAST_POOL_AREAS = int(os.environ.get("CARBONIVORE_FORECAST_POOL_AREAS", "1000"))
+# Model -> polynomial degree, or None for models fitted per Area
+MODELS = {"linear": 1, "quadratic": 2, "holt": None}
+# Holt parameters: level and trend smoothing, trend damping
+_HOLT_BOUNDS = [(0.01, 0.99), (0.01, 0.99), (0.8, 0.98)]
+_HOLT_START = [0.5, 0.1, 0.9]
+# Areas per process pool task
+_HOLT_CHUNK = 16
+
+_LOCK = threading.Lock()
+_FITS = {}
+
+
+def forecast_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".forecast.npz"
+
+
+# Area x Year matrix of the column's per-cell sums over the whole dataset
+def area_year_matrix(backend, column) -> pd.DataFrame:
+    sums = backend.area_year_sums([column], (ALL, ALL))
+    matrix = sums.pivot(index="Area", columns="Year", values=column).astype("float64").dropna(how="all")
+    matrix.index = matrix.index.astype(str)
+    return matrix
+
+
+# Polynomial trend coefficients (Areas x degree+1, over years scaled to 0..1)
+# and residual RMSE per Area; NaN for Areas with too few years
+def fit_trends(values: np.ndarray, years: np.ndarray, degree: int):
+    t = (years - years[0]) / max(years[-1] - years[0], 1)
+    X = np.vander(t, degree + 1, increasing=True)
+    present = ~np.isnan(values)
+    weights = present.astype("float64")
+    observed = np.where(present, values, 0)
+    normal = np.einsum("ay,yi,yj->aij", weights, X, X)
+    rhs = np.einsum("ay,yi->ai", observed, X)
+    params = np.einsum("aij,aj->ai", np.linalg.pinv(normal), rhs)
+    counts = present.sum(axis=1)
+    params[counts < degree + 1] = np.nan
+    residuals = np.where(present, values - params @ X.T, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rmse = np.sqrt((residuals ** 2).sum(axis=1) / np.maximum(counts - degree - 1, 1))
+    return params, np.where(counts < degree + 1, np.nan, rmse)
+
+
+# One-step-ahead errors of damped Holt smoothing on y, and the final level and trend
+def _holt_run(theta, y):
+    alpha, beta, phi = theta
+    level, trend = y[0], y[1] - y[0]
+    errors = np.empty(len(y) - 1)
+    for i, value in enumerate(y[1:]):
+        forecast = level + phi * trend
+        error = value - forecast
+        errors[i] = error
+        level = forecast + alpha * error
+        trend = phi * trend + alpha * beta * error
+    return errors, level, trend
+
+
+# Damped Holt parameters (level, trend, alpha, beta, phi, last year) and RMSE
+# per Area of values. Missing years are skipped, treating the observed years
+# as consecutive. Runs in pool workers.
+def fit_holt(values: np.ndarray, years: np.ndarray):
+    params = np.full((len(values), 6), np.nan)
+    rmse = np.full(len(values), np.nan)
+    for row, series in enumerate(values):
+        present = ~np.isnan(series)
+        y = series[present]
+        if len(y) < 3:
+            continue
+        # Scaled to about 1 so the tolerances mean the same for every Area
+        scale = np.abs(y).max() or 1.0
+        result = minimize(
+            lambda theta: np.square(_holt_run(theta, y / scale)[0]).sum(),
+            _HOLT_START, method="L-BFGS-B", bounds=_HOLT_BOUNDS,
+        )
+        errors, level, trend = _holt_run(result.x, y)
+        params[row] = [level, trend, *result.x, years[present][-1]]
+        rmse[row] = np.sqrt(np.square(errors).mean())
+    return params, rmse
+
+
+def _fit_holt_task(task):
+    return fit_holt(*task)
+
+
+# Holt fits for every Area, split across the process pool when there are enough
+def fit_holt_parallel(values: np.ndarray, years: np.ndarray, workers: int = None):
+    workers = workers or FORECAST_WORKERS
+    tasks = [(values[i:i + _HOLT_CHUNK], years) for i in range(0, len(values), _HOLT_CHUNK)]
+    context = process_context()
+    if workers <= 1 or len(tasks) <= 1 or len(values) < FORECAST_POOL_AREAS or context is None:
+        results = [_fit_holt_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(min(workers, len(tasks)), mp_context=context) as pool:
+            results = list(pool.map(_fit_holt_task, tasks))
+    if not results:
+        return np.empty((0, 6)), np.empty(0)
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+# Fitted model for an Area x Year matrix: areas, years, history, params, rmse
+def fit_matrix(matrix: pd.DataFrame, model: str) -> dict:
+    if model not in MODELS:
+        raise ValueError(f"Unknown forecast model {model!r}, expected one of {list(MODELS)}")
+    values = matrix.to_numpy(dtype="float64")
+    years = matrix.columns.to_numpy(dtype="int64")
+    degree = MODELS[model]
+    params, rmse = fit_trends(values, years, degree) if degree else fit_holt_parallel(values, years)
+    return {
+        "areas": matrix.index.to_numpy(dtype=str),
+        "years": years,
+        "history": values,
+        "params": params,
+        "rmse": rmse,
+    }
+
+
+# Forecasts (Areas x future years) of a fit for the given years
+def predict(fit: dict, model: str, years) -> np.ndarray:
+    years = np.asarray(years, dtype="float64")
+    params = fit["params"]
+    degree = MODELS[model]
+    if degree:
+        first, last = fit["years"][0], fit["years"][-1]
+        X = np.vander((years - first) / max(last - first, 1), degree + 1, increasing=True)
+        return params @ X.T
+    level, trend, phi, last_year = params[:, 0:1], params[:, 1:2], params[:, 4:5], params[:, 5:6]
+    steps = years[None, :] - last_year
+    with np.errstate(invalid="ignore"):
+        damping = phi * (1 - phi ** np.maximum(steps, 0)) / (1 - phi)
+    return np.where(steps >= 1, level + damping * trend, np.nan)
+
+
+# Forecast table: one row per Area, one column per year after the data's last year
+def forecast_frame(fit: dict, model: str, horizon: int) -> pd.DataFrame:
+    years = np.arange(fit["years"][-1] + 1, fit["years"][-1] + horizon + 1)
+    return pd.DataFrame(predict(fit, model, years), index=pd.Index(fit["areas"], name="Area"), columns=years)
+
+
+def _read_stored(path: str, version: str, prefix: str):
+    try:
+        with np.load(forecast_path(path)) as npz:
+            if str(npz["version"]) != version or f"{prefix}:params" not in npz.files:
+                return None
+            return {name: npz[f"{prefix}:{name}"] for name in ("areas", "years", "history", "params", "rmse")}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+# Add one fit to the sidecar, dropping fits of other dataset versions
+def _write_stored(path: str, version: str, prefix: str, fit: dict):
+    target = forecast_path(path)
+    arrays = {}
+    try:
+        with np.load(target) as npz:
+            if str(npz["version"]) == version:
+                arrays = {key: npz[key] for key in npz.files}
+    except (OSError, KeyError, ValueError):
+        pass
+    arrays.update({f"{prefix}:{name}": value for name, value in fit.items()})
+    arrays["version"] = np.array(version)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    try:
+        np.savez(tmp, **arrays)
+        os.replace(tmp, target)
+    except OSError:
+        # Read-only deployments keep the fit in memory only
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# The model's fit of column for the backend's dataset, fitted once per dataset version
+def fit_forecast(backend, column: str, model: str) -> dict:
+    key = (backend.path, model, column)
+    with _LOCK:
+        cached = _FITS.get(key)
+        if cached is not None and cached[0] == backend.version:
+            return cached[1]
+
+    prefix = f"{model}:{column}"
+    fit = _read_stored(backend.path, backend.version, prefix)
+    if fit is None:
+        fit = fit_matrix(area_year_matrix(backend, column), model)
+        with _LOCK:
+            _write_stored(backend.path, backend.version, prefix, fit)
+    with _LOCK:
+        _FITS[key] = (backend.version, fit)
+    return fit
+
+
+def clear_forecasts():
+    with _LOCK:
+        _FITS.clear()
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+from forecast_models import MODELS, fit_forecast, forecast_frame
+from instrumentation import span
+from visualization import DATA_FILE, load_backend
+
+MODEL_LABELS = {"linear": "Linear trend", "quadratic": "Quadratic trend", "holt": "Damped Holt"}
+DEFAULT_COLUMN = "total_emission"
+# Areas drawn when the page opens: the largest in the data's last year
+DEFAULT_AREAS = 5
+
+
+# History (solid) and forecast (dashed) per selected Area, in matching colors
+def build_forecast_chart(fit: dict, forecast: pd.DataFrame, areas, column: str) -> go.Figure:
+    palette = px.colors.qualitative.Plotly
+    rows = {area: i for i, area in enumerate(fit["areas"])}
+    fig = go.Figure()
+    for n, area in enumerate(areas):
+        color = palette[n % len(palette)]
+        history = fit["history"][rows[area]]
+        present = ~np.isnan(history)
+        fig.add_trace(go.Scatter(
+            x=fit["years"][present], y=history[present], mode="lines", name=area, legendgroup=area,
+            line={"color": color},
+        ))
+        # Joined to the last observed year so the two lines meet
+        x = np.r_[fit["years"][present][-1:], forecast.columns.to_numpy()]
+        y = np.r_[history[present][-1:], forecast.loc[area].to_numpy()]
+        fig.add_trace(go.Scatter(
+            x=x, y=y, mode="lines", name=f"{area} (forecast)", legendgroup=area, showlegend=False,
+            line={"color": color, "dash": "dash"},
+        ))
+    fig.update_layout(title=f"{column} by Area with forecast", xaxis_title="Year", yaxis_title=column,
+                      width=1100, height=600, title_x=0.3)
+    return fig
+
+
+# Every Area's last observed value, forecast at the horizon and fit error
+def forecast_summary(fit: dict, forecast: pd.DataFrame) -> pd.DataFrame:
+    history = pd.DataFrame(fit["history"], index=forecast.index).ffill(axis=1).iloc[:, -1]
+    horizon = forecast.columns[-1]
+    summary = pd.DataFrame({
+        "Last value": history,
+        f"Forecast {horizon}": forecast[horizon],
+        "RMSE": fit["rmse"],
+    })
+    # No percentage change from a last value of 0
+    summary["Change %"] = (summary[f"Forecast {horizon}"] / summary["Last value"].replace(0, np.nan) - 1) * 100
+    return summary.sort_values(f"Forecast {horizon}", ascending=False).reset_index()
+
+
+def show_forecasting():
+    st.title("🔮 Emission Forecasting")
+    try:
+        with span("forecasting.load_backend"):
+            backend = load_backend()
+    except FileNotFoundError:
+        st.error(f"⚠️ The file '{DATA_FILE}' was not found. Please place it in the same directory as your Streamlit script.")
+        return
+
+    columns = backend.numeric_columns()
+    col1, col2, col3 = st.columns([2, 2, 1])
+    column = col1.selectbox("Column", columns, index=columns.index(DEFAULT_COLUMN) if DEFAULT_COLUMN in columns else 0,
+                            key="forecast_column")
+    model = col2.radio("Model", list(MODELS), format_func=MODEL_LABELS.get, horizontal=True, key="forecast_model")
+    horizon = col3.slider("Years ahead", 1, 30, 10, key="forecast_horizon")
+
+    # Fitted once per dataset version, column and model for all Areas
+    with span(f"forecasting.fit.{model}"):
+        fit = fit_forecast(backend, column, model)
+    forecast = forecast_frame(fit, model, horizon)
+    summary = forecast_summary(fit, forecast)
+
+    fitted = summary.dropna(subset=["RMSE"])["Area"].tolist()
+    last_year = fit["years"][-1]
+    latest = pd.Series(fit["history"][:, -1], index=fit["areas"])[fitted]
+    default = latest.nlargest(DEFAULT_AREAS).index.tolist()
+    areas = st.multiselect("Areas to plot", fitted, default=default, key="forecast_areas")
+    if areas:
+        with span("forecasting.chart"):
+            st.plotly_chart(build_forecast_chart(fit, forecast, areas, column), use_container_width=True)
+    else:
+        st.info("Select at least one Area to plot.")
+
+    st.subheader(f"All Areas: {column} after {last_year}")
+    st.dataframe(summary, hide_index=True, column_config={
+        name: st.column_config.NumberColumn(format="%.2f") for name in summary.columns if name != "Area"
+    })
+    unfitted = len(summary) - len(fitted)
+    if unfitted:
+        st.caption(f"{unfitted} area(s) have too few years to fit this model.")
@@ -0,0 +1,133 @@
+import threading
+import unicodedata
+import pandas as pd
+
+# Map keys for the choropleth. Plotly's locationmode="country names" resolves
+# every Area string with fuzzy regexes in the browser, and silently draws FAO
+# aggregates and former states onto today's countries (or nowhere). Instead
+# each Area is mapped once per dataset version to its ISO 3166-1 alpha-3 code
+# from the table below (FAO area names, compared case- and accent-blind), and
+# names without a code are reported rather than guessed.
+ISO3 = {
+    "Afghanistan": "AFG", "Albania": "ALB", "Algeria": "DZA", "American Samoa": "ASM",
+    "Andorra": "AND", "Angola": "AGO", "Anguilla": "AIA", "Antigua and Barbuda": "ATG",
+    "Argentina": "ARG", "Armenia": "ARM", "Aruba": "ABW", "Australia": "AUS",
+    "Austria": "AUT", "Azerbaijan": "AZE", "Bahamas": "BHS", "Bahrain": "BHR",
+    "Bangladesh": "BGD", "Barbados": "BRB", "Belarus": "BLR", "Belgium": "BEL",
+    "Belize": "BLZ", "Benin": "BEN", "Bermuda": "BMU", "Bhutan": "BTN",
+    "Bolivia (Plurinational State of)": "BOL", "Bosnia and Herzegovina": "BIH", "Botswana": "BWA",
+    "Brazil": "BRA", "British Virgin Islands": "VGB", "Brunei Darussalam": "BRN", "Bulgaria": "BGR",
+    "Burkina Faso": "BFA", "Burundi": "BDI", "Cabo Verde": "CPV", "Cambodia": "KHM",
+    "Cameroon": "CMR", "Canada": "CAN", "Cayman Islands": "CYM", "Central African Republic": "CAF",
+    "Chad": "TCD", "Chile": "CHL", "China, Hong Kong SAR": "HKG", "China, Macao SAR": "MAC",
+    "China, Taiwan Province of": "TWN", "China, mainland": "CHN", "Colombia": "COL", "Comoros": "COM",
+    "Congo": "COG", "Cook Islands": "COK", "Costa Rica": "CRI", "Côte d'Ivoire": "CIV",
+    "Croatia": "HRV", "Cuba": "CUB", "Curaçao": "CUW", "Cyprus": "CYP", "Czechia": "CZE",
+    "Democratic People's Republic of Korea": "PRK", "Democratic Republic of the Congo": "COD",
+    "Denmark": "DNK", "Djibouti": "DJI", "Dominica": "DMA", "Dominican Republic": "DOM",
+    "Ecuador": "ECU", "Egypt": "EGY", "El Salvador": "SLV", "Equatorial Guinea": "GNQ",
+    "Eritrea": "ERI", "Estonia": "EST", "Eswatini": "SWZ", "Ethiopia": "ETH",
+    "Falkland Islands (Malvinas)": "FLK", "Faroe Islands": "FRO", "Fiji": "FJI", "Finland": "FIN",
+    "France": "FRA", "French Guiana": "GUF", "French Polynesia": "PYF", "Gabon": "GAB",
+    "Gambia": "GMB", "Georgia": "GEO", "Germany": "DEU", "Ghana": "GHA", "Gibraltar": "GIB",
+    "Greece": "GRC", "Greenland": "GRL", "Grenada": "GRD", "Guadeloupe": "GLP", "Guam": "GUM",
+    "Guatemala": "GTM", "Guinea": "GIN", "Guinea-Bissau": "GNB", "Guyana": "GUY", "Haiti": "HTI",
+    "Holy See": "VAT", "Honduras": "HND", "Hungary": "HUN", "Iceland": "ISL", "India": "IND",
+    "Indonesia": "IDN", "Iran (Islamic Republic of)": "IRN", "Iraq": "IRQ", "Ireland": "IRL",
+    "Isle of Man": "IMN", "Israel": "ISR", "Italy": "ITA", "Jamaica": "JAM", "Japan": "JPN",
+    "Jordan": "JOR", "Kazakhstan": "KAZ", "Kenya": "KEN", "Kiribati": "KIR", "Kuwait": "KWT",
+    "Kyrgyzstan": "KGZ", "Lao People's Democratic Republic": "LAO", "Latvia": "LVA",
+    "Lebanon": "LBN", "Lesotho": "LSO", "Liberia": "LBR", "Libya": "LBY", "Liechtenstein": "LIE",
+    "Lithuania": "LTU", "Luxembourg": "LUX", "Madagascar": "MDG", "Malawi": "MWI",
+    "Malaysia": "MYS", "Maldives": "MDV", "Mali": "MLI", "Malta": "MLT", "Marshall Islands": "MHL",
+    "Martinique": "MTQ", "Mauritania": "MRT", "Mauritius": "MUS", "Mayotte": "MYT", "Mexico": "MEX",
+    "Micronesia (Federated States of)": "FSM", "Monaco": "MCO", "Mongolia": "MNG",
+    "Montenegro": "MNE", "Montserrat": "MSR", "Morocco": "MAR", "Mozambique": "MOZ",
+    "Myanmar": "MMR", "Namibia": "NAM", "Nauru": "NRU", "Nepal": "NPL",
+    "Netherlands (Kingdom of the)": "NLD", "Netherlands": "NLD", "New Caledonia": "NCL",
+    "New Zealand": "NZL", "Nicaragua": "NIC", "Niger": "NER", "Nigeria": "NGA", "Niue": "NIU",
+    "North Macedonia": "MKD", "Northern Mariana Islands": "MNP", "Norway": "NOR", "Oman": "OMN",
+    "Pakistan": "PAK", "Palau": "PLW", "Palestine": "PSE", "Panama": "PAN",
+    "Papua New Guinea": "PNG", "Paraguay": "PRY", "Peru": "PER", "Philippines": "PHL",
+    "Poland": "POL", "Portugal": "PRT", "Puerto Rico": "PRI", "Qatar": "QAT",
+    "Republic of Korea": "KOR", "Republic of Moldova": "MDA", "Réunion": "REU", "Romania": "ROU",
+    "Russian Federation": "RUS", "Rwanda": "RWA", "Saint Helena, Ascension and Tristan da Cunha": "SHN",
+    "Saint Kitts and Nevis": "KNA", "Saint Lucia": "LCA", "Saint Pierre and Miquelon": "SPM",
+    "Saint Vincent and the Grenadines": "VCT", "Samoa": "WSM", "San Marino": "SMR",
+    "Sao Tome and Principe": "STP", "Saudi Arabia": "SAU", "Senegal": "SEN", "Serbia": "SRB",
+    "Seychelles": "SYC", "Sierra Leone": "SLE", "Singapore": "SGP", "Slovakia": "SVK",
+    "Slovenia": "SVN", "Solomon Islands": "SLB", "Somalia": "SOM", "South Africa": "ZAF",
+    "South Sudan": "SSD", "Spain": "ESP", "Sri Lanka": "LKA", "Sudan": "SDN", "Suriname": "SUR",
+    "Sweden": "SWE", "Switzerland": "CHE", "Syrian Arab Republic": "SYR", "Tajikistan": "TJK",
+    "Thailand": "THA", "Timor-Leste": "TLS", "Togo": "TGO", "Tokelau": "TKL", "Tonga": "TON",
+    "Trinidad and Tobago": "TTO", "Tunisia": "TUN", "Türkiye": "TUR", "Turkey": "TUR",
+    "Turkmenistan": "TKM", "Turks and Caicos Islands": "TCA", "Tuvalu": "TUV", "Uganda": "UGA",
+    "Ukraine": "UKR", "United Arab Emirates": "ARE",
+    "United Kingdom of Great Britain and Northern Ireland": "GBR",
+    "United Republic of Tanzania": "TZA", "United States Virgin Islands": "VIR",
+    "United States of America": "USA", "Uruguay": "URY", "Uzbekistan": "UZB", "Vanuatu": "VUT",
+    "Venezuela (Bolivarian Republic of)": "VEN", "Viet Nam": "VNM",
+    "Wallis and Futuna Islands": "WLF", "Western Sahara": "ESH", "Yemen": "YEM",
+    "Zambia": "ZMB", "Zimbabwe": "ZWE",
+}
+# Known FAO areas deliberately left off the map, with the reason shown in the report
+NO_KEY = {
+    "China": "aggregate of China, mainland, Hong Kong, Macao and Taiwan",
+    "Channel Islands": "aggregate of Jersey and Guernsey",
+    "Belgium-Luxembourg": "former reporting area",
+    "Czechoslovakia": "former state",
+    "Ethiopia PDR": "former state",
+    "Netherlands Antilles (former)": "former state",
+    "Pacific Islands Trust Territory": "former territory",
+    "Serbia and Montenegro": "former state",
+    "Sudan (former)": "former state",
+    "USSR": "former state",
+    "Yugoslav SFR": "former state",
+}
+
+_LOCK = threading.Lock()
+_INDEXES = {}
+
+
+def _normalize(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+_KEYS = {_normalize(name): code for name, code in ISO3.items()}
+_REASONS = {_normalize(name): reason for name, reason in NO_KEY.items()}
+
+
+# ISO-3 code for an Area name (None when it has none)
+def geo_key(area):
+    return _KEYS.get(_normalize(area))
+
+
+# Areas with their ISO-3 code ("ISO3", None when unmatched) and, for those
+# without one, why ("Reason")
+def build_geo_index(areas) -> pd.DataFrame:
+    areas = list(areas)
+    codes = [geo_key(area) for area in areas]
+    reasons = [
+        None if code is not None else _REASONS.get(_normalize(area), "no ISO-3 code known")
+        for area, code in zip(areas, codes)
+    ]
+    return pd.DataFrame({"Area": areas, "ISO3": codes, "Reason": reasons})
+
+
+# The geo index of a backend's dataset, built once per dataset version
+def geo_index(backend) -> pd.DataFrame:
+    key = (backend.name, backend.path)
+    with _LOCK:
+        cached = _INDEXES.get(key)
+        if cached is not None and cached[0] == backend.version:
+            return cached[1]
+    index = build_geo_index(backend.distinct("Area"))
+    with _LOCK:
+        _INDEXES[key] = (backend.version, index)
+    return index
+
+
+# Areas of a geo index that are not drawn on the map
+def unmatched_areas(index: pd.DataFrame) -> pd.DataFrame:
+    return index[index["ISO3"].isna()][["Area", "Reason"]].reset_index(drop=True)
@@ -0,0 +1,245 @@
+import atexit
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from assets import asset_stats
+from figure_cache import figure_cache_stats
+
+# Per-stage timing spans for the pages. Off by default: span() then hands back
+# one shared no-op context manager, so instrumented code pays a function call
+# and nothing else. With CARBONIVORE_TIMING=1 every span feeds a per-process
+# histogram for its stage, which can be written as a Prometheus text file,
+# logged as one JSON line per span, and browsed in the sidebar debug panel.
+# The process-wide caches' hit/miss counters are exported and shown next to
+# the stage timings.
+ENABLED = os.environ.get("CARBONIVORE_TIMING", "0") == "1"
+# Prometheus text exposition file, rewritten at most every METRICS_INTERVAL seconds
+METRICS_FILE = os.environ.get("CARBONIVORE_TIMING_METRICS")
+METRICS_INTERVAL = float(os.environ.get("CARBONIVORE_TIMING_METRICS_INTERVAL", "10"))
+# Structured log: one JSON object per finished span
+LOG_FILE = os.environ.get("CARBONIVORE_TIMING_LOG")
+
+# Histogram bucket upper bounds in seconds (the last bucket is +Inf)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_NAME = "carbonivore_stage_seconds"
+# Process-wide caches reported with the timings: name -> stats function
+CACHES = {"figure": figure_cache_stats, "asset": asset_stats}
+CACHE_METRIC = "carbonivore_cache"
+
+_LOCK = threading.Lock()
+_STAGES = {}
+_NOOP = nullcontext()
+_last_metrics_write = 0.0
+
+_log = logging.getLogger("carbonivore.timing")
+_metrics_log = logging.getLogger("carbonivore.metrics")
+if ENABLED and LOG_FILE:
+    _handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _log.addHandler(_handler)
+    _log.setLevel(logging.INFO)
+    _log.propagate = False
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+# Time the enclosed block as one observation of stage
+def span(stage: str):
+    if not ENABLED:
+        return _NOOP
+    return _Span(stage)
+
+
+# Add one observation (seconds) to the stage's histogram
+def record(stage: str, seconds: float):
+    with _LOCK:
+        stats = _STAGES.get(stage)
+        if stats is None:
+            stats = _STAGES[stage] = {
+                "count": 0, "sum": 0.0, "max": 0.0, "last": 0.0, "buckets": [0] * (len(BUCKETS) + 1)
+            }
+        stats["count"] += 1
+        stats["sum"] += seconds
+        stats["last"] = seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["buckets"][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    if LOG_FILE:
+        _log.info(json.dumps({"ts": round(time.time(), 6), "stage": stage, "seconds": round(seconds, 6)}))
+    if METRICS_FILE and _metrics_due():
+        # Written off the page's thread; a slow or failing disk never reaches it
+        threading.Thread(target=_write_metrics_quietly, name="metrics-writer", daemon=True).start()
+
+
+# Claim the next metrics write if the interval has passed since the last one
+def _metrics_due() -> bool:
+    global _last_metrics_write
+    with _LOCK:
+        now = time.monotonic()
+        if now - _last_metrics_write < METRICS_INTERVAL:
+            return False
+        _last_metrics_write = now
+        return True
+
+
+# Quantile q (0..1) estimated from the histogram, interpolating inside a bucket
+def _quantile(stats: dict, q: float) -> float:
+    target = q * stats["count"]
+    seen = 0
+    for i, count in enumerate(stats["buckets"]):
+        if count and seen + count >= target:
+            lower = BUCKETS[i - 1] if i > 0 else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else stats["max"]
+            return min(lower + (upper - lower) * (target - seen) / count, stats["max"])
+        seen += count
+    return stats["max"]
+
+
+# One row per stage (milliseconds), slowest total first
+def stage_summary() -> list:
+    with _LOCK:
+        stages = {stage: dict(stats, buckets=list(stats["buckets"])) for stage, stats in _STAGES.items()}
+    rows = [
+        {
+            "Stage": stage,
+            "Count": stats["count"],
+            "Last ms": stats["last"] * 1e3,
+            "Mean ms": stats["sum"] / stats["count"] * 1e3,
+            "p50 ms": _quantile(stats, 0.5) * 1e3,
+            "p95 ms": _quantile(stats, 0.95) * 1e3,
+            "Max ms": stats["max"] * 1e3,
+            "Total s": stats["sum"],
+        }
+        for stage, stats in stages.items()
+    ]
+    return sorted(rows, key=lambda row: row["Total s"], reverse=True)
+
+
+# One row per cache with its counters and hit rate
+def cache_summary() -> list:
+    rows = []
+    for name, stats_of in CACHES.items():
+        stats = stats_of()
+        rows.append({
+            "Cache": name,
+            "Hits": stats["hits"],
+            "Misses": stats["misses"],
+            "Hit rate %": stats["hit_rate"] * 100,
+            "Entries": stats["entries"],
+            "Evictions": stats["evictions"],
+        })
+    return rows
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# All stage histograms in the Prometheus text exposition format
+def metrics_text() -> str:
+    with _LOCK:
+        stages = {stage: dict(stats, buckets=list(stats["buckets"])) for stage, stats in _STAGES.items()}
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each page stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage in sorted(stages):
+        stats = stages[stage]
+        label = _escape(stage)
+        cumulative = 0
+        for bound, count in zip(list(BUCKETS) + ["+Inf"], stats["buckets"]):
+            cumulative += count
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {stats["sum"]:.6f}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {stats["count"]}')
+
+    caches = {name: stats_of() for name, stats_of in CACHES.items()}
+    for key, kind, help_text in (
+        ("hits", "counter", "Lookups answered from the cache."),
+        ("misses", "counter", "Lookups that had to build the value."),
+        ("evictions", "counter", "Entries dropped to stay within the cache's limit."),
+        ("entries", "gauge", "Entries currently held."),
+    ):
+        name = f"{CACHE_METRIC}_{key}_total" if kind == "counter" else f"{CACHE_METRIC}_{key}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for cache in sorted(caches):
+            lines.append(f'{name}{{cache="{_escape(cache)}"}} {caches[cache][key]}')
+    return "\n".join(lines) + "\n"
+
+
+# Atomically rewrite the Prometheus text file (for a node_exporter textfile collector)
+def write_metrics(path: str = None):
+    global _last_metrics_write
+    path = path or METRICS_FILE
+    if not path:
+        return
+    with _LOCK:
+        _last_metrics_write = time.monotonic()
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(metrics_text())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _write_metrics_quietly():
+    try:
+        write_metrics()
+    except OSError as e:
+        _metrics_log.warning("Could not write metrics to %s: %s", METRICS_FILE, e)
+
+
+def reset_timings():
+    with _LOCK:
+        _STAGES.clear()
+
+
+if ENABLED and METRICS_FILE:
+    atexit.register(_write_metrics_quietly)
+
+
+# Sidebar panel with the per-stage timings, the cache counters and the
+# per-session memory gauge; shown only while timing is enabled
+def show_debug_panel():
+    if not ENABLED:
+        return
+    import streamlit as st
+    from session_data import show_memory_panel
+
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        rows = stage_summary()
+        if rows:
+            st.dataframe(rows, hide_index=True, column_config={
+                column: st.column_config.NumberColumn(format="%.1f")
+                for column in ["Last ms", "Mean ms", "p50 ms", "p95 ms", "Max ms"]
+            })
+        else:
+            st.write("No timings recorded yet.")
+        st.dataframe(cache_summary(), hide_index=True, column_config={
+            "Hit rate %": st.column_config.NumberColumn(format="%.1f")
+        })
+        st.download_button("Download metrics", metrics_text(), file_name="carbonivore_metrics.prom")
+        if st.button("Reset timings"):
+            reset_timings()
+    show_memory_panel()
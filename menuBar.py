@@ -1,9 +1,17 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
-from about import show_about
-from visualization import show_visualization
-from touch import get_in_touch
-from  preprocessing import show_preprocessing
+from instrumentation import span
+
+# Session state key of the page menu's selection
+PAGE_KEY = "page"
+
+# Emails allowed to open the admin page, from [admin] emails = [...] in secrets
+def is_admin(email: str) -> bool:
+    try:
+        admins = st.secrets["admin"]["emails"]
+    except (FileNotFoundError, KeyError):
+        return False
+    return email in admins
 
 def main_app():
     # Check if user is logged in
@@ -22,23 +30,45 @@ def main_app():
         st.success("You have been logged out.")
         st.rerun()
 
-    # Horizontal menu
+    # Horizontal menu (the Admin entry is only offered to admins)
+    options = ["About","Pre-Processing","Visualization", "Forecasting", "Get In Touch"]
+    icons = ["house","funnel", "search", "graph-up-arrow", "patch-question-fill"]
+    if is_admin(st.session_state['user']['email']):
+        options.append("Admin")
+        icons.append("inbox")
+
     selected = option_menu(
         menu_title="The Carbonivore",
-        options=["About","Pre-Processing","Visualization", "Get In Touch"],
-        icons=["house","funnel", "search", "patch-question-fill"],
+        options=options,
+        icons=icons,
         menu_icon="cast",
         default_index=0,
         orientation="horizontal",
+        key=PAGE_KEY,
     )
 
-    # Page Content Based on Selection
+    # Page Content Based on Selection (page modules, and the pandas/plotly
+    # stack behind them, are only imported once their entry is selected)
+    with span(f"page.{selected}"):
+        show_page(selected)
+
+def show_page(selected):
     if selected == "About":
+        from about import show_about
         show_about()
     elif selected == "Pre-Processing":
-         show_preprocessing()    
+        from preprocessing import show_preprocessing
+        show_preprocessing()
     elif selected == "Visualization":
+        from visualization import show_visualization
         show_visualization()
+    elif selected == "Forecasting":
+        from forecasting import show_forecasting
+        show_forecasting()
     elif selected == "Get In Touch":
+        from touch import get_in_touch
         get_in_touch()
+    elif selected == "Admin" and is_admin(st.session_state['user']['email']):
+        from admin import show_admin
+        show_admin()
         
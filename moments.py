@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+# Sufficient statistics for correlations. build_moment_store keeps, for every
+# (Area, Year) cell, the row count, each column's mean and the co-moments of
+# every column pair (sums of cross-products of the values centered on the cell
+# means), so the correlation of any column set over any Area/Year selection is
+# assembled from the selected cells without touching the rows again. Cells are
+# combined with the pairwise update of Chan et al.: co-moments are only ever
+# added around the combined mean, which keeps the result stable for columns
+# with large magnitudes (populations) where raw sums of squares would cancel.
+#
+# Matches DataFrame.corr(): each pair uses the rows where both columns are
+# present. Cells without missing values (all of them in cleaned_data.csv) need
+# only the shared triangle; cells with gaps also keep per-pair counts, sums and
+# second moments over the rows where the other column is present.
+STORE_KEYS = ["Area", "Year"]
+
+
+# Moments of the columns of X per (I[k], J[k]) pair over rows where both are
+# present: count, means, co-moment and both second moments
+def pair_moments(X: np.ndarray, I: np.ndarray, J: np.ndarray) -> dict:
+    x, y = X[:, I], X[:, J]
+    valid = ~(np.isnan(x) | np.isnan(y))
+    n = valid.sum(axis=0).astype("float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.where(valid, x, 0).sum(axis=0) / n
+        mean_y = np.where(valid, y, 0).sum(axis=0) / n
+    dx = np.where(valid, x - mean_x, 0)
+    dy = np.where(valid, y - mean_y, 0)
+    return {
+        "n": n,
+        "mean_x": np.nan_to_num(mean_x),
+        "mean_y": np.nan_to_num(mean_y),
+        "c_xy": (dx * dy).sum(axis=0),
+        "m2_x": (dx * dx).sum(axis=0),
+        "m2_y": (dy * dy).sum(axis=0),
+    }
+
+
+# Combine the pair moments of two disjoint row sets (Chan et al. parallel update)
+def merge_moments(a: dict, b: dict) -> dict:
+    n = a["n"] + b["n"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(n > 0, a["n"] * b["n"] / n, 0)
+        share = np.where(n > 0, b["n"] / n, 0)
+    delta_x = b["mean_x"] - a["mean_x"]
+    delta_y = b["mean_y"] - a["mean_y"]
+    return {
+        "n": n,
+        "mean_x": a["mean_x"] + delta_x * share,
+        "mean_y": a["mean_y"] + delta_y * share,
+        "c_xy": a["c_xy"] + b["c_xy"] + delta_x * delta_y * weight,
+        "m2_x": a["m2_x"] + b["m2_x"] + delta_x * delta_x * weight,
+        "m2_y": a["m2_y"] + b["m2_y"] + delta_y * delta_y * weight,
+    }
+
+
+# Correlation matrix (columns x columns) from pair moments laid out row-major
+def correlation_matrix(moments: dict, columns) -> pd.DataFrame:
+    k = len(columns)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = moments["c_xy"] / np.sqrt(moments["m2_x"] * moments["m2_y"])
+    corr = np.where(moments["n"] > 1, np.clip(corr, -1, 1), np.nan)
+    return pd.DataFrame(corr.reshape(k, k), index=list(columns), columns=list(columns))
+
+
+def _triangle(k: int):
+    return np.triu_indices(k)
+
+
+# Per-cell statistics for the numeric columns of df (built once per dataset version)
+def build_moment_store(df: pd.DataFrame, columns=None) -> dict:
+    if columns is None:
+        columns = [c for c in df.select_dtypes("number").columns if c not in STORE_KEYS]
+    columns = list(columns)
+    k = len(columns)
+    codes, cells = pd.MultiIndex.from_frame(df[STORE_KEYS]).factorize(sort=True)
+    cells = pd.MultiIndex.from_tuples(list(cells), names=STORE_KEYS)
+    n_cells = len(cells)
+    X = df[columns].to_numpy(dtype="float64", na_value=np.nan)
+    present = ~np.isnan(X)
+
+    def per_cell(weights):
+        return np.bincount(codes, weights=weights, minlength=n_cells)
+
+    rows = np.bincount(codes, minlength=n_cells).astype("float64")
+    counts = np.column_stack([per_cell(present[:, i]) for i in range(k)])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.column_stack([per_cell(np.where(present[:, i], X[:, i], 0)) for i in range(k)]) / counts
+    means = np.nan_to_num(means)
+    # Values centered on their cell's mean, 0 where missing
+    D = np.where(present, X - means[codes], 0)
+
+    I, J = _triangle(k)
+    comoments = np.column_stack([per_cell(D[:, i] * D[:, j]) for i, j in zip(I, J)])
+
+    # Cells with gaps: pair counts N[i, j], sums S[i, j] of column i's centered
+    # values and second moments Q[i, j] of column i, over rows where j is present
+    gappy = np.flatnonzero(per_cell(~present.all(axis=1)) > 0)
+    slot = np.full(n_cells, -1)
+    slot[gappy] = np.arange(len(gappy))
+    rows_in_gappy = np.flatnonzero(slot[codes] >= 0)
+    rows_in_gappy = rows_in_gappy[np.argsort(slot[codes[rows_in_gappy]], kind="stable")]
+    starts = np.searchsorted(slot[codes[rows_in_gappy]], np.arange(len(gappy)))
+    weight = present[rows_in_gappy].astype("float64")
+    sub_D = D[rows_in_gappy]
+    pairs = {name: np.zeros((len(gappy), k, k)) for name in ("N", "S", "Q")}
+    if len(gappy):
+        for j in range(k):
+            other = weight[:, j:j + 1]
+            pairs["N"][:, :, j] = np.add.reduceat(weight * other, starts, axis=0)
+            pairs["S"][:, :, j] = np.add.reduceat(sub_D * other, starts, axis=0)
+            pairs["Q"][:, :, j] = np.add.reduceat(sub_D * sub_D * other, starts, axis=0)
+
+    return {
+        "columns": columns,
+        "cells": cells,
+        "rows": rows,
+        "means": means,
+        "comoments": comoments,
+        "slot": slot,
+        "pairs": pairs,
+    }
+
+
+# Positions of the store's cells in the selection (None selects everything)
+def select_store_cells(store: dict, areas=None, years=None) -> np.ndarray:
+    mask = np.ones(len(store["cells"]), dtype=bool)
+    if areas is not None:
+        mask &= store["cells"].get_level_values("Area").isin(areas)
+    if years is not None:
+        mask &= store["cells"].get_level_values("Year").isin(years)
+    return np.flatnonzero(mask)
+
+
+# Correlation matrix of columns over the given cells, same as DataFrame.corr()
+# on the rows of those cells
+def store_correlation(store: dict, cells: np.ndarray, columns) -> pd.DataFrame:
+    position = {column: i for i, column in enumerate(store["columns"])}
+    index = np.array([position[column] for column in columns], dtype=int)
+    k, m = len(store["columns"]), len(index)
+    # Every ordered pair of the requested columns, row-major
+    I, J = np.repeat(index, m), np.tile(index, m)
+    low, high = np.minimum(I, J), np.maximum(I, J)
+    triangle = np.full((k, k), -1)
+    triangle[_triangle(k)] = np.arange(k * (k + 1) // 2)
+
+    means = store["means"][cells]
+    comoment = store["comoments"][cells][:, triangle[low, high]]
+    # Complete cells: every pair covers all rows and the centered sums vanish
+    n = np.repeat(store["rows"][cells][:, None], len(I), axis=1)
+    s_x = np.zeros_like(n)
+    s_y = np.zeros_like(n)
+    q_x = store["comoments"][cells][:, triangle[I, I]]
+    q_y = store["comoments"][cells][:, triangle[J, J]]
+
+    slots = store["slot"][cells]
+    gappy = slots >= 0
+    if gappy.any():
+        pairs = store["pairs"]
+        used = slots[gappy]
+        n[gappy] = pairs["N"][used][:, I, J]
+        s_x[gappy] = pairs["S"][used][:, I, J]
+        s_y[gappy] = pairs["S"][used][:, J, I]
+        q_x[gappy] = pairs["Q"][used][:, I, J]
+        q_y[gappy] = pairs["Q"][used][:, J, I]
+
+    # Each cell's moments over the rows where both columns are present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = means[:, I] + np.where(n > 0, s_x / n, 0)
+        mean_y = means[:, J] + np.where(n > 0, s_y / n, 0)
+        c_xy = comoment - np.where(n > 0, s_x * s_y / n, 0)
+        m2_x = q_x - np.where(n > 0, s_x * s_x / n, 0)
+        m2_y = q_y - np.where(n > 0, s_y * s_y / n, 0)
+
+    # Combine all cells at once around the overall pair means
+    total = n.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        center_x = (n * mean_x).sum(axis=0) / total
+        center_y = (n * mean_y).sum(axis=0) / total
+    dx = np.where(n > 0, mean_x - center_x, 0)
+    dy = np.where(n > 0, mean_y - center_y, 0)
+    moments = {
+        "n": total,
+        "c_xy": c_xy.sum(axis=0) + (n * dx * dy).sum(axis=0),
+        "m2_x": m2_x.sum(axis=0) + (n * dx * dx).sum(axis=0),
+        "m2_y": m2_y.sum(axis=0) + (n * dy * dy).sum(axis=0),
+    }
+    return correlation_matrix(moments, columns)
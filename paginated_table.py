@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+# Table component that keeps the frame on the server and sends the browser
+# only the rows on the current page. Sorting walks a precomputed per-column
+# sort order of the full frame and keeps the positions inside the current view,
+# so changing the sort column never sorts the data again.
+PAGE_SIZE = 50
+ORIGINAL_ORDER = "(original order)"
+
+
+# Row positions of df in ascending order of column (stable, missing values last)
+def column_sort_order(df: pd.DataFrame, column: str) -> np.ndarray:
+    values = df[column].reset_index(drop=True)
+    return values.sort_values(kind="stable", na_position="last").index.to_numpy()
+
+
+# Size of the Arrow stream Streamlit sends for a frame
+def arrow_payload_bytes(df: pd.DataFrame) -> int:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+# Visible positions of the view, in the requested order
+def _ordered_positions(n_rows: int, positions, order):
+    if order is None:
+        return np.arange(n_rows) if positions is None else positions
+    if positions is None:
+        return order
+    member = np.zeros(n_rows, dtype=bool)
+    member[positions] = True
+    return order[member[order]]
+
+
+# Descending order of values from their ascending one: the present values
+# reversed with ties kept in row order, then the missing ones, still last
+def _descending(ordered: np.ndarray, values: np.ndarray) -> np.ndarray:
+    missing = pd.isna(values[ordered])
+    present = ordered[~missing][::-1]
+    keys = values[present]
+    # Reversing put every run of equal values in reverse row order; flip each run back
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.intp)
+    ends = np.r_[starts[1:], len(keys)].astype(np.intp)
+    run = np.repeat(np.arange(len(starts)), ends - starts)
+    present = present[starts[run] + ends[run] - 1 - np.arange(len(keys))]
+    return np.concatenate([present, ordered[missing]])
+
+
+# Render one page of df restricted to positions (None means every row).
+# sort_order(column) returns column_sort_order for the full frame, usually
+# from a per-dataset cache; without it the table keeps the original order.
+def show_paginated_table(df: pd.DataFrame, key: str, positions=None, sort_order=None,
+                         page_size: int = PAGE_SIZE):
+    total = len(df) if positions is None else len(positions)
+    pages = max(1, -(-total // page_size))
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    sort_column = ORIGINAL_ORDER
+    descending = False
+    if sort_order is not None:
+        sort_column = col1.selectbox("Sort by", [ORIGINAL_ORDER] + list(df.columns), key=f"{key}_sort")
+        descending = col2.toggle("Descending", key=f"{key}_descending")
+    page = col3.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    page = min(int(page), pages)
+
+    order = None
+    if sort_column != ORIGINAL_ORDER:
+        order = sort_order(sort_column)
+    ordered = _ordered_positions(len(df), positions, order)
+    if descending:
+        ordered = ordered[::-1] if order is None else _descending(ordered, df[sort_column].to_numpy())
+
+    start = (page - 1) * page_size
+    window = df.take(ordered[start:start + page_size])
+    st.dataframe(window)
+    st.caption(
+        f"Rows {min(start + 1, total):,}–{min(start + page_size, total):,} of {total:,} · "
+        f"page payload {arrow_payload_bytes(window) / 1024:.1f} KB"
+    )
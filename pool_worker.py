@@ -0,0 +1,17 @@
+import figure_pipeline  # noqa: F401
+import forecast_models  # noqa: F401
+import menuBar  # noqa: F401
+import signin  # noqa: F401
+import signup  # noqa: F401
+import streamlit_lottie  # noqa: F401
+import visualization  # noqa: F401
+import warmup  # noqa: F401
+
+# Preloaded by the forkserver that starts the app's process pools (see
+# figure_pipeline.process_context), so every worker it forks starts with the
+# pool tasks' modules (figure_pipeline._build_spec with the visualization
+# builders, forecast_models._fit_holt_task) and the rest of app.py's imports
+# already loaded. multiprocessing still runs the parent's main script in each
+# worker, as __mp_main__, before its first task; app.py keeps its page code
+# under the __main__ guard, so there that run only finds these modules loaded
+# and defines its functions.
@@ -1,50 +1,58 @@
 import streamlit as st
 import pandas as pd
 import os
-import json
 from streamlit_lottie import st_lottie
-
-def load_lottiefile(filepath: str):
-    with open(filepath, "r") as f:
-        return json.load(f)
+from assets import load_lottie
+from data_store import load_dataset
+from profiling import load_profile
+from instrumentation import span
 
 def show_preprocessing():
     st.title("🧼 Pre-processing Overview")
-    lottie_preprocessing = load_lottiefile("data_preprocessing.json")
+    lottie_preprocessing = load_lottie("data_preprocessing.json")
     st_lottie(lottie_preprocessing, speed=1, reverse=False, loop=True, quality="high", width=300)
 
     st.markdown("---")
 
     try:
-        df = pd.read_csv("the_Carbonivore.csv")
+        with span("preprocessing.load_dataset"):
+            df = load_dataset("the_Carbonivore.csv")
+        with span("preprocessing.load_profile"):
+            profile = load_profile("the_Carbonivore.csv")
+        columns = pd.DataFrame(profile["columns"])
 
-        st.subheader("🔎 First 5 Rows of Data")
-        st.dataframe(df.head())
+        with span("preprocessing.head_tail"):
+            st.subheader("🔎 First 5 Rows of Data")
+            st.dataframe(df.head())
 
-        st.markdown("---")
-        
-        st.subheader("🔎 last 5 Rows of Data")
-        st.dataframe(df.tail())
+            st.markdown("---")
+
+            st.subheader("🔎 last 5 Rows of Data")
+            st.dataframe(df.tail())
 
         st.markdown("---")
 
         st.subheader("📏 Duplicate Rows")
-        st.write(f"Total Duplicates: {df.duplicated().sum()}")
+        st.write(f"Total Duplicates: {profile['duplicates']}")
 
         st.markdown("---")
 
         st.subheader("🚨 Null Value Count")
-        st.dataframe(df.isnull().sum().reset_index().rename(columns={0: 'Missing Count', 'index': 'Column'}))
+        st.dataframe(columns[["name", "nulls"]].rename(columns={"name": "Column", "nulls": "Missing Count"}))
 
         st.markdown("---")
 
         st.subheader("📊 Data Types & Non-Null Count")
-        summary = pd.DataFrame({
-            "Column": df.columns,
-            "Data Type": df.dtypes.values,
-            "Non-Null Count": df.notnull().sum().values
-        })
-        st.dataframe(summary)
+        with span("preprocessing.column_summary"):
+            summary = columns.rename(columns={
+                "name": "Column",
+                "dtype": "Data Type",
+                "non_null": "Non-Null Count",
+                "min": "Min",
+                "max": "Max",
+                "distinct": "Distinct Values",
+            })
+            st.dataframe(summary[["Column", "Data Type", "Non-Null Count", "Min", "Max", "Distinct Values"]])
 
         st.markdown("---")
 
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from data_store import dataset_version, load_dataset
+
+# Data-quality profile of a CSV: duplicate rows, null/non-null counts, dtypes,
+# min/max and cardinality per column. It is computed in one pass over the
+# columns and saved next to the CSV (the_Carbonivore.profile.json), keyed on
+# the file's content hash. A companion .profile.npz keeps the row hashes and
+# per-column value hashes, so rows appended to the CSV are profiled on their
+# own and merged in instead of re-profiling the whole file.
+_HASH_CHUNK = 1024 * 1024
+_ROW_HASH_PRIME = np.uint64(1000003)
+
+_LOCK = threading.Lock()
+_PROFILES = {}
+
+
+def profile_paths(path: str):
+    base = os.path.splitext(path)[0]
+    return base + ".profile.json", base + ".profile.npz"
+
+
+# Per-column value hashes, normalized so an int column and the same values read
+# back as floats (e.g. from an appended chunk with nulls) hash identically
+def _column_hashes(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        series = series.astype("float64")
+    else:
+        series = series.astype(object)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def _scalar(value):
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+# Profile a frame. Returns (profile, state) where state holds the hashes needed
+# for incremental updates.
+def profile_frame(df: pd.DataFrame):
+    row_hashes = np.zeros(len(df), dtype=np.uint64)
+    columns = []
+    state = {}
+
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        hashes = _column_hashes(series)
+        row_hashes = (row_hashes * _ROW_HASH_PRIME) ^ hashes
+
+        nulls = int(series.isna().sum())
+        numeric = pd.api.types.is_numeric_dtype(series)
+        distinct = np.unique(hashes[series.notna().to_numpy()])
+        state[f"column_{i}"] = distinct
+        columns.append({
+            "name": name,
+            "dtype": str(series.dtype),
+            "nulls": nulls,
+            "non_null": len(series) - nulls,
+            "min": _scalar(series.min()) if numeric else None,
+            "max": _scalar(series.max()) if numeric else None,
+            "distinct": len(distinct),
+        })
+
+    state["row_hashes"] = row_hashes
+    profile = {
+        "rows": len(df),
+        "duplicates": int(len(row_hashes) - len(np.unique(row_hashes))),
+        "columns": columns,
+    }
+    return profile, state
+
+
+def _merge_dtype(old: str, new: str) -> str:
+    if old == new:
+        return old
+    try:
+        return str(np.result_type(np.dtype(old), np.dtype(new)))
+    except TypeError:
+        return "object"
+
+
+def _merge_bound(old, new, pick):
+    if old is None:
+        return new
+    if new is None:
+        return old
+    return pick(old, new)
+
+
+# Merge the profile of appended rows into an existing profile
+def merge_profiles(profile: dict, state: dict, added: pd.DataFrame):
+    added_profile, added_state = profile_frame(added)
+
+    row_hashes = np.concatenate([state["row_hashes"], added_state["row_hashes"]])
+    merged_state = {"row_hashes": row_hashes}
+    columns = []
+    for i, (old, new) in enumerate(zip(profile["columns"], added_profile["columns"])):
+        distinct = np.union1d(state[f"column_{i}"], added_state[f"column_{i}"])
+        merged_state[f"column_{i}"] = distinct
+        columns.append({
+            "name": old["name"],
+            "dtype": _merge_dtype(old["dtype"], new["dtype"]),
+            "nulls": old["nulls"] + new["nulls"],
+            "non_null": old["non_null"] + new["non_null"],
+            "min": _merge_bound(old["min"], new["min"], min),
+            "max": _merge_bound(old["max"], new["max"], max),
+            "distinct": len(distinct),
+        })
+
+    merged = {
+        "rows": profile["rows"] + added_profile["rows"],
+        "duplicates": int(len(row_hashes) - len(np.unique(row_hashes))),
+        "columns": columns,
+    }
+    return merged, merged_state
+
+
+# sha256 of the whole file, plus the sha256 of its first prefix_bytes bytes
+def _file_hashes(path: str, prefix_bytes: int = None):
+    digest = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+    with open(path, "rb") as f:
+        while True:
+            limit = _HASH_CHUNK
+            if prefix_bytes is not None and read < prefix_bytes:
+                limit = min(limit, prefix_bytes - read)
+            chunk = f.read(limit)
+            if not chunk:
+                break
+            digest.update(chunk)
+            read += len(chunk)
+            if prefix_bytes is not None and read == prefix_bytes:
+                prefix_digest = digest.copy().hexdigest()
+    return digest.hexdigest(), prefix_digest
+
+
+def _read_sidecars(json_path: str, state_path: str):
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        with np.load(state_path) as npz:
+            state = {key: npz[key] for key in npz.files}
+        return profile, state
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _write_sidecars(json_path: str, state_path: str, profile: dict, state: dict):
+    # Temp files swapped into place, state first so the JSON never points at stale hashes
+    state_tmp = f"{state_path}.{os.getpid()}.tmp.npz"
+    json_tmp = f"{json_path}.{os.getpid()}.tmp"
+    try:
+        np.savez(state_tmp, **state)
+        os.replace(state_tmp, state_path)
+        with open(json_tmp, "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        os.replace(json_tmp, json_path)
+    except OSError:
+        # Read-only deployments keep the in-process copy only
+        for tmp in (state_tmp, json_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+# Appended rows only: the old file ends on a line break and is an exact prefix
+def _appended_rows(path: str, profile: dict, prefix_sha: str):
+    old_bytes = profile["source"]["bytes"]
+    if prefix_sha != profile["source"]["sha256"]:
+        return None
+    with open(path, "rb") as f:
+        f.seek(old_bytes - 1)
+        if f.read(1) != b"\n":
+            return None
+        names = [column["name"] for column in profile["columns"]]
+        # Parsed like data_store.load_dataset parses the whole file
+        return pd.read_csv(f, header=None, names=names, float_precision="round_trip")
+
+
+# Load the profile for a CSV, reusing or incrementally updating the sidecar
+def load_profile(path: str) -> dict:
+    key = os.path.abspath(path)
+    version = dataset_version(key)
+    with _LOCK:
+        cached = _PROFILES.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    json_path, state_path = profile_paths(key)
+    profile, state = _read_sidecars(json_path, state_path)
+    size = os.path.getsize(key)
+
+    prefix_bytes = None
+    if profile is not None and 0 < profile["source"]["bytes"] < size:
+        prefix_bytes = profile["source"]["bytes"]
+    sha, prefix_sha = _file_hashes(key, prefix_bytes)
+
+    if profile is None or profile["source"]["sha256"] != sha:
+        added = _appended_rows(key, profile, prefix_sha) if prefix_bytes else None
+        if added is not None:
+            profile, state = merge_profiles(profile, state, added)
+        else:
+            # The frame the app already loaded, not a second parse of the CSV
+            profile, state = profile_frame(load_dataset(key))
+        profile["source"] = {"sha256": sha, "bytes": size}
+        _write_sidecars(json_path, state_path, profile, state)
+
+    with _LOCK:
+        _PROFILES[key] = (version, profile)
+    return profile
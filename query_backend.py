@@ -0,0 +1,522 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.types as pat
+from data_store import (
+    DERIVED_COLUMNS, dataset_version, ensure_parquet, get_derived, schema_report, with_derived_columns,
+)
+from aggregates import build_cube, select_cells, area_sums, area_means, latest_year_totals, no_year_totals
+from filter_index import build_filter_index, select_positions, rows_at, rows_share_frame
+from figure_cache import ALL
+from ranking import ranking_order, top_positions
+from moments import (
+    build_moment_store, correlation_matrix, merge_moments, pair_moments, select_store_cells, store_correlation,
+)
+
+# Query backends under the Visualization page. Charts ask a backend for the
+# small aggregate they plot (Area x Year sums, per-Area sums/means, latest-year
+# totals, top-N rows, a correlation matrix) instead of filtering a full frame
+# themselves. Three backends answer the same calls:
+#
+#   pandas  the whole dataset in memory, served from the shared compact frame,
+#           Area x Year cube, filter index and correlation moment store
+#           (small data, the default)
+#   arrow   chunked scans of a Parquet copy of the CSV with the filters pushed
+#           into the scan; only per-batch partial aggregates are kept
+#   duckdb  SQL over the same Parquet copy (needs the optional duckdb package)
+#
+# Selections are (areas, years) pairs as built by figure_cache.selection_key:
+# ALL or a tuple of selected values per filter.
+QUERY_BACKEND = os.environ.get("CARBONIVORE_QUERY_BACKEND", "auto")
+# With QUERY_BACKEND=auto, CSVs up to this size are loaded into memory
+IN_MEMORY_BYTES = int(os.environ.get("CARBONIVORE_IN_MEMORY_BYTES", str(256 * 1024 * 1024)))
+SCAN_BATCH_ROWS = int(os.environ.get("CARBONIVORE_SCAN_BATCH_ROWS", "262144"))
+# Largest correlation moment store the pandas backend builds (see moments.py)
+MOMENT_STORE_BYTES = int(os.environ.get("CARBONIVORE_MOMENT_STORE_BYTES", str(64 * 1024 * 1024)))
+
+SUMMARY_STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class PandasBackend:
+    name = "pandas"
+    in_memory = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = dataset_version(path)
+        self.frame = get_derived(path, "frame", with_derived_columns, compact=True)
+        self.cube = get_derived(path, "cube", build_cube, compact=True, shared=True)
+        self.index = get_derived(path, "filter_index", build_filter_index, compact=True)
+        # Guards the memo dicts, read by the figure pool and by session eviction
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._rows = {}
+
+    def _values(self, column, key):
+        return list(self.index[column]) if key == ALL else key
+
+    # Sorted row positions of the selection (None means every row)
+    def positions(self, selection):
+        with self._lock:
+            if selection in self._positions:
+                return self._positions[selection]
+        areas, years = selection
+        positions = select_positions(self.index, self._values("Area", areas), self._values("Year", years))
+        with self._lock:
+            return self._positions.setdefault(selection, positions)
+
+    # Selected rows: the shared frame or a view of it when they are contiguous,
+    # else one copy per selection kept for the backend's lifetime. Read-only
+    # (pandas copies on write).
+    def rows(self, selection) -> pd.DataFrame:
+        with self._lock:
+            if selection in self._rows:
+                return self._rows[selection]
+        rows = rows_at(self.frame, self.positions(selection))
+        with self._lock:
+            return self._rows.setdefault(selection, rows)
+
+    # Approximate bytes this backend holds beyond the shared frame (selection
+    # positions and copied rows)
+    def held_bytes(self) -> int:
+        with self._lock:
+            positions = dict(self._positions)
+            rows = dict(self._rows)
+        held = sum(p.nbytes for p in positions.values() if p is not None)
+        for selection, frame in rows.items():
+            if not rows_share_frame(positions.get(selection)):
+                held += int(frame.memory_usage(index=True, deep=True).sum())
+        return held
+
+    def cells(self, selection) -> pd.DataFrame:
+        areas, years = selection
+        return select_cells(self.cube, None if areas == ALL else areas, None if years == ALL else years)
+
+    def schema(self) -> pd.DataFrame:
+        return schema_report(self.path)
+
+    def distinct(self, column) -> list:
+        return list(self.index[column])
+
+    def count(self, selection) -> int:
+        positions = self.positions(selection)
+        return len(self.frame) if positions is None else len(positions)
+
+    # Per (Area, Year) sums of columns (NaN where a cell has no values), in the
+    # frame's (compact) dtypes so figures stay as small as plotting raw rows
+    def area_year_sums(self, columns, selection) -> pd.DataFrame:
+        cells = self.cells(selection)
+        sums = cells["sum"][columns].where(cells["count"][columns] > 0)
+        return sums.astype(self.frame[columns].dtypes.to_dict()).reset_index()
+
+    # Per-Area "sum" or "mean" of columns, indexed by Area
+    def area_aggregate(self, columns, selection, how: str) -> pd.DataFrame:
+        cells = self.cells(selection)
+        return area_sums(cells, columns) if how == "sum" else area_means(cells, columns)
+
+    # (latest year in the selection, Series of column totals for that year)
+    def latest_year_totals(self, columns, selection):
+        return latest_year_totals(self.cells(selection), columns)
+
+    # The n rows with the largest (smallest when ascending) order_by values. The
+    # full view reads them off a presorted index for order_by, built once per
+    # dataset version; a filtered one partially selects over its own rows.
+    def top_n(self, order_by, columns, n, selection, ascending=False) -> pd.DataFrame:
+        positions = self.positions(selection)
+        if positions is None:
+            direction = "ascending" if ascending else "descending"
+            order = get_derived(
+                self.path, f"ranking_order:{order_by}:{direction}",
+                lambda df: ranking_order(self.frame[order_by].to_numpy(), ascending), compact=True,
+            )
+            picked = order[:n]
+        else:
+            picked = positions[top_positions(self.frame[order_by].to_numpy()[positions], n, ascending)]
+        return self.frame.iloc[picked][columns].reset_index(drop=True)
+
+    # Numeric columns a correlation can use
+    def numeric_columns(self) -> list:
+        return [c for c in self.frame.select_dtypes("number").columns if c != "Year"]
+
+    # Assembled from the per-(Area, Year) moment store, built once per dataset
+    # version, so neither the selection nor the column set rescans the rows. The
+    # store grows with cells x columns^2; past MOMENT_STORE_BYTES (few rows per
+    # cell, so little to gain) the selected rows are correlated directly.
+    def correlation(self, columns, selection) -> pd.DataFrame:
+        k = len(self.numeric_columns())
+        if len(self.cube) * k * (k + 1) // 2 * 8 > MOMENT_STORE_BYTES:
+            return self.rows(selection)[columns].corr()
+        store = get_derived(
+            self.path, "moment_store", lambda df: build_moment_store(with_derived_columns(df)), compact=True
+        )
+        areas, years = selection
+        cells = select_store_cells(store, None if areas == ALL else areas, None if years == ALL else years)
+        return store_correlation(store, cells, columns)
+
+    def null_counts(self, selection) -> pd.Series:
+        return self.rows(selection).isnull().sum()
+
+    def summary(self, selection) -> pd.DataFrame:
+        return self.rows(selection).describe()
+
+    def head(self, n, selection) -> pd.DataFrame:
+        return self.rows(selection).head(n)
+
+    def tail(self, n, selection) -> pd.DataFrame:
+        return self.rows(selection).tail(n)
+
+
+def _empty_like(columns) -> pd.DataFrame:
+    return pd.DataFrame(columns=list(columns))
+
+
+class ScanBackend:
+    name = "arrow"
+    in_memory = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = dataset_version(path)
+        self.dataset = ds.dataset(ensure_parquet(path), format="parquet")
+        self.columns = self.dataset.schema.names + [
+            name for name, sources in DERIVED_COLUMNS.items()
+            if name not in self.dataset.schema.names and all(s in self.dataset.schema.names for s in sources)
+        ]
+        self._distinct = {}
+
+    def _filter(self, selection):
+        areas, years = selection
+        expression = None
+        for column, key in (("Area", areas), ("Year", years)):
+            if key != ALL:
+                values = pa.array(list(key), type=self.dataset.schema.field(column).type)
+                condition = ds.field(column).isin(values)
+                expression = condition if expression is None else expression & condition
+        return expression
+
+    # Stored columns needed to produce columns (derived columns need their sources)
+    def _stored(self, columns) -> list:
+        stored = []
+        for column in columns:
+            sources = [column] if column in self.dataset.schema.names else DERIVED_COLUMNS[column]
+            stored.extend(source for source in sources if source not in stored)
+        return stored
+
+    # Selected rows as pandas frames of at most SCAN_BATCH_ROWS rows holding columns
+    def _scan(self, columns, selection):
+        batches = self.dataset.to_batches(
+            columns=self._stored(columns), filter=self._filter(selection), batch_size=SCAN_BATCH_ROWS
+        )
+        for batch in batches:
+            if batch.num_rows:
+                yield with_derived_columns(batch.to_pandas())[list(columns)]
+
+    # Sums and non-null counts of columns per keys, combined across batches
+    def _group_totals(self, keys, columns, selection) -> pd.DataFrame:
+        parts = []
+        for chunk in self._scan(list(keys) + list(columns), selection):
+            grouped = chunk.groupby(list(keys), sort=False)[list(columns)]
+            parts.append(pd.concat({"sum": grouped.sum(), "count": grouped.count()}, axis=1))
+        if not parts:
+            # Indexed by keys like a non-empty result, so callers need no special case
+            empty = pd.DataFrame(columns=list(keys) + list(columns)).set_index(list(keys)).astype("float64")
+            return pd.concat({"sum": empty, "count": empty}, axis=1)
+        return pd.concat(parts).groupby(level=list(range(len(keys))), sort=True).sum()
+
+    def _numeric(self) -> list:
+        numeric = [f.name for f in self.dataset.schema if pat.is_integer(f.type) or pat.is_floating(f.type)]
+        return numeric + self.columns[len(self.dataset.schema.names):]
+
+    def numeric_columns(self) -> list:
+        return [c for c in self._numeric() if c != "Year"]
+
+    def schema_table(self) -> pd.DataFrame:
+        types = {f.name: str(f.type) for f in self.dataset.schema}
+        return pd.DataFrame({"Column": self.columns, "Type": [types.get(c, "double (derived)") for c in self.columns]})
+
+    def distinct(self, column) -> list:
+        if column not in self._distinct:
+            values = set()
+            for chunk in self._scan([column], (ALL, ALL)):
+                values.update(chunk[column].dropna().unique().tolist())
+            self._distinct[column] = sorted(values)
+        return self._distinct[column]
+
+    def count(self, selection) -> int:
+        return self.dataset.count_rows(filter=self._filter(selection))
+
+    def area_year_sums(self, columns, selection) -> pd.DataFrame:
+        totals = self._group_totals(["Area", "Year"], columns, selection)
+        sums = totals["sum"][columns].where(totals["count"][columns] > 0)
+        return sums.rename_axis(["Area", "Year"]).reset_index()
+
+    def area_aggregate(self, columns, selection, how: str) -> pd.DataFrame:
+        totals = self._group_totals(["Area"], columns, selection)
+        result = totals["sum"][columns] if how == "sum" else totals["sum"][columns] / totals["count"][columns]
+        return result.rename_axis("Area")
+
+    def latest_year_totals(self, columns, selection):
+        totals = self._group_totals(["Year"], columns, selection)["sum"][columns]
+        if totals.empty:
+            return no_year_totals(columns)
+        latest = totals.index.max()
+        return latest, totals.loc[latest].astype("float64")
+
+    # Keeps only the best n rows seen so far while scanning
+    def top_n(self, order_by, columns, n, selection, ascending=False) -> pd.DataFrame:
+        needed = list(columns) + ([order_by] if order_by not in columns else [])
+        best = None
+        for chunk in self._scan(needed, selection):
+            candidates = chunk if best is None else pd.concat([best, chunk])
+            best = candidates.iloc[top_positions(candidates[order_by].to_numpy(), n, ascending)]
+        if best is None:
+            return _empty_like(columns)
+        return best[list(columns)].reset_index(drop=True)
+
+    def correlation(self, columns, selection) -> pd.DataFrame:
+        k = len(columns)
+        I, J = np.divmod(np.arange(k * k), k)
+        moments = None
+        for chunk in self._scan(columns, selection):
+            part = pair_moments(chunk.to_numpy(dtype="float64", na_value=np.nan), I, J)
+            moments = part if moments is None else merge_moments(moments, part)
+        if moments is None:
+            return pd.DataFrame(np.nan, index=columns, columns=columns)
+        return correlation_matrix(moments, columns)
+
+    def null_counts(self, selection) -> pd.Series:
+        counts = pd.Series(0, index=self.columns)
+        for chunk in self._scan(self.columns, selection):
+            counts += chunk.isnull().sum()
+        return counts
+
+    # describe() without the quartiles, which a single streaming pass can not give exactly
+    def summary(self, selection) -> pd.DataFrame:
+        columns = self._numeric()
+        index = np.arange(len(columns))
+        moments, low, high = None, None, None
+        for chunk in self._scan(columns, selection):
+            values = chunk.to_numpy(dtype="float64", na_value=np.nan)
+            part = pair_moments(values, index, index)
+            moments = part if moments is None else merge_moments(moments, part)
+            low = np.fmin.reduce(values, axis=0) if low is None else np.fmin(low, np.fmin.reduce(values, axis=0))
+            high = np.fmax.reduce(values, axis=0) if high is None else np.fmax(high, np.fmax.reduce(values, axis=0))
+        if moments is None:
+            return pd.DataFrame(index=["count", "mean", "std", "min", "max"], columns=columns, dtype="float64")
+        n = moments["n"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(moments["m2_x"] / (n - 1))
+        return pd.DataFrame(
+            [n, np.where(n > 0, moments["mean_x"], np.nan), np.where(n > 1, std, np.nan), low, high],
+            index=["count", "mean", "std", "min", "max"],
+            columns=columns,
+        )
+
+    def head(self, n, selection) -> pd.DataFrame:
+        table = self.dataset.head(n, filter=self._filter(selection))
+        return with_derived_columns(table.to_pandas())
+
+    def tail(self, n, selection) -> pd.DataFrame:
+        last = None
+        for chunk in self._scan(self.columns, selection):
+            last = chunk.tail(n) if last is None else pd.concat([last, chunk]).tail(n)
+        return _empty_like(self.columns) if last is None else last.reset_index(drop=True)
+
+
+NUMERIC_SQL_TYPES = {
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT",
+    "FLOAT", "DOUBLE",
+}
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class DuckDBBackend:
+    name = "duckdb"
+    in_memory = False
+
+    def __init__(self, path: str):
+        import duckdb
+        self.path = path
+        self.version = dataset_version(path)
+        parquet = ensure_parquet(path).replace("'", "''")
+        self._conn = duckdb.connect()
+        stored = [row[0] for row in self._conn.execute(f"DESCRIBE SELECT * FROM read_parquet('{parquet}')").fetchall()]
+        derived = {
+            name: sources for name, sources in DERIVED_COLUMNS.items()
+            if name not in stored and all(source in stored for source in sources)
+        }
+        expressions = "".join(
+            f", ({' + '.join(_ident(source) for source in sources)}) AS {_ident(name)}"
+            for name, sources in derived.items()
+        )
+        # file_row_number keeps the CSV row order for head/tail
+        self._conn.execute(
+            f"CREATE VIEW emissions AS SELECT *{expressions} FROM read_parquet('{parquet}', file_row_number = true)"
+        )
+        self.columns = stored + list(derived)
+        self._types = dict(self._conn.execute("SELECT column_name, column_type FROM (DESCRIBE emissions)").fetchall())
+        self._distinct = {}
+
+    # Run one query on its own cursor (safe to call from several sessions at once)
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, list(params)).df()
+        finally:
+            cursor.close()
+
+    def _where(self, selection):
+        clauses, params = [], []
+        for column, key in zip(("Area", "Year"), selection):
+            if key == ALL:
+                continue
+            if len(key) == 0:
+                clauses.append("FALSE")
+            else:
+                clauses.append(f"list_contains(?, {_ident(column)})")
+                params.append(list(key))
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _select(self, columns) -> str:
+        return ", ".join(_ident(column) for column in columns)
+
+    def numeric_columns(self) -> list:
+        return [c for c in self.columns if c != "Year" and self._types[c] in NUMERIC_SQL_TYPES]
+
+    def schema_table(self) -> pd.DataFrame:
+        return pd.DataFrame({"Column": self.columns, "Type": [self._types[c] for c in self.columns]})
+
+    def distinct(self, column) -> list:
+        if column not in self._distinct:
+            cursor = self._conn.cursor()
+            try:
+                rows = cursor.execute(
+                    f"SELECT DISTINCT {_ident(column)} FROM emissions WHERE {_ident(column)} IS NOT NULL ORDER BY 1"
+                ).fetchall()
+            finally:
+                cursor.close()
+            self._distinct[column] = [row[0] for row in rows]
+        return self._distinct[column]
+
+    def count(self, selection) -> int:
+        where, params = self._where(selection)
+        return int(self._query(f"SELECT COUNT(*) AS n FROM emissions {where}", params)["n"].iloc[0])
+
+    def area_year_sums(self, columns, selection) -> pd.DataFrame:
+        where, params = self._where(selection)
+        sums = ", ".join(f"SUM({_ident(c)}) AS {_ident(c)}" for c in columns)
+        return self._query(
+            f"SELECT Area, Year, {sums} FROM emissions {where} GROUP BY Area, Year ORDER BY Area, Year", params
+        )
+
+    def area_aggregate(self, columns, selection, how: str) -> pd.DataFrame:
+        where, params = self._where(selection)
+        aggregate = "COALESCE(SUM({0}), 0)" if how == "sum" else "AVG({0})"
+        values = ", ".join(f"{aggregate.format(_ident(c))} AS {_ident(c)}" for c in columns)
+        return self._query(
+            f"SELECT Area, {values} FROM emissions {where} GROUP BY Area ORDER BY Area", params
+        ).set_index("Area")
+
+    def latest_year_totals(self, columns, selection):
+        where, params = self._where(selection)
+        totals = ", ".join(f"COALESCE(SUM({_ident(c)}), 0) AS {_ident(c)}" for c in columns)
+        result = self._query(
+            f"WITH selected AS (SELECT * FROM emissions {where}) "
+            f"SELECT Year, {totals} FROM selected WHERE Year = (SELECT MAX(Year) FROM selected) GROUP BY Year",
+            params,
+        )
+        if result.empty:
+            return no_year_totals(columns)
+        return result["Year"].iloc[0], result.iloc[0][columns].astype("float64")
+
+    def top_n(self, order_by, columns, n, selection, ascending=False) -> pd.DataFrame:
+        where, params = self._where(selection)
+        direction = "ASC" if ascending else "DESC"
+        return self._query(
+            f"SELECT {self._select(columns)} FROM emissions {where} "
+            f"ORDER BY {_ident(order_by)} {direction} NULLS LAST, file_row_number LIMIT {int(n)}",
+            params,
+        )
+
+    def correlation(self, columns, selection) -> pd.DataFrame:
+        where, params = self._where(selection)
+        pairs = [(i, j) for i in range(len(columns)) for j in range(i, len(columns))]
+        values = ", ".join(f"CORR({_ident(columns[i])}, {_ident(columns[j])})" for i, j in pairs)
+        row = self._query(f"SELECT {values} FROM emissions {where}", params).iloc[0].to_numpy(dtype="float64")
+        corr = pd.DataFrame(np.nan, index=columns, columns=columns)
+        for (i, j), value in zip(pairs, row):
+            corr.iloc[i, j] = corr.iloc[j, i] = value
+        return corr
+
+    def null_counts(self, selection) -> pd.Series:
+        where, params = self._where(selection)
+        values = ", ".join(f"COUNT(*) - COUNT({_ident(c)}) AS {_ident(c)}" for c in self.columns)
+        return self._query(f"SELECT {values} FROM emissions {where}", params).iloc[0]
+
+    def summary(self, selection) -> pd.DataFrame:
+        where, params = self._where(selection)
+        numeric = [c for c in self.columns if self._types[c] in ("DOUBLE", "FLOAT", "BIGINT", "INTEGER")]
+        aggregates = ["COUNT({0})", "AVG({0})", "STDDEV_SAMP({0})", "MIN({0})",
+                      "QUANTILE_CONT({0}, 0.25)", "QUANTILE_CONT({0}, 0.5)", "QUANTILE_CONT({0}, 0.75)", "MAX({0})"]
+        values = ", ".join(aggregate.format(_ident(c)) for c in numeric for aggregate in aggregates)
+        row = self._query(f"SELECT {values} FROM emissions {where}", params).iloc[0].to_numpy(dtype="float64")
+        return pd.DataFrame(row.reshape(len(numeric), len(aggregates)).T, index=SUMMARY_STATS, columns=numeric)
+
+    def head(self, n, selection) -> pd.DataFrame:
+        where, params = self._where(selection)
+        return self._query(
+            f"SELECT {self._select(self.columns)} FROM emissions {where} ORDER BY file_row_number LIMIT {int(n)}",
+            params,
+        )
+
+    def tail(self, n, selection) -> pd.DataFrame:
+        where, params = self._where(selection)
+        return self._query(
+            f"SELECT * FROM (SELECT {self._select(self.columns)}, file_row_number FROM emissions {where} "
+            f"ORDER BY file_row_number DESC LIMIT {int(n)}) ORDER BY file_row_number",
+            params,
+        ).drop(columns="file_row_number")
+
+
+BACKENDS = {"pandas": PandasBackend, "arrow": ScanBackend, "duckdb": DuckDBBackend}
+
+_LOCK = threading.Lock()
+# Out-of-core backends per (path, kind), replaced when the CSV changes
+_BACKENDS = {}
+
+
+# Backend kind for a CSV: QUERY_BACKEND, or with "auto" pandas for files up to
+# IN_MEMORY_BYTES and DuckDB (Arrow scans when duckdb is not installed) above
+def backend_kind(path: str) -> str:
+    if QUERY_BACKEND != "auto":
+        if QUERY_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown CARBONIVORE_QUERY_BACKEND {QUERY_BACKEND!r}, expected auto or one of {list(BACKENDS)}")
+        return QUERY_BACKEND
+    if os.path.getsize(path) <= IN_MEMORY_BYTES:
+        return "pandas"
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return "arrow"
+    return "duckdb"
+
+
+# Query backend for a CSV (raises FileNotFoundError when it is missing)
+def get_backend(path: str, kind: str = None):
+    path = os.path.abspath(path)
+    kind = kind or backend_kind(path)
+    if kind == "pandas":
+        # Cheap to create: its frame, cube and index are cached in data_store
+        return PandasBackend(path)
+    version = dataset_version(path)
+    with _LOCK:
+        backend = _BACKENDS.get((path, kind))
+        if backend is None or backend.version != version:
+            backend = _BACKENDS[(path, kind)] = BACKENDS[kind](path)
+        return backend
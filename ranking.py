@@ -0,0 +1,79 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Top-N selection for the ranking charts. A ranking is a stable sort on the
+# order column: best values first, ties in row order, missing values last, so
+# every backend, the presorted default-view indexes and the partial selection
+# below all return the same rows. Partial selection finds the n best with
+# np.partition in linear time and sorts only those, instead of sorting the
+# whole filtered view. top_n is the one entry point the charts use; its results
+# are kept per (dataset version, selection) in a small process-wide LRU cache.
+TOP_N_CACHE_ENTRIES = int(os.environ.get("CARBONIVORE_TOP_N_CACHE_ENTRIES", "256"))
+
+_LOCK = threading.Lock()
+_RESULTS = OrderedDict()
+
+
+# Positions of the n best values (largest, or smallest when ascending) in ranking order
+def top_positions(values, n: int, ascending: bool = False) -> np.ndarray:
+    values = np.asarray(values, dtype="float64")
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+    present = np.flatnonzero(~np.isnan(values))
+    keys = values[present] if ascending else -values[present]
+    if n < len(present):
+        # Everything better than the n-th best key is in; ties with it fill the rest in row order
+        kth = np.partition(keys, n - 1)[n - 1]
+        better = keys < kth
+        tied = np.flatnonzero(keys == kth)[: n - better.sum()]
+        chosen = np.sort(np.concatenate([np.flatnonzero(better), tied]))
+        best = present[chosen[np.argsort(keys[chosen], kind="stable")]]
+    else:
+        best = present[np.argsort(keys, kind="stable")]
+    missing = np.flatnonzero(np.isnan(values))[: n - len(best)]
+    return np.concatenate([best, missing])
+
+
+# Full ranking order of values (the presorted index for one metric and direction)
+def ranking_order(values, ascending: bool = False) -> np.ndarray:
+    return top_positions(values, len(values), ascending)
+
+
+# The n best Areas by the total of order_by over the per-Area "sum" or "mean"
+def _top_areas(backend, order_by, columns, n, selection, ascending, how) -> pd.DataFrame:
+    values = [c for c in columns if c != "Area"]
+    aggregate = backend.area_aggregate(list(dict.fromkeys(order_by + values)), selection, how).reset_index()
+    pick = top_positions(aggregate[order_by].sum(axis=1), n, ascending)
+    return aggregate.iloc[pick][list(columns)].reset_index(drop=True)
+
+
+# The n best rows of the selection by order_by (largest first, smallest with
+# ascending=True), holding columns. With per_area="sum" or "mean" the Areas are
+# ranked instead, by the total of the order_by columns over that per-Area
+# aggregate. Cached per selection: treat the result as read-only.
+def top_n(backend, order_by, columns, n: int, selection, ascending: bool = False, per_area: str = None) -> pd.DataFrame:
+    order_by = [order_by] if isinstance(order_by, str) else list(order_by)
+    key = (backend.name, backend.path, backend.version, tuple(order_by), tuple(columns), n, selection, ascending, per_area)
+    with _LOCK:
+        result = _RESULTS.get(key)
+        if result is not None:
+            _RESULTS.move_to_end(key)
+            return result
+
+    if per_area:
+        result = _top_areas(backend, order_by, columns, n, selection, ascending, per_area)
+    else:
+        result = backend.top_n(order_by[0], list(columns), n, selection, ascending)
+    with _LOCK:
+        _RESULTS[key] = result
+        while len(_RESULTS) > TOP_N_CACHE_ENTRIES:
+            _RESULTS.popitem(last=False)
+    return result
+
+
+def clear_top_n_cache():
+    with _LOCK:
+        _RESULTS.clear()
@@ -0,0 +1,166 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Rendering helpers that keep dense charts cheap for the browser: WebGL traces
+# above a point threshold, LTTB decimation of long time series, and, once the
+# legend could not show every Area anyway, compact figures without one: lines
+# as bare per-Area WebGL traces, scatters as a single merged trace.
+WEBGL_POINT_THRESHOLD = int(os.environ.get("CARBONIVORE_WEBGL_POINTS", "1000"))
+MAX_SERIES_POINTS = int(os.environ.get("CARBONIVORE_MAX_SERIES_POINTS", "500"))
+MAX_LEGEND_TRACES = int(os.environ.get("CARBONIVORE_MAX_LEGEND_TRACES", "20"))
+
+
+# "webgl" once a chart has more points than the threshold
+def render_mode(n_points: int) -> str:
+    return "webgl" if n_points > WEBGL_POINT_THRESHOLD else "auto"
+
+
+# Largest-Triangle-Three-Buckets: indices of n_out points that preserve the
+# visual shape of the (x sorted) series
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = previous
+    return selected
+
+
+# Decimate every group's series to at most max_points with LTTB
+def decimate(df: pd.DataFrame, x: str, y: str, group: str, max_points: int = MAX_SERIES_POINTS) -> pd.DataFrame:
+    if df.groupby(group, observed=True).size().max() <= max_points:
+        return df
+    parts = []
+    for _, series in df.sort_values([group, x]).groupby(group, observed=True):
+        keep = lttb(series[x].to_numpy(), series[y].to_numpy(), max_points)
+        parts.append(series.iloc[keep])
+    return pd.concat(parts)
+
+
+# Stable color per group from Plotly's default qualitative palette
+def _group_colors(groups: pd.Series) -> list:
+    palette = px.colors.qualitative.Plotly
+    codes = pd.Categorical(groups).codes
+    return [palette[code % len(palette)] for code in codes]
+
+
+# Narrowest binary-encodable array for a numeric column: integers keep the
+# smallest integer type that holds them, floats go to float32
+def _compact_values(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer").to_numpy()
+    return values.to_numpy(dtype="float32", na_value=np.nan)
+
+
+# One WebGL line per group, colored by the theme's colorway like px.line. Each
+# trace carries only its group name and binary x/y arrays; mode, width and the
+# hover text (the name via %{fullData.name}) are set once in the figure's
+# template, so the names are not repeated per point.
+def compact_lines(df: pd.DataFrame, x: str, y: str, group: str) -> go.Figure:
+    df = df.sort_values([group, x])
+    traces = [
+        go.Scattergl(name=str(name), x=_compact_values(series[x]), y=_compact_values(series[y]))
+        for name, series in df.groupby(group, observed=True, sort=False)
+    ]
+    fig = go.Figure(traces)
+    fig.layout.template.data.scattergl = [go.Scattergl(
+        mode="lines", line={"width": 1}, showlegend=False,
+        hovertemplate=f"%{{fullData.name}}<br>{x}=%{{x}}<br>{y}=%{{y}}<extra></extra>",
+    )]
+    fig.update_layout(xaxis_title=x, yaxis_title=y, showlegend=False)
+    return fig
+
+
+# A bubble scatter colored by group, drawn as a single WebGL trace
+def merged_scatter(df: pd.DataFrame, x: str, y: str, size: str, group: str, size_max: int = 20) -> go.Figure:
+    sizes = df[size].clip(lower=0).fillna(0).to_numpy(dtype="float32")
+    peak = float(sizes.max()) if len(sizes) else 0
+    trace = go.Scattergl(
+        x=df[x].to_numpy(dtype="float32"), y=df[y].to_numpy(dtype="float32"),
+        mode="markers", hovertext=df[group].astype(str),
+        marker={
+            "color": _group_colors(df[group]),
+            "size": sizes,
+            "sizemode": "area",
+            "sizeref": 2.0 * peak / size_max ** 2 if peak > 0 else 1,
+            "sizemin": 1,
+        },
+        hovertemplate=f"<b>%{{hovertext}}</b><br>{x}=%{{x}}<br>{y}=%{{y}}<br>{size}=%{{marker.size}}<extra></extra>",
+    )
+    fig = go.Figure(trace)
+    fig.update_layout(xaxis_title=x, yaxis_title=y, showlegend=False)
+    return fig
+
+
+# Whether a chart with this many groups should be merged into one trace
+def merge_groups(n_groups: int) -> bool:
+    return n_groups > MAX_LEGEND_TRACES
+
+
+def _animate_args(frame, duration: int) -> list:
+    return [frame, {
+        "frame": {"duration": duration, "redraw": True}, "mode": "immediate", "fromcurrent": True,
+        "transition": {"duration": duration, "easing": "linear"},
+    }]
+
+
+# Animated choropleth of a (location x frame) matrix, with the same play button
+# and slider as px.choropleth(animation_frame=...). The locations, hover names
+# and geometry live in the one trace; each frame ships only its color vector
+# (NaN where a location has no value that frame), float32 and binary-encoded.
+def animated_choropleth(matrix: pd.DataFrame, locations, hover_names, value: str, frame_label: str) -> go.Figure:
+    values = matrix.to_numpy(dtype="float32", na_value=np.nan)
+    names = [str(label) for label in matrix.columns]
+
+    def hover(name):
+        return f"<b>%{{hovertext}}</b><br><br>{frame_label}={name}<br>{value}=%{{z}}<extra></extra>"
+
+    frames = [
+        go.Frame(data=[go.Choropleth(z=values[:, i], hovertemplate=hover(name))], traces=[0], name=name)
+        for i, name in enumerate(names)
+    ]
+    trace = go.Choropleth(
+        locations=list(locations), locationmode="ISO-3", hovertext=list(hover_names),
+        z=values[:, 0] if names else [], hovertemplate=hover(names[0] if names else ""), coloraxis="coloraxis",
+    )
+    fig = go.Figure(trace, frames=frames)
+    fig.update_layout(
+        coloraxis={"colorbar": {"title": {"text": value}}},
+        geo={"domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]}},
+        updatemenus=[{
+            "type": "buttons", "direction": "left", "showactive": False,
+            "x": 0.1, "xanchor": "right", "y": 0, "yanchor": "top", "pad": {"r": 10, "t": 70},
+            "buttons": [
+                {"label": "&#9654;", "method": "animate", "args": _animate_args(None, 500)},
+                {"label": "&#9724;", "method": "animate", "args": _animate_args([None], 0)},
+            ],
+        }],
+        sliders=[{
+            "active": 0, "currentvalue": {"prefix": f"{frame_label}="}, "len": 0.9, "pad": {"b": 10, "t": 60},
+            "x": 0.1, "xanchor": "left", "y": 0, "yanchor": "top",
+            "steps": [{"label": name, "method": "animate", "args": _animate_args([name], 0)} for name in names],
+        }],
+    )
+    return fig
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+# Explicit, compact dtypes for the emission frames: Area as a categorical,
+# Year as a small int and the float columns as float32 wherever the float32
+# round trip moves no value by more than FLOAT32_ATOL. A relative bound would
+# pass every finite column (float32 always keeps about 6e-8 relative), so the
+# bound is absolute, half a unit of the data: the emission columns (kt CO2e)
+# move by at most about 0.1 and become float32, while population counts above
+# 2**24 would no longer be whole people and stay float64.
+CATEGORICAL_COLUMNS = ["Area"]
+YEAR_COLUMN = "Year"
+FLOAT32_ATOL = 0.5
+
+
+# Largest absolute and relative error introduced by storing values as float32
+def float32_error(values: pd.Series):
+    original = values.to_numpy(dtype="float64", na_value=np.nan)
+    rounded = original.astype("float32").astype("float64")
+    finite = np.isfinite(original)
+    if not finite.any():
+        return 0.0, 0.0
+    if not np.isfinite(rounded[finite]).all():
+        return np.inf, np.inf
+    diff = np.abs(rounded[finite] - original[finite])
+    scale = np.abs(original[finite])
+    relative = np.divide(diff, scale, out=np.zeros_like(diff), where=scale > 0)
+    return float(diff.max()), float(relative.max())
+
+
+# Convert a raw frame to the compact schema. Returns the new frame and a report
+# with the per-column dtype change, memory before/after and precision loss.
+def apply_schema(df: pd.DataFrame, atol: float = FLOAT32_ATOL):
+    converted = {}
+    rows = []
+    for name in df.columns:
+        column = df[name]
+        abs_error = rel_error = 0.0
+        if name in CATEGORICAL_COLUMNS:
+            new = column.astype("category")
+        elif name == YEAR_COLUMN:
+            new = pd.to_numeric(column, downcast="integer")
+        elif pd.api.types.is_float_dtype(column):
+            abs_error, rel_error = float32_error(column)
+            new = column.astype("float32") if abs_error <= atol else column
+        elif pd.api.types.is_integer_dtype(column):
+            new = pd.to_numeric(column, downcast="integer")
+        else:
+            new = column
+        converted[name] = new
+        rows.append({
+            "Column": name,
+            "Before": str(column.dtype),
+            "After": str(new.dtype),
+            "Bytes Before": int(column.memory_usage(index=False, deep=True)),
+            "Bytes After": int(new.memory_usage(index=False, deep=True)),
+            "Max Abs Error": abs_error if new.dtype != column.dtype else 0.0,
+            "Max Rel Error": rel_error if new.dtype != column.dtype else 0.0,
+        })
+
+    compact = pd.DataFrame(converted, index=df.index)
+    return compact, pd.DataFrame(rows)
+
+
+# Whole-frame memory totals from a schema report
+def memory_summary(report: pd.DataFrame) -> dict:
+    before = int(report["Bytes Before"].sum())
+    after = int(report["Bytes After"].sum())
+    return {"before": before, "after": after, "saved": before - after}
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+# Per-session data layer. Pages read the shared datasets (data_store.py,
+# shared_dataset.py) through read-only views: the frame, its derived columns
+# and indexes are built once per process, and pandas copies on write, so a
+# session never holds its own copy of the data. What a session does hold (its
+# view with the selection's row positions and any gathered rows) is kept here
+# in named slots, reused across reruns and measured on demand.
+#
+# The slots of sessions idle for SESSION_IDLE_SECONDS are dropped, and while
+# the slots of all sessions together still exceed SESSION_BUDGET_BYTES, those
+# of the other sessions are dropped too, longest idle first; those sessions
+# simply rebuild their view on their next run.
+SESSION_BUDGET_BYTES = int(os.environ.get("CARBONIVORE_SESSION_BUDGET_BYTES", str(256 * 1024 * 1024)))
+SESSION_IDLE_SECONDS = float(os.environ.get("CARBONIVORE_SESSION_IDLE_SECONDS", "300"))
+
+_LOCK = threading.Lock()
+# Session id -> {"seen": monotonic time of its last run, "slots": {slot: (key, value, measure)}}
+_SESSIONS = {}
+
+
+# Id of the Streamlit session running this script (None outside a script run)
+def current_session():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+def _slot_bytes(slots: dict) -> int:
+    return sum(measure(value) for _, value, measure in slots.values())
+
+
+# The session's value in slot for key, built (replacing the slot's previous
+# value) when the key changes. measure(value) gives its approximate bytes.
+# Outside a session the value is built and not kept.
+def session_artifact(slot: str, key, build, measure=lambda value: 0):
+    session = current_session()
+    if session is None:
+        return build()
+    now = time.monotonic()
+    with _LOCK:
+        state = _SESSIONS.setdefault(session, {"seen": now, "slots": {}})
+        state["seen"] = now
+        cached = state["slots"].get(slot)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+    value = build()
+    with _LOCK:
+        _SESSIONS.setdefault(session, {"seen": now, "slots": {}})["slots"][slot] = (key, value, measure)
+    evict_idle()
+    return value
+
+
+# Drop the slots of every idle session, then, while all sessions together
+# hold more than the budget, of the other sessions longest idle first (never
+# the calling one); returns the number of sessions evicted
+def evict_idle(budget: int = None, idle_seconds: float = None) -> int:
+    budget = SESSION_BUDGET_BYTES if budget is None else budget
+    idle_seconds = SESSION_IDLE_SECONDS if idle_seconds is None else idle_seconds
+    now = time.monotonic()
+    current = current_session()
+    with _LOCK:
+        idle = [
+            session for session, state in _SESSIONS.items()
+            if session != current and now - state["seen"] >= idle_seconds
+        ]
+        for session in idle:
+            del _SESSIONS[session]
+        sessions = dict(_SESSIONS)
+    evicted = len(idle)
+
+    sizes = {session: _slot_bytes(state["slots"]) for session, state in sessions.items()}
+    total = sum(sizes.values())
+    for session, state in sorted(sessions.items(), key=lambda item: item[1]["seen"]):
+        if total <= budget:
+            break
+        if session == current:
+            continue
+        with _LOCK:
+            if _SESSIONS.get(session) is not state:
+                continue
+            del _SESSIONS[session]
+        total -= sizes[session]
+        evicted += 1
+    return evicted
+
+
+# One row per session: approximate bytes held, slots and seconds since its last run
+def session_memory() -> list:
+    now = time.monotonic()
+    current = current_session()
+    with _LOCK:
+        sessions = {session: dict(state, slots=dict(state["slots"])) for session, state in _SESSIONS.items()}
+    rows = [
+        {
+            "Session": session[:8] + (" (this)" if session == current else ""),
+            "MB": _slot_bytes(state["slots"]) / 1e6,
+            "Slots": len(state["slots"]),
+            "Idle s": now - state["seen"],
+        }
+        for session, state in sessions.items()
+    ]
+    return sorted(rows, key=lambda row: row["MB"], reverse=True)
+
+
+def clear_sessions():
+    with _LOCK:
+        _SESSIONS.clear()
+
+
+# Sidebar gauge of what this session and all sessions hold against the budget
+def show_memory_panel():
+    import streamlit as st
+
+    rows = session_memory()
+    total = sum(row["MB"] for row in rows) * 1e6
+    mine = next((row["MB"] * 1e6 for row in rows if row["Session"].endswith(" (this)")), 0)
+    with st.sidebar.expander("🧠 Session memory", expanded=False):
+        st.progress(min(total / SESSION_BUDGET_BYTES, 1.0) if SESSION_BUDGET_BYTES else 0.0,
+                    text=f"All sessions: {total / 1e6:.1f} of {SESSION_BUDGET_BYTES / 1e6:.0f} MB")
+        st.write(f"This session: {mine / 1e6:.2f} MB")
+        if rows:
+            st.dataframe(rows, hide_index=True, column_config={
+                "MB": st.column_config.NumberColumn(format="%.2f"),
+                "Idle s": st.column_config.NumberColumn(format="%.0f"),
+            })
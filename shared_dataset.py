@@ -0,0 +1,209 @@
+import glob
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    from pandas.api.internals import create_dataframe_from_blocks
+except ImportError:
+    # Older pandas: every process keeps its own frames
+    create_dataframe_from_blocks = None
+
+# Host-wide copies of the loaded datasets (and of large derived frames such as
+# the Area x Year cube), shared by every Streamlit process on the machine. The
+# first process to load a CSV version publishes the frame to a file in
+# SHARED_DIR, /dev/shm by default so it lives in shared memory. Every process
+# then memory-maps that file and wraps it in a pandas frame without copying:
+# the pages are held once by the OS and mapped into each worker, so memory per
+# host no longer grows with the number of replicas.
+#
+# The file holds each dtype's columns as one 2D block in pandas' own layout,
+# so the frame is assembled from views of the mapping and is already
+# consolidated (pandas would otherwise merge per-column arrays into a private
+# copy on the first reduction). Columns without a plain numpy dtype (the Area
+# text or categorical) and a non-default index go into an embedded Arrow
+# stream; those are converted, i.e. copied, per process.
+#
+# Files are named per CSV path, kind (raw or compact dataset, or a derived
+# frame) and CSV version. A refreshed CSV gets new files and older versions
+# are unlinked once they are in place; processes still holding the old frames
+# keep their mapping until they drop them. Shared frames are read-only: pandas
+# copies on write, and code must not write into their numpy arrays in place.
+#
+# CARBONIVORE_SHARED_DIR overrides the directory; set it empty to keep every
+# frame private to its process.
+_DEFAULT_DIR = (
+    "/dev/shm/carbonivore" if os.path.isdir("/dev/shm")
+    else os.path.join(tempfile.gettempdir(), "carbonivore-shared")
+)
+SHARED_DIR = os.environ.get("CARBONIVORE_SHARED_DIR", _DEFAULT_DIR)
+_MAGIC = b"CARBSHM1"
+_ALIGN = 64
+
+
+def _enabled() -> bool:
+    return bool(SHARED_DIR) and create_dataframe_from_blocks is not None
+
+
+def _prefix(path: str) -> str:
+    name = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    return os.path.join(SHARED_DIR, f"{name}-{digest}")
+
+
+# Shared file for one kind of frame of a CSV version (None when sharing is off)
+def shared_path(path: str, kind: str, version: str):
+    if not _enabled():
+        return None
+    return f"{_prefix(path)}.{kind}.{version}.frame"
+
+
+def _labels(index: pd.Index) -> dict:
+    return {
+        "labels": [list(label) if isinstance(label, tuple) else label for label in index],
+        "names": list(index.names),
+    }
+
+
+def _from_labels(spec: dict) -> pd.Index:
+    if len(spec["names"]) > 1:
+        return pd.MultiIndex.from_tuples([tuple(label) for label in spec["labels"]], names=spec["names"])
+    return pd.Index(spec["labels"], name=spec["names"][0])
+
+
+def _aligned(position: int) -> int:
+    return -(-position // _ALIGN) * _ALIGN
+
+
+# Header and data pieces (one 2D block per numpy dtype, then the Arrow stream) for df
+def _layout(df: pd.DataFrame, meta):
+    groups, others = {}, []
+    for position, dtype in enumerate(df.dtypes):
+        if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+            groups.setdefault(dtype.str, []).append(position)
+        else:
+            others.append(position)
+
+    pieces, blocks = [], []
+    for dtype, placement in groups.items():
+        values = np.empty((len(placement), len(df)), dtype=dtype)
+        for row, position in enumerate(placement):
+            values[row] = df.iloc[:, position].to_numpy()
+        blocks.append({"dtype": dtype, "placement": placement, "shape": list(values.shape)})
+        pieces.append(values)
+
+    # Remaining columns under positional names, plus the index unless it is 0..n-1
+    side = {f"c{position}": df.iloc[:, position].reset_index(drop=True) for position in others}
+    plain_index = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+    if not plain_index:
+        for level in range(df.index.nlevels):
+            side[f"i{level}"] = pd.Series(df.index.get_level_values(level))
+    # One record batch even for no rows, so categorical columns keep their categories
+    batch = pa.RecordBatch.from_pandas(pd.DataFrame(side, index=pd.RangeIndex(len(df))), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    pieces.append(sink.getvalue())
+
+    header = {
+        "rows": len(df),
+        "columns": _labels(df.columns),
+        "index": None if plain_index else list(df.index.names),
+        "blocks": blocks,
+        "others": others,
+        "sizes": [memoryview(piece).nbytes for piece in pieces],
+        "meta": meta,
+    }
+    return header, pieces
+
+
+# Frame and metadata mapped from the shared file, or None if it is not published
+def attach_shared(path: str, kind: str, version: str):
+    target = shared_path(path, kind, version)
+    if target is None:
+        return None
+    try:
+        with open(target, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if buffer[:8] != _MAGIC:
+        return None
+    header_size = int.from_bytes(buffer[8:16], "little")
+    header = json.loads(buffer[16:16 + header_size])
+    position = _aligned(16 + header_size)
+    offsets = []
+    for size in header["sizes"]:
+        offsets.append(position)
+        position = _aligned(position + size)
+
+    arrays = []
+    for block, offset in zip(header["blocks"], offsets):
+        count = block["shape"][0] * block["shape"][1]
+        values = np.frombuffer(buffer, dtype=block["dtype"], count=count, offset=offset).reshape(block["shape"])
+        arrays.append((values, np.array(block["placement"], dtype=np.intp)))
+
+    stream = pa.py_buffer(buffer).slice(offsets[-1], header["sizes"][-1])
+    side = pa.ipc.open_stream(stream).read_all().to_pandas()
+    for position in header["others"]:
+        values = side[f"c{position}"].array
+        if isinstance(values, pd.arrays.NumpyExtensionArray):
+            values = values.to_numpy().reshape(1, -1)
+        arrays.append((values, np.array([position], dtype=np.intp)))
+
+    if header["index"] is None:
+        index = pd.RangeIndex(header["rows"])
+    else:
+        levels = [side[f"i{level}"].array for level in range(len(header["index"]))]
+        index = (
+            pd.MultiIndex.from_arrays(levels, names=header["index"]) if len(levels) > 1
+            else pd.Index(levels[0], name=header["index"][0])
+        )
+    df = create_dataframe_from_blocks(arrays, index=index, columns=_from_labels(header["columns"]))
+    return df, header["meta"]
+
+
+# Publish df for this CSV version, drop older versions and return the mapped
+# frame and meta (None if sharing is unavailable; the caller keeps its own)
+def publish_shared(path: str, kind: str, version: str, df: pd.DataFrame, meta=None):
+    target = shared_path(path, kind, version)
+    if target is None:
+        return None
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        header, pieces = _layout(df, meta)
+        encoded = json.dumps(header).encode()
+        os.makedirs(SHARED_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC + len(encoded).to_bytes(8, "little") + encoded)
+            for piece, size in zip(pieces, header["sizes"]):
+                f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+                # Blocks of an empty frame have nothing to write (and cannot be cast)
+                if size:
+                    f.write(memoryview(piece).cast("B"))
+        # A concurrent publisher of the same version writes identical content
+        os.replace(tmp, target)
+    except (OSError, TypeError, ValueError, pa.ArrowException):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return None
+    remove_shared(path, keep_version=version)
+    return attach_shared(path, kind, version)
+
+
+# Unlink the shared frames of a CSV (every version, or all but keep_version)
+def remove_shared(path: str, keep_version: str = None):
+    if not SHARED_DIR:
+        return
+    for stale in glob.glob(glob.escape(_prefix(path)) + ".*.frame"):
+        if stale.rsplit(".", 2)[1] != keep_version:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
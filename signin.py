@@ -1,12 +1,8 @@
 import streamlit as st
-from firebase_config import auth
+from firebase_config import get_auth
 from streamlit_lottie import st_lottie
-import json
-
-# Load Lottie animation from file
-def load_lottiefile(filepath: str):
-    with open(filepath, "r") as f:
-        return json.load(f)
+from assets import load_lottie
+from instrumentation import span
 
 #  Sign-in function
 def signin():
@@ -32,7 +28,8 @@ def signin():
         # Handle login attempt
         if login_clicked:
             try:
-                user = auth.sign_in_with_email_and_password(email, password)
+                with span("signin.firebase_sign_in"):
+                    user = get_auth().sign_in_with_email_and_password(email, password)
                 st.session_state["user"] = user
                 st.session_state["login_successful"] = True
                 st.session_state["login_attempted"] = True
@@ -51,7 +48,8 @@ def signin():
         if forgot_clicked:
             if email:
                 try:
-                    auth.send_password_reset_email(email)
+                    with span("signin.firebase_password_reset"):
+                        get_auth().send_password_reset_email(email)
                     st.info("📧 Password reset email sent.")
                 except Exception as e:
                     st.error(f"❌ Error sending reset email: {e}")
@@ -60,5 +58,6 @@ def signin():
 
     with col2:
         # Display Lottie animation
-        lottie_signin = load_lottiefile("signin.json")
-        st_lottie(lottie_signin, speed=1, reverse=False, loop=True, quality="high")
\ No newline at end of file
+        with span("signin.animation"):
+            lottie_signin = load_lottie("signin.json")
+            st_lottie(lottie_signin, speed=1, reverse=False, loop=True, quality="high")
\ No newline at end of file
@@ -1,11 +1,7 @@
 import streamlit as st
 from streamlit_lottie import st_lottie
-import json
-from firebase_config import auth
-
-def load_lottiefile(filepath: str):
-  with open(filepath, "r") as f:
-    return json.load(f) 
+from assets import load_lottie
+from firebase_config import get_auth
 
 def signup():
 # Layout: Two columns
@@ -22,12 +18,12 @@ def signup():
       st.error(" Passwords do not match.")
     else:
       try:
-        auth.create_user_with_email_and_password(email, password)
+        get_auth().create_user_with_email_and_password(email, password)
         st.success("🎉 Account created successfully. Please sign in.")
       except Exception as e:
         st.error(f" Error: {e}")
   with col2:
-    lottie_signup = load_lottiefile("signup.json")
+    lottie_signup = load_lottie("signup.json")
     st_lottie(lottie_signup, speed=1, reverse=False, loop=True, quality="high")
 
 
@@ -0,0 +1,5 @@
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLEANED_CSV = os.path.join(ROOT, "cleaned_data.csv")
+RAW_CSV = os.path.join(ROOT, "the_Carbonivore.csv")
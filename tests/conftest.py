@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tests import CLEANED_CSV
+
+# Shared inputs for the engine tests: cleaned_data.csv as plain pandas reads
+# it, a NaN-heavy copy of it, and the Area/Year selections every engine is
+# checked on. The frames are shared by the whole session; tests copy before
+# changing them.
+KEYS = ["Area", "Year"]
+
+# (areas, years) per selection; None selects every value
+SELECTIONS = {
+    "everything": (None, None),
+    "three areas": (["Brazil", "China", "India"], None),
+    "one decade": (None, list(range(2000, 2010))),
+    "areas and years": (["Albania", "India", "Zimbabwe"], [1990, 2005, 2020]),
+    "one cell": (["India"], [2000]),
+    "empty": ([], None),
+    "absent values": (["Atlantis"], [1800]),
+}
+
+
+@pytest.fixture(scope="session")
+def cleaned():
+    return pd.read_csv(CLEANED_CSV)
+
+
+# cleaned with about 70% of the non-key values blanked, at seeded random positions
+@pytest.fixture(scope="session")
+def nan_heavy(cleaned):
+    columns = [c for c in cleaned.select_dtypes("number").columns if c not in KEYS]
+    blank = np.random.default_rng(7).random((len(cleaned), len(columns))) < 0.7
+    df = cleaned.copy()
+    df[columns] = df[columns].mask(blank)
+    return df
+
+
+# One of SELECTIONS as explicit (areas, years) lists of cleaned's values
+@pytest.fixture(params=list(SELECTIONS))
+def selection(request, cleaned):
+    areas, years = SELECTIONS[request.param]
+    return (
+        sorted(cleaned["Area"].unique()) if areas is None else areas,
+        sorted(cleaned["Year"].unique()) if years is None else years,
+    )
@@ -0,0 +1,38 @@
+import json
+import os
+import instrumentation
+from assets import asset_stats, compact_lottie, load_lottie
+from tests import ROOT
+
+ANIMATION = os.path.join(ROOT, "analytics.json")
+
+
+def test_repeated_load_is_a_hit(tmp_path):
+    path = tmp_path / "animation.json"
+    path.write_text(json.dumps({"nm": "layer", "w": 1.23456, "layers": [{"mn": "x", "op": 60.0}]}))
+    before = asset_stats()
+    first = load_lottie(str(path))
+    assert load_lottie(str(path)) is first
+    after = asset_stats()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (1, 1)
+    assert first == {"w": 1.235, "layers": [{"op": 60}]}
+
+
+def test_compacting_keeps_the_animation():
+    with open(ANIMATION, encoding="utf-8") as f:
+        raw = json.load(f)
+    compact = load_lottie(ANIMATION)
+    assert compact == compact_lottie(raw)
+    assert len(json.dumps(compact)) < len(json.dumps(raw))
+    assert load_lottie(ANIMATION, compact=False) == raw
+
+
+def test_stats_reach_the_metrics_and_debug_panel(tmp_path):
+    path = tmp_path / "animation.json"
+    path.write_text("{}")
+    load_lottie(str(path))
+    load_lottie(str(path))
+    stats = asset_stats()
+    assert f'carbonivore_cache_hits_total{{cache="asset"}} {stats["hits"]}' in instrumentation.metrics_text()
+    row = next(row for row in instrumentation.cache_summary() if row["Cache"] == "asset")
+    assert (row["Hits"], row["Misses"], row["Entries"]) == (stats["hits"], stats["misses"], stats["entries"])
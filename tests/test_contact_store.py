@@ -0,0 +1,177 @@
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+import contact_store
+from contact_store import (
+    FEEDBACK_TYPES, INSERT_CONTACT, MIGRATIONS, ContactStore, query_contacts, timestamp_seconds,
+)
+
+WORDS = ["apple", "banana", "cherry", "delta", "echo"]
+
+
+def user_version(path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+# A database left at the first schema version, with rows in the old layout
+@pytest.fixture
+def v1_db(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(f"{MIGRATIONS[0]};\nPRAGMA user_version=1;")
+    conn.executemany("INSERT INTO contacts VALUES (?, ?, ?, ?, ?)", [
+        (f"name {i}", f"user{i}@example.com", f"{WORDS[i % 5]} message {i}", FEEDBACK_TYPES[i % 5],
+         f"2024-0{1 + i % 9}-1{i % 10} 12:00:0{i % 10}")
+        for i in range(40)
+    ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+# A migrated database with many rows sharing a timestamp; returns the path and
+# the rows as a frame
+@pytest.fixture
+def filled_db(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    ContactStore(path).close()
+    rng = np.random.default_rng(3)
+    rows = [
+        (f"name {i}", f"user{i}@example.com", " ".join(rng.choice(WORDS, 3)), FEEDBACK_TYPES[i % 5],
+         f"2025-01-{1 + rng.integers(0, 20):02d} 08:00:00")
+        for i in range(237)
+    ]
+    rows = [row + (timestamp_seconds(row[4]),) for row in rows]
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(INSERT_CONTACT, rows)
+    conn.close()
+    frame = pd.DataFrame(rows, columns=["name", "email", "message", "feedback_type", "timestamp", "created_at"])
+    frame.insert(0, "id", np.arange(1, len(rows) + 1))
+    return path, frame
+
+
+def test_fresh_database_is_migrated(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    ContactStore(path).close()
+    assert user_version(path) == len(MIGRATIONS)
+
+
+def test_v1_rows_survive_the_migration(v1_db):
+    conn = sqlite3.connect(v1_db)
+    before = conn.execute("SELECT name, email, message, feedback_type, timestamp FROM contacts ORDER BY rowid").fetchall()
+    conn.close()
+
+    ContactStore(v1_db).close()
+    assert user_version(v1_db) == len(MIGRATIONS)
+    conn = sqlite3.connect(v1_db)
+    after = conn.execute("SELECT name, email, message, feedback_type, timestamp, created_at FROM contacts ORDER BY id").fetchall()
+    matched = conn.execute("SELECT count(*) FROM contacts_fts WHERE contacts_fts MATCH 'apple'").fetchone()[0]
+    conn.close()
+    assert [row[:5] for row in after] == before
+    assert [row[5] for row in after] == [timestamp_seconds(row[4]) for row in before]
+    assert matched == sum("apple" in row[2] for row in before)
+
+
+# Stores opened together on an old database migrate it exactly once
+def test_concurrent_stores_migrate_once(v1_db):
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def open_store():
+        barrier.wait()
+        try:
+            ContactStore(v1_db).close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_store) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    conn = sqlite3.connect(v1_db)
+    assert conn.execute("SELECT count(*) FROM contacts").fetchone()[0] == 40
+    conn.close()
+
+
+def test_failed_migration_rolls_back_and_closes(v1_db, monkeypatch):
+    monkeypatch.setattr(contact_store, "MIGRATIONS", MIGRATIONS + ["CREATE TABLE extra (x); INSERT INTO missing VALUES (1)"])
+    opened = []
+    real_connect = contact_store.connect
+
+    def recording_connect(path):
+        opened.append(real_connect(path))
+        return opened[-1]
+
+    monkeypatch.setattr(contact_store, "connect", recording_connect)
+    with pytest.raises(sqlite3.OperationalError):
+        ContactStore(v1_db)
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+    assert user_version(v1_db) == 1
+    conn = sqlite3.connect(v1_db)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert tables == {"contacts"}
+
+
+def test_submissions_are_committed(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    store = ContactStore(path, flush_interval=0.01)
+    futures = [store.submit(f"n{i}", "e@x.y", "hello", "Question", "2025-03-04 05:06:07") for i in range(25)]
+    assert all(future.result(timeout=10) for future in futures)
+    store.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT count(*), min(created_at) FROM contacts").fetchone() == (25, 1741064767)
+    conn.close()
+
+
+FILTERS = {
+    "none": {},
+    "type": {"feedback_type": "Bug Report"},
+    "range": {"start": timestamp_seconds("2025-01-05 08:00:00"), "end": timestamp_seconds("2025-01-12 08:00:00")},
+    "search": {"search": "cherry"},
+    "all filters": {"feedback_type": "Question", "start": timestamp_seconds("2025-01-03 00:00:00"), "search": "apple"},
+    "no match": {"feedback_type": "Others", "search": "zebra"},
+}
+
+
+def plain_query(frame, feedback_type=None, start=None, end=None, search=None):
+    keep = pd.Series(True, index=frame.index)
+    if feedback_type:
+        keep &= frame["feedback_type"] == feedback_type
+    if start is not None:
+        keep &= frame["created_at"] >= start
+    if end is not None:
+        keep &= frame["created_at"] < end
+    if search:
+        keep &= frame["message"].str.split().apply(lambda words: search in words)
+    return frame[keep].sort_values(["created_at", "id"], ascending=False)["id"].tolist()
+
+
+# Walking every page with the returned cursors lists each matching row once, newest first
+@pytest.mark.parametrize("limit", [1, 50, 500])
+@pytest.mark.parametrize("name", list(FILTERS))
+def test_keyset_pages_match_pandas(filled_db, name, limit):
+    path, frame = filled_db
+    conn = sqlite3.connect(path)
+    ids, after, pages = [], None, 0
+    while True:
+        rows, after = query_contacts(conn, after=after, limit=limit, **FILTERS[name])
+        assert len(rows) <= limit
+        ids.extend(row[0] for row in rows)
+        pages += 1
+        if after is None:
+            break
+    conn.close()
+    expected = plain_query(frame, **FILTERS[name])
+    assert ids == expected
+    assert pages == max(1, -(-len(expected) // limit))
@@ -0,0 +1,70 @@
+import plotly.graph_objects as go
+import pytest
+import figure_cache
+import instrumentation
+from figure_cache import ALL, cached_figure, clear_figure_cache, figure_cache_stats, selection_key
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_figure_cache()
+    yield
+    clear_figure_cache()
+
+
+# A build function that counts its calls
+def counting_build(builds, y=(1, 2, 3)):
+    def build():
+        builds.append(y)
+        return go.Figure(go.Bar(y=list(y)))
+    return build
+
+
+def test_repeated_call_is_a_hit():
+    before = figure_cache_stats()
+    builds = []
+    first = cached_figure("bar", "v1", ALL, counting_build(builds))
+    second = cached_figure("bar", "v1", ALL, counting_build(builds))
+    after = figure_cache_stats()
+    assert second is first
+    assert len(builds) == 1
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (1, 1)
+    assert after["entries"] == 1
+    assert after["bytes"] == len(first.to_json())
+
+
+def test_version_and_selection_are_part_of_the_key():
+    builds = []
+    for version, selection in [("v1", ALL), ("v2", ALL), ("v1", ("India",)), ("v1", ALL)]:
+        cached_figure("bar", version, selection, counting_build(builds))
+    assert len(builds) == 3
+
+
+def test_equivalent_selections_share_a_key():
+    universe = ["Brazil", "China", "India"]
+    assert selection_key(["India", "Brazil"], universe) == selection_key(["Brazil", "India"], universe)
+    assert selection_key(universe[::-1], universe) == ALL
+
+
+def test_least_recently_used_figures_are_evicted(monkeypatch):
+    builds = []
+    size = len(counting_build([])().to_json())
+    monkeypatch.setattr(figure_cache, "FIGURE_CACHE_BYTES", 2 * size)
+    before = figure_cache_stats()
+    for chart in ["a", "b", "a", "c", "a", "b"]:
+        cached_figure(chart, "v1", ALL, counting_build(builds))
+    after = figure_cache_stats()
+    # "b" was the least recently used when "c" came in, so it is built twice
+    assert len(builds) == 4
+    assert after["evictions"] - before["evictions"] == 2
+    assert after["entries"] == 2 and after["bytes"] <= 2 * size
+
+
+def test_stats_reach_the_metrics_and_debug_panel():
+    cached_figure("bar", "v1", ALL, counting_build([]))
+    cached_figure("bar", "v1", ALL, counting_build([]))
+    stats = figure_cache_stats()
+    assert f'carbonivore_cache_hits_total{{cache="figure"}} {stats["hits"]}' in instrumentation.metrics_text()
+    assert f'carbonivore_cache_misses_total{{cache="figure"}} {stats["misses"]}' in instrumentation.metrics_text()
+    row = next(row for row in instrumentation.cache_summary() if row["Cache"] == "figure")
+    assert (row["Hits"], row["Misses"], row["Entries"]) == (stats["hits"], stats["misses"], 1)
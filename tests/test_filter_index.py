@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from filter_index import build_filter_index, filter_view, rows_at, rows_share_frame, select_positions
+
+
+def plain_filter(df, areas, years):
+    return df[df["Area"].isin(areas) & df["Year"].isin(years)]
+
+
+def test_filter_view_matches_pandas(cleaned, selection):
+    areas, years = selection
+    index = build_filter_index(cleaned)
+    pd.testing.assert_frame_equal(filter_view(cleaned, index, areas, years), plain_filter(cleaned, areas, years))
+
+
+def test_filter_view_keeps_missing_values(nan_heavy, selection):
+    areas, years = selection
+    index = build_filter_index(nan_heavy)
+    pd.testing.assert_frame_equal(filter_view(nan_heavy, index, areas, years), plain_filter(nan_heavy, areas, years))
+
+
+# Positions are the AND of the two filters' ORed value masks, sorted
+def test_select_positions_combines_masks(cleaned, selection):
+    areas, years = selection
+    positions = select_positions(build_filter_index(cleaned), areas, years)
+    expected = np.flatnonzero(cleaned["Area"].isin(areas) & cleaned["Year"].isin(years))
+    if positions is None:
+        assert len(expected) == len(cleaned)
+    else:
+        np.testing.assert_array_equal(positions, expected)
+
+
+def test_full_selection_is_the_frame_itself(cleaned):
+    index = build_filter_index(cleaned)
+    areas = list(cleaned["Area"].unique()) + ["Atlantis"]
+    assert select_positions(index, areas, cleaned["Year"].unique()) is None
+    assert filter_view(cleaned, index, areas, cleaned["Year"].unique()) is cleaned
+
+
+def test_contiguous_selection_is_a_view(cleaned):
+    index = build_filter_index(cleaned)
+    positions = select_positions(index, ["India"], cleaned["Year"].unique())
+    assert rows_share_frame(positions)
+    view = rows_at(cleaned, positions)
+    assert np.shares_memory(view["total_emission"].to_numpy(), cleaned["total_emission"].to_numpy())
+
+
+def test_scattered_selection_is_a_copy(cleaned):
+    index = build_filter_index(cleaned)
+    positions = select_positions(index, cleaned["Area"].unique(), [2000])
+    assert not rows_share_frame(positions)
+    rows = rows_at(cleaned, positions)
+    assert not np.shares_memory(rows["total_emission"].to_numpy(), cleaned["total_emission"].to_numpy())
+    pd.testing.assert_frame_equal(rows, cleaned[cleaned["Year"] == 2000])
+
+
+def test_empty_selection_keeps_columns(cleaned):
+    rows = filter_view(cleaned, build_filter_index(cleaned), [], [2000])
+    assert rows.empty
+    assert list(rows.columns) == list(cleaned.columns)
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from forecast_models import fit_matrix, forecast_frame
+from forecasting import forecast_summary
+
+
+def test_summary_matches_pandas_and_skips_zero_last_values():
+    matrix = pd.DataFrame(
+        [[1.0, 2.0, 3.0, 4.0], [4.0, 2.0, 1.0, 0.0], [2.0, np.nan, 6.0, np.nan], [0.0, 0.0, 0.0, 0.0]],
+        index=pd.Index(["a", "b", "c", "d"], name="Area"), columns=[2000, 2001, 2002, 2003],
+    )
+    fit = fit_matrix(matrix, "linear")
+    forecast = forecast_frame(fit, "linear", 3)
+    summary = forecast_summary(fit, forecast).set_index("Area")
+
+    last = matrix.ffill(axis=1).iloc[:, -1]
+    expected = (forecast[2006] / last - 1) * 100
+    assert summary.loc[["a", "b", "c", "d"], "Last value"].tolist() == [4.0, 0.0, 6.0, 0.0]
+    np.testing.assert_allclose(summary.loc[["a", "c"], "Change %"], expected[["a", "c"]])
+    assert summary.loc[["b", "d"], "Change %"].isna().all()
+    assert np.isfinite(summary["Change %"].dropna()).all()
+    assert summary["Forecast 2006"].is_monotonic_decreasing
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from moments import (
+    STORE_KEYS, build_moment_store, correlation_matrix, merge_moments, pair_moments, select_store_cells,
+    store_correlation,
+)
+
+
+def value_columns(df):
+    return [c for c in df.select_dtypes("number").columns if c not in STORE_KEYS]
+
+
+# Every ordered column pair, row-major, as pair_moments and correlation_matrix expect
+def all_pairs(k):
+    return np.repeat(np.arange(k), k), np.tile(np.arange(k), k)
+
+
+def assert_same_correlation(got, expected):
+    assert list(got.index) == list(expected.index) and list(got.columns) == list(expected.columns)
+    np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+@pytest.fixture(scope="module")
+def store(cleaned):
+    return build_moment_store(cleaned)
+
+
+@pytest.fixture(scope="module")
+def gappy_store(nan_heavy):
+    return build_moment_store(nan_heavy)
+
+
+def test_store_matches_pandas(cleaned, store, selection):
+    areas, years = selection
+    columns = value_columns(cleaned)
+    rows = cleaned[cleaned["Area"].isin(areas) & cleaned["Year"].isin(years)]
+    got = store_correlation(store, select_store_cells(store, areas, years), columns)
+    assert_same_correlation(got, rows[columns].corr())
+
+
+# Pairs only share the rows where both columns are present, like DataFrame.corr()
+def test_gappy_store_matches_pandas(nan_heavy, gappy_store, selection):
+    areas, years = selection
+    columns = value_columns(nan_heavy)
+    rows = nan_heavy[nan_heavy["Area"].isin(areas) & nan_heavy["Year"].isin(years)]
+    got = store_correlation(gappy_store, select_store_cells(gappy_store, areas, years), columns)
+    assert_same_correlation(got, rows[columns].corr())
+
+
+def test_store_column_subset_in_requested_order(cleaned, store):
+    columns = ["Total Population", "total_emission", "Rice Cultivation"]
+    got = store_correlation(store, select_store_cells(store), columns)
+    assert_same_correlation(got, cleaned[columns].corr())
+
+
+@pytest.mark.parametrize("split", [0, 1, 3000, 6965])
+def test_merged_moments_equal_whole(nan_heavy, split):
+    X = nan_heavy[value_columns(nan_heavy)].to_numpy(dtype="float64")
+    I, J = all_pairs(X.shape[1])
+    merged = merge_moments(pair_moments(X[:split], I, J), pair_moments(X[split:], I, J))
+    whole = pair_moments(X, I, J)
+    for key, values in whole.items():
+        np.testing.assert_allclose(merged[key], values, rtol=1e-9, atol=1e-6, err_msg=key)
+
+
+# Merging many small row sets in sequence stays as accurate as one pass
+def test_chained_merges_match_pandas(cleaned):
+    columns = value_columns(cleaned)
+    X = cleaned[columns].to_numpy(dtype="float64")
+    I, J = all_pairs(len(columns))
+    moments = pair_moments(X[:0], I, J)
+    for chunk in np.array_split(X, 97):
+        moments = merge_moments(moments, pair_moments(chunk, I, J))
+    assert_same_correlation(correlation_matrix(moments, columns), cleaned[columns].corr())
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+import paginated_table
+from paginated_table import column_sort_order
+
+
+# Visible rows of df in descending order of column, as the table pages them
+def descending_rows(df, column, positions=None):
+    ordered = paginated_table._ordered_positions(len(df), positions, column_sort_order(df, column))
+    return paginated_table._descending(ordered, df[column].to_numpy())
+
+
+@pytest.mark.parametrize("column", ["Rice Cultivation", "Area", "Year"])
+def test_descending_matches_pandas_with_missing_values_last(nan_heavy, column):
+    expected = nan_heavy[column].reset_index(drop=True).sort_values(ascending=False, kind="stable", na_position="last")
+    np.testing.assert_array_equal(descending_rows(nan_heavy, column), expected.index.to_numpy())
+
+
+def test_descending_view_keeps_missing_values_last(nan_heavy):
+    positions = np.flatnonzero(nan_heavy["Area"].isin(["Brazil", "China", "India"]).to_numpy())
+    view = nan_heavy.iloc[positions]["Rice Cultivation"].reset_index(drop=True)
+    expected = positions[view.sort_values(ascending=False, kind="stable", na_position="last").index.to_numpy()]
+    ordered = descending_rows(nan_heavy, "Rice Cultivation", positions)
+    np.testing.assert_array_equal(ordered, expected)
+    assert np.isnan(nan_heavy["Rice Cultivation"].to_numpy()[ordered[-1]])
+
+
+def test_descending_of_nothing(nan_heavy):
+    assert len(descending_rows(nan_heavy, "Rice Cultivation", np.empty(0, dtype=np.intp))) == 0
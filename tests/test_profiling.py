@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+import profiling
+from data_store import load_dataset
+from profiling import load_profile, merge_profiles, profile_frame
+from tests import RAW_CSV
+
+
+# The profile as plain pandas computes it
+def plain_profile(df):
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        numeric = pd.api.types.is_numeric_dtype(series) and series.notna().any()
+        columns.append({
+            "name": name,
+            "dtype": str(series.dtype),
+            "nulls": int(series.isna().sum()),
+            "non_null": int(series.notna().sum()),
+            "min": series.min() if numeric else None,
+            "max": series.max() if numeric else None,
+            "distinct": int(series.nunique()),
+        })
+    return {"rows": len(df), "duplicates": int(df.duplicated().sum()), "columns": columns}
+
+
+def test_profile_matches_pandas(cleaned, selection):
+    areas, years = selection
+    df = cleaned[cleaned["Area"].isin(areas) & cleaned["Year"].isin(years)]
+    assert profile_frame(df)[0] == plain_profile(df)
+
+
+def test_profile_of_nan_heavy_frame(nan_heavy):
+    assert profile_frame(nan_heavy)[0] == plain_profile(nan_heavy)
+
+
+def test_duplicates_are_counted(cleaned):
+    df = pd.concat([cleaned, cleaned.iloc[:5], cleaned.iloc[:2]], ignore_index=True)
+    assert profile_frame(df)[0]["duplicates"] == 7
+
+
+# Merging the profile of appended rows gives the profile of the whole frame
+@pytest.mark.parametrize("split", [0, 1, 3000, 6964, 6965])
+def test_merge_equals_whole_profile(split):
+    df = pd.read_csv(RAW_CSV)
+    profile, state = profile_frame(df.iloc[:split])
+    merged, merged_state = merge_profiles(profile, state, df.iloc[split:])
+    whole, whole_state = profile_frame(df)
+    assert merged == whole
+    assert merged_state.keys() == whole_state.keys()
+    for key, hashes in whole_state.items():
+        np.testing.assert_array_equal(np.sort(merged_state[key]), np.sort(hashes))
+
+
+def test_merge_widens_dtype_for_appended_nulls():
+    base = pd.DataFrame({"Area": ["a", "b"], "Year": [1990, 1991]})
+    profile, state = profile_frame(base)
+    merged, _ = merge_profiles(profile, state, pd.DataFrame({"Area": ["b", None], "Year": [1991.0, np.nan]}))
+    assert merged == plain_profile(pd.DataFrame({"Area": ["a", "b", "b", None], "Year": [1990, 1991, 1991, np.nan]}))
+
+
+# Rows appended to the CSV are profiled on their own and merged into the sidecar
+def test_load_profile_merges_appended_rows(tmp_path, monkeypatch):
+    with open(RAW_CSV, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    csv = tmp_path / "data.csv"
+    csv.write_bytes(b"".join(lines[:4001]))
+    load_profile(str(csv))
+
+    profiled = []
+    real = profiling.profile_frame
+
+    def counting_profile_frame(df):
+        profiled.append(len(df))
+        return real(df)
+
+    monkeypatch.setattr(profiling, "profile_frame", counting_profile_frame)
+    with open(csv, "ab") as f:
+        f.write(b"".join(lines[4001:]))
+    profile = load_profile(str(csv))
+
+    assert profiled == [len(lines) - 4001]
+    expected = plain_profile(pd.read_csv(RAW_CSV, float_precision="round_trip"))
+    assert {k: v for k, v in profile.items() if k != "source"} == expected
+    assert profile == load_profile(str(csv))
+
+
+# A fresh profile reuses the dataset the app loaded instead of parsing the CSV again
+def test_load_profile_profiles_the_loaded_dataset(tmp_path, monkeypatch):
+    with open(RAW_CSV, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    csv = tmp_path / "data.csv"
+    csv.write_bytes(b"".join(lines[:2001]))
+
+    profiled = []
+    real = profiling.profile_frame
+
+    def recording_profile_frame(df):
+        profiled.append(df)
+        return real(df)
+
+    monkeypatch.setattr(profiling, "profile_frame", recording_profile_frame)
+    load_profile(str(csv))
+    assert len(profiled) == 1 and profiled[0] is load_dataset(str(csv))
@@ -0,0 +1,105 @@
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import shared_dataset
+from figure_cache import ALL
+from query_backend import BACKENDS
+from schema import FLOAT32_ATOL
+from tests import CLEANED_CSV
+
+pytest.importorskip("duckdb")
+
+# Selections in figure_cache.selection_key form
+BACKEND_SELECTIONS = {
+    "everything": (ALL, ALL),
+    "single year": (ALL, (2005,)),
+    "areas and years": (("Albania", "India", "Zimbabwe"), (1990, 2005, 2020)),
+    "one cell": (("India",), (2000,)),
+    "unmatched area": (("Atlantis",), ALL),
+    "empty": ((), ALL),
+}
+COLUMNS = ["total_emission", "Rice Cultivation", "Fires in organic soils", "IPPU"]
+
+
+# Every backend on one private copy of cleaned_data.csv, sidecars and Parquet
+# copy in a temporary directory and frames unshared
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("backends") / "cleaned_data.csv")
+    shutil.copyfile(CLEANED_CSV, path)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(shared_dataset, "SHARED_DIR", "")
+        yield {kind: backend(path) for kind, backend in BACKENDS.items()}
+
+
+@pytest.fixture(params=list(BACKEND_SELECTIONS))
+def backend_selection(request):
+    return BACKEND_SELECTIONS[request.param]
+
+
+# Backends keep their own dtypes (compact float32 and categories in memory,
+# float64 and strings from Parquet), so values are compared, not dtypes, and
+# to within the error the compact schema allows
+def assert_same_frame(got, expected):
+    pd.testing.assert_frame_equal(
+        got.reset_index(drop=True).astype({"Area": str}, errors="ignore"),
+        expected.reset_index(drop=True).astype({"Area": str}, errors="ignore"),
+        check_dtype=False, check_index_type=False, check_column_type=False, rtol=1e-5, atol=FLOAT32_ATOL,
+    )
+
+
+def plain_rows(df, selection):
+    areas, years = selection
+    keep = pd.Series(True, index=df.index)
+    if areas != ALL:
+        keep &= df["Area"].isin(areas)
+    if years != ALL:
+        keep &= df["Year"].isin(years)
+    return df[keep]
+
+
+@pytest.mark.parametrize("kind", ["arrow", "duckdb"])
+def test_count(backends, kind, backend_selection):
+    assert backends[kind].count(backend_selection) == backends["pandas"].count(backend_selection)
+
+
+@pytest.mark.parametrize("kind", ["arrow", "duckdb"])
+def test_area_year_sums(backends, kind, backend_selection):
+    expected = backends["pandas"].area_year_sums(COLUMNS, backend_selection)
+    got = backends[kind].area_year_sums(COLUMNS, backend_selection)
+    assert list(got.columns) == ["Area", "Year"] + COLUMNS
+    assert_same_frame(got, expected)
+
+
+@pytest.mark.parametrize("how", ["sum", "mean"])
+@pytest.mark.parametrize("kind", ["arrow", "duckdb"])
+def test_area_aggregate(backends, kind, how, backend_selection):
+    expected = backends["pandas"].area_aggregate(COLUMNS, backend_selection, how)
+    got = backends[kind].area_aggregate(COLUMNS, backend_selection, how)
+    assert got.index.name == "Area"
+    assert_same_frame(got.reset_index(), expected.reset_index())
+
+
+@pytest.mark.parametrize("kind", ["pandas", "arrow", "duckdb"])
+def test_latest_year_totals(backends, cleaned, kind, backend_selection):
+    rows = plain_rows(cleaned, backend_selection)
+    latest, totals = backends[kind].latest_year_totals(COLUMNS, backend_selection)
+    if rows.empty:
+        assert latest is None
+    else:
+        assert latest == rows["Year"].max()
+    expected = rows.loc[rows["Year"] == rows["Year"].max(), COLUMNS].sum()
+    assert list(totals.index) == COLUMNS
+    np.testing.assert_allclose(
+        totals.to_numpy(dtype="float64"), expected.to_numpy(dtype="float64"), rtol=1e-5, atol=FLOAT32_ATOL
+    )
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("kind", ["arrow", "duckdb"])
+def test_top_n(backends, kind, ascending, backend_selection):
+    columns = ["Area", "Year", "total_emission"]
+    expected = backends["pandas"].top_n("total_emission", columns, 10, backend_selection, ascending)
+    got = backends[kind].top_n("total_emission", columns, 10, backend_selection, ascending)
+    assert_same_frame(got, expected)
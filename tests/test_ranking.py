@@ -0,0 +1,134 @@
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import ranking
+import shared_dataset
+from figure_cache import ALL
+from query_backend import PandasBackend
+from ranking import clear_top_n_cache, ranking_order, top_n, top_positions
+from tests import CLEANED_CSV
+
+# Order columns: spread values, and columns with many tied zeros
+COLUMNS = ["total_emission", "Rice Cultivation", "Drained organic soils (CO2)", "Fires in organic soils"]
+
+
+# The ranking as plain pandas computes it: a stable sort with missing values last
+def plain_top(values, n, ascending=False):
+    order = pd.Series(values, dtype="float64").sort_values(ascending=ascending, kind="stable", na_position="last")
+    return order.index.to_numpy()[:max(n, 0)]
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("n", [0, 1, 10, 6964, 6965, 7000])
+@pytest.mark.parametrize("column", COLUMNS)
+def test_top_positions_match_pandas(cleaned, column, n, ascending):
+    values = cleaned[column].to_numpy()
+    np.testing.assert_array_equal(top_positions(values, n, ascending), plain_top(values, n, ascending))
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("n", [1, 10, 2000, 6965])
+@pytest.mark.parametrize("column", COLUMNS)
+def test_missing_values_rank_last(nan_heavy, column, n, ascending):
+    values = nan_heavy[column].to_numpy()
+    np.testing.assert_array_equal(top_positions(values, n, ascending), plain_top(values, n, ascending))
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_top_positions_within_selection(cleaned, selection, ascending):
+    areas, years = selection
+    values = cleaned.loc[cleaned["Area"].isin(areas) & cleaned["Year"].isin(years), "total_emission"].to_numpy()
+    for n in (1, 5, len(values) + 1):
+        np.testing.assert_array_equal(top_positions(values, n, ascending), plain_top(values, n, ascending))
+
+
+# Ties with the n-th best value are taken in row order
+def test_ties_fill_in_row_order():
+    values = [3.0, 1.0, 3.0, np.nan, 2.0, 3.0, 1.0]
+    np.testing.assert_array_equal(top_positions(values, 2), [0, 2])
+    np.testing.assert_array_equal(top_positions(values, 4), [0, 2, 5, 4])
+    np.testing.assert_array_equal(top_positions(values, 2, ascending=True), [1, 6])
+    np.testing.assert_array_equal(top_positions(values, 7), plain_top(values, 7))
+
+
+@pytest.mark.parametrize("values", [[], [np.nan] * 4], ids=["empty", "all missing"])
+def test_nothing_to_rank(values):
+    assert top_positions(values, 3).tolist() == plain_top(values, 3).tolist()
+    assert top_positions(values, 0).dtype == np.intp
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_ranking_order_is_a_full_stable_sort(nan_heavy, ascending):
+    values = nan_heavy["total_emission"].to_numpy()
+    order = ranking_order(values, ascending)
+    np.testing.assert_array_equal(order, plain_top(values, len(values), ascending))
+
+
+# A pandas backend on a private copy of cleaned_data.csv, its sidecars in a
+# temporary directory and its frames unshared
+@pytest.fixture(scope="module")
+def backend(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("ranking") / "cleaned_data.csv")
+    shutil.copyfile(CLEANED_CSV, path)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(shared_dataset, "SHARED_DIR", "")
+        yield PandasBackend(path)
+    clear_top_n_cache()
+
+
+def plain_top_rows(frame, order_by, columns, n, selection, ascending=False):
+    areas, years = selection
+    keep = pd.Series(True, index=frame.index)
+    if areas != ALL:
+        keep &= frame["Area"].isin(areas)
+    if years != ALL:
+        keep &= frame["Year"].isin(years)
+    rows = frame[keep].reset_index(drop=True)
+    return rows.iloc[plain_top(rows[order_by].to_numpy(), n, ascending)][columns].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("selection", [
+    (ALL, ALL), (("Brazil", "China", "India"), ALL), (ALL, (2000,)), (("India",), (2000,)), ((), ALL),
+], ids=["everything", "three areas", "one year", "one cell", "empty"])
+def test_backend_top_n_matches_pandas(backend, selection, ascending):
+    columns = ["Area", "Year", "Fires in organic soils", "total_emission"]
+    for order_by in ("total_emission", "Fires in organic soils"):
+        pd.testing.assert_frame_equal(
+            backend.top_n(order_by, columns, 10, selection, ascending),
+            plain_top_rows(backend.frame, order_by, columns, 10, selection, ascending),
+        )
+
+
+def test_per_area_ranks_aggregates(backend):
+    columns = ["Area", "total_emission"]
+    got = top_n(backend, ["Rice Cultivation", "Forest fires"], columns, 5, (ALL, ALL), per_area="sum")
+    sums = backend.frame.groupby("Area", observed=True)[["Rice Cultivation", "Forest fires", "total_emission"]].sum()
+    order = (sums["Rice Cultivation"] + sums["Forest fires"]).sort_values(ascending=False, kind="stable")
+    assert got["Area"].tolist() == order.index[:5].tolist()
+    np.testing.assert_allclose(got["total_emission"], sums.loc[order.index[:5], "total_emission"], rtol=1e-6)
+
+
+def test_results_are_cached_per_selection(backend, monkeypatch):
+    clear_top_n_cache()
+    calls = []
+    real = backend.top_n
+
+    def counting_top_n(*args):
+        calls.append(args)
+        return real(*args)
+
+    monkeypatch.setattr(backend, "top_n", counting_top_n)
+    monkeypatch.setattr(ranking, "TOP_N_CACHE_ENTRIES", 2)
+    first = top_n(backend, "total_emission", ["Area"], 3, (ALL, ALL))
+    assert top_n(backend, "total_emission", ["Area"], 3, (ALL, ALL)) is first
+    top_n(backend, "total_emission", ["Area"], 3, (("India",), ALL))
+    top_n(backend, "total_emission", ["Area"], 3, (ALL, ALL), ascending=True)
+    assert len(calls) == 3
+    # The oldest entry was evicted past the limit, and clearing drops the rest
+    top_n(backend, "total_emission", ["Area"], 3, (ALL, ALL))
+    assert len(calls) == 4
+    clear_top_n_cache()
+    top_n(backend, "total_emission", ["Area"], 3, (ALL, ALL), ascending=True)
+    assert len(calls) == 5
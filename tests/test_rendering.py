@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pytest
+from rendering import compact_lines, decimate, lttb
+
+
+@pytest.fixture(scope="module")
+def rice(cleaned):
+    return cleaned.groupby(["Area", "Year"], as_index=False)["Rice Cultivation"].sum()
+
+
+def test_compact_lines_keep_every_series(rice):
+    fig = compact_lines(rice, "Year", "Rice Cultivation", "Area")
+    expected = rice.sort_values(["Area", "Year"]).groupby("Area", sort=True)
+    assert [trace.name for trace in fig.data] == list(expected.groups)
+    for trace, (_, series) in zip(fig.data, expected):
+        np.testing.assert_array_equal(trace.x, series["Year"])
+        np.testing.assert_allclose(trace.y, series["Rice Cultivation"], rtol=1e-6)
+    assert fig.layout.template.data.scattergl[0].mode == "lines"
+    assert "%{fullData.name}" in fig.layout.template.data.scattergl[0].hovertemplate
+
+
+# Names once per trace and binary float32 values: well under px.line's JSON
+def test_compact_lines_are_smaller_than_px_line(rice):
+    compact = len(compact_lines(rice, "Year", "Rice Cultivation", "Area").to_json())
+    plain = len(px.line(rice, x="Year", y="Rice Cultivation", color="Area", render_mode="webgl").to_json())
+    assert compact < 0.6 * plain
+
+
+def test_compact_lines_of_nothing():
+    fig = compact_lines(pd.DataFrame({"Area": [], "Year": [], "v": []}), "Year", "v", "Area")
+    assert len(fig.data) == 0
+
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[437] = 5.0
+    keep = lttb(x, y, 100)
+    assert len(keep) == 100 and keep[0] == 0 and keep[-1] == 999
+    assert 437 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_decimate_caps_points_per_group():
+    df = pd.DataFrame({"g": np.repeat(["a", "b"], 800), "x": np.tile(np.arange(800), 2), "y": np.arange(1600.0)})
+    out = decimate(df, "x", "y", "g", max_points=50)
+    assert out.groupby("g").size().tolist() == [50, 50]
+    assert decimate(df, "x", "y", "g", max_points=800) is df
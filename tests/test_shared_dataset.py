@@ -0,0 +1,103 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import shared_dataset
+from schema import apply_schema
+from shared_dataset import attach_shared, publish_shared, remove_shared, shared_path
+
+CSV = "/data/emissions.csv"
+
+
+@pytest.fixture(autouse=True)
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_dataset, "SHARED_DIR", str(tmp_path))
+    return tmp_path
+
+
+def round_trip(df, kind="raw", version="v1", meta=None):
+    published = publish_shared(CSV, kind, version, df, meta)
+    assert published is not None
+    attached = attach_shared(CSV, kind, version)
+    pd.testing.assert_frame_equal(published[0], df)
+    pd.testing.assert_frame_equal(attached[0], df)
+    return attached
+
+
+def test_cleaned_round_trip(cleaned):
+    round_trip(cleaned)
+
+
+def test_compact_round_trip(cleaned):
+    compact, report = apply_schema(cleaned)
+    assert {str(dtype) for dtype in compact.dtypes} >= {"float32", "int16", "category"}
+    _, meta = round_trip(compact, kind="compact", meta=report.to_dict("list"))
+    assert meta == report.to_dict("list")
+
+
+def test_nan_heavy_round_trip(nan_heavy):
+    round_trip(nan_heavy)
+
+
+def test_selection_rows_round_trip(cleaned, selection):
+    areas, years = selection
+    round_trip(cleaned[cleaned["Area"].isin(areas) & cleaned["Year"].isin(years)].reset_index(drop=True))
+
+
+@pytest.mark.parametrize("rows", [slice(0, 1), slice(0, 0)], ids=["one row", "empty"])
+def test_small_frames_round_trip(cleaned, rows):
+    round_trip(cleaned.iloc[rows].reset_index(drop=True))
+    round_trip(apply_schema(cleaned)[0].iloc[rows].reset_index(drop=True), kind="compact")
+
+
+def test_index_is_kept(cleaned):
+    round_trip(cleaned.iloc[100:300:3])
+    round_trip(cleaned.set_index(["Area", "Year"]))
+
+
+# Numeric blocks are read-only views of the mapping, already consolidated
+def test_numeric_columns_are_mapped(cleaned):
+    df, _ = round_trip(cleaned)
+    values = df["total_emission"].to_numpy()
+    assert not values.flags.writeable
+    assert values.base is not None
+    assert df._mgr.is_consolidated()
+    with pytest.raises(ValueError):
+        values[0] = 0.0
+
+
+def test_shared_path_names_csv_kind_and_version(shared_dir):
+    path = shared_path(CSV, "compact2", "123-456")
+    assert os.path.dirname(path) == str(shared_dir)
+    name = os.path.basename(path)
+    assert name.startswith("emissions-") and name.endswith(".compact2.123-456.frame")
+    # Same file name stem for one CSV, another for a different path
+    assert shared_path(CSV, "raw2", "1").rsplit(".", 3)[0] == path.rsplit(".", 3)[0]
+    assert shared_path("/other/emissions.csv", "raw2", "1").rsplit(".", 3)[0] != path.rsplit(".", 3)[0]
+
+
+def test_sharing_can_be_turned_off(cleaned, monkeypatch):
+    monkeypatch.setattr(shared_dataset, "SHARED_DIR", "")
+    assert shared_path(CSV, "raw", "v1") is None
+    assert publish_shared(CSV, "raw", "v1", cleaned) is None
+    assert attach_shared(CSV, "raw", "v1") is None
+
+
+def test_unpublished_or_foreign_files_are_not_attached(shared_dir):
+    assert attach_shared(CSV, "raw", "v1") is None
+    with open(shared_path(CSV, "raw", "v1"), "wb") as f:
+        f.write(b"not a frame")
+    assert attach_shared(CSV, "raw", "v1") is None
+
+
+# A new version replaces the older ones; frames attached before keep working
+def test_new_version_unlinks_old_files(cleaned, shared_dir):
+    old, _ = round_trip(cleaned.iloc[:50], version="v1")
+    round_trip(cleaned.iloc[:50], kind="cube", version="v1")
+    round_trip(cleaned, version="v2")
+    assert sorted(os.listdir(shared_dir)) == [os.path.basename(shared_path(CSV, "raw", "v2"))]
+    assert attach_shared(CSV, "raw", "v1") is None
+    pd.testing.assert_frame_equal(old, cleaned.iloc[:50])
+
+    remove_shared(CSV)
+    assert os.listdir(shared_dir) == []
@@ -1,26 +1,23 @@
 import streamlit as st
 from datetime import datetime
 from streamlit_lottie import st_lottie
-import json
-import sqlite3
-
-# Function to load Lottie animation from file
-def load_lottiefile(filepath: str):
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
+from assets import load_lottie
+from contact_store import save_contact, FEEDBACK_TYPES, TIMESTAMP_FORMAT
+from instrumentation import span
 
 # Main function to display the Get in Touch form
 def get_in_touch():
     # Load Lottie animation
-    lottie_contact = load_lottiefile("contact us.json")
-    st_lottie(
-        lottie_contact,
-        speed=1,
-        reverse=False,
-        loop=True,
-        quality="high",
-        height=300,
-    )
+    with span("get_in_touch.animation"):
+        lottie_contact = load_lottie("contact us.json")
+        st_lottie(
+            lottie_contact,
+            speed=1,
+            reverse=False,
+            loop=True,
+            quality="high",
+            height=300,
+        )
 
     # Page title
     st.title("Get in Touch")
@@ -33,37 +30,16 @@ def get_in_touch():
     # Dropdown for feedback type
     feedback_type = st.selectbox(
         "Type of Feedback",
-        ["Suggestion", "Bug Report", "Compliment", "Question", "Others"]
+        FEEDBACK_TYPES
     )
 
     # Submit button logic
     if st.button("Submit"):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current timestamp
-
-        # Connect to SQLite database (creates if doesn't exist)
-        conn = sqlite3.connect("contacts.db")
-        c = conn.cursor()
-
-        # Create table if not exists
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS contacts (
-                name TEXT,
-                email TEXT,
-                message TEXT,
-                feedback_type TEXT,
-                timestamp TEXT
-            )
-        ''')
-
-        # Insert data into table
-        c.execute(
-            "INSERT INTO contacts (name, email, message, feedback_type, timestamp) VALUES (?, ?, ?, ?, ?)",
-            (name, email, message, feedback_type, timestamp)
-        )
+        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)  # Current timestamp
 
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        # Queued to the shared contact store, which batches inserts on a writer thread
+        with span("get_in_touch.save_contact"):
+            save_contact(name, email, message, feedback_type, timestamp)
 
         # Success message
         st.success("Thanks for your feedback! It's been recorded.")
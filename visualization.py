@@ -1,120 +1,63 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-import json
 from streamlit_lottie import st_lottie
+from assets import load_lottie
 import io
-
-# Load Lottie animation
-def load_lottiefile(filepath: str):
-    with open(filepath, "r") as f:
-        return json.load(f)
-
-# Main visualization function
-def show_visualization():
-    st.set_page_config(page_title="Carbonivore Dashboard", layout="wide")
-    st.title("📊 Visualization of Data")
-
-    # Load animation
-    lottie_preprocessing = load_lottiefile("analytics.json")
-    st_lottie(
-        lottie_preprocessing,
-        speed=1,
-        reverse=False,
-        loop=True,
-        quality="high",
-        width=300,
-        height=300
-    )
-
-    # Load CSV
-    DATA_FILE = "cleaned_data.csv"
-    try:
-        df = pd.read_csv(DATA_FILE)
-    except FileNotFoundError:
-        st.error(f"⚠️ The file '{DATA_FILE}' was not found. Please place it in the same directory as your Streamlit script.")
-        return
-    
-    st.markdown("---")
-
-
-    # Sidebar Filters
-    st.sidebar.header("🔍 Filter Options")
-    area_list = df["Area"].unique().tolist()
-    selected_areas = st.sidebar.multiselect("Select Area(s)", area_list, default=area_list)
-
-    year_list = sorted(df["Year"].unique())
-    selected_years = st.sidebar.multiselect("Select Year(s)", year_list, default=year_list)
-
-    # Apply filters
-    filtered_df = df[df["Area"].isin(selected_areas) & df["Year"].isin(selected_years)]
-
-    # Data Overview
-    st.subheader("Cleaned Null Values")
-    st.write(filtered_df.isnull().sum())
-
-    st.subheader("Data Preview")
-    st.dataframe(filtered_df)
-
-    st.subheader("Summary Statistics")
-    st.write(filtered_df.describe())
-
-    st.subheader("Head & Tail")
-    st.write("🔼 Head")
-    st.write(filtered_df.head())
-    st.write("🔽 Tail")
-    st.write(filtered_df.tail())
-
-    st.subheader("Dataset Shape")
-    st.write(filtered_df.shape)
-
-    st.subheader("Dataset Info")
-    buffer = io.StringIO()
-    filtered_df.info(buf=buffer)
-    st.text(buffer.getvalue())
-
-    st.markdown("---")
-    df.isnull().sum()
-    st.markdown("---")
-    # Choropleth
-    st.subheader("🌍 Choropleth: Total Emissions by Area")
-    fig = px.choropleth(
-        filtered_df,
-        locations="Area",
-        locationmode="country names",
-        color="total_emission",
-        hover_name="Area",
-        animation_frame="Year",
-        title="Area-wise Total Emissions"
-    )
-    fig.update_layout(title_x=0.3, width=1100, height=700)
-    st.plotly_chart(fig, use_container_width=True)
-
-    st.markdown("---")
-
-    # Line Chart
-    st.subheader("📈 Line Chart: Rice Cultivation Emissions Over Time")
-    fig = px.line(
-        filtered_df,
-        x="Year",
-        y="Rice Cultivation",
-        color="Area",
-        title="Rice Cultivation Emissions over Time"
-    )
+from data_store import get_derived, with_derived_columns
+from schema import memory_summary
+from paginated_table import PAGE_SIZE, show_paginated_table, column_sort_order
+from figure_cache import ALL, selection_key
+from figure_pipeline import start_figures
+from query_backend import get_backend
+from ranking import top_n
+from rendering import render_mode, decimate, merge_groups, compact_lines, merged_scatter, animated_choropleth
+from geo_keys import geo_index, unmatched_areas
+from instrumentation import span
+from session_data import session_artifact
+from export import EXPORT_FORMATS, EXPORT_SERVE_BYTES, export_file, export_size, is_exported
+
+DATA_FILE = "cleaned_data.csv"
+
+# Chart builders. Each asks the query backend for the aggregate it plots and
+# returns a Plotly figure; show_visualization serves them through the shared
+# figure cache so unchanged selections skip rebuilding.
+
+# Areas keyed by ISO-3 code (geo_keys.py) in a compact Area x Year matrix:
+# frames share the locations and ship only each year's colors, and areas
+# without a code (FAO aggregates, former states) are left off the map
+def build_choropleth(backend, selection):
+    sums = backend.area_year_sums(["total_emission"], selection)
+    matrix = sums.pivot(index="Area", columns="Year", values="total_emission")
+    keys = geo_index(backend).set_index("Area")["ISO3"]
+    matrix = matrix[matrix.index.map(keys).notna()].dropna(how="all")
+    fig = animated_choropleth(matrix, matrix.index.map(keys), matrix.index, "total_emission", "Year")
+    fig.update_layout(title="Area-wise Total Emissions", title_x=0.3, width=1100, height=700)
+    return fig
+
+
+def build_rice_line(backend, selection):
+    rice_df = decimate(backend.area_year_sums(["Rice Cultivation"], selection), "Year", "Rice Cultivation", "Area")
+    # Too many areas for a legend: bare WebGL traces without one
+    if merge_groups(rice_df["Area"].nunique()):
+        fig = compact_lines(rice_df, "Year", "Rice Cultivation", "Area")
+        fig.update_layout(title="Rice Cultivation Emissions over Time")
+    else:
+        fig = px.line(
+            rice_df,
+            x="Year",
+            y="Rice Cultivation",
+            color="Area",
+            title="Rice Cultivation Emissions over Time",
+            render_mode=render_mode(len(rice_df))
+        )
     fig.update_layout(width=1100, height=700, title_x=0.2)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-    st.markdown("---")
 
-    # Fire-Based Emissions Bar Chart
-    st.subheader("🔥 Bar Chart: Top 50 Areas by Fire-Based Emissions")
-    fire_df = filtered_df[["Area", "Forest fires", "Savanna fires", "Fires in humid tropical forests"]]\
-        .groupby("Area").mean().reset_index()
-    fire_df["Total Emissions"] = fire_df[["Forest fires", "Savanna fires", "Fires in humid tropical forests"]].sum(axis=1)
-    top_fire_df = fire_df.sort_values("Total Emissions", ascending=False).head(50)
-    fire_melted = top_fire_df.drop(columns="Total Emissions")\
-        .melt(id_vars="Area", var_name="Fire Type", value_name="Emissions")
+def build_fire_bar(backend, selection):
+    fire_columns = ["Forest fires", "Savanna fires", "Fires in humid tropical forests"]
+    top_fire_df = top_n(backend, fire_columns, ["Area"] + fire_columns, 50, selection, per_area="mean")
+    fire_melted = top_fire_df.melt(id_vars="Area", var_name="Fire Type", value_name="Emissions")
 
     fig = px.bar(
         fire_melted,
@@ -125,47 +68,46 @@ def show_visualization():
         labels={"Emissions": "Emissions (Kilotons)"}
     )
     fig.update_layout(xaxis_tickangle=-45, width=1100, height=600, title_x=0.3)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-    st.markdown("---")
 
-    # Pie Chart
-    st.subheader("🏭 Pie Chart: Industrial Emission Composition")
-    if not filtered_df.empty:
-        year_df = filtered_df[filtered_df["Year"] == filtered_df["Year"].max()]
-        ind_emissions = year_df[["IPPU", "On-farm Electricity Use", "Food Processing"]].sum()
-        fig = px.pie(
-            values=ind_emissions.values,
-            names=ind_emissions.index,
-            title=f"Industrial Emission Proportion in {year_df['Year'].max()}"
+def build_industrial_pie(backend, selection):
+    latest_year, ind_emissions = backend.latest_year_totals(
+        ["IPPU", "On-farm Electricity Use", "Food Processing"], selection
+    )
+    fig = px.pie(
+        values=ind_emissions.values,
+        names=ind_emissions.index,
+        title=(
+            "Industrial Emission Proportion (no data selected)" if latest_year is None
+            else f"Industrial Emission Proportion in {latest_year}"
         )
-        fig.update_layout(title_x=0.2, width=1000, height=500)
-        st.plotly_chart(fig, use_container_width=True)
+    )
+    fig.update_layout(title_x=0.2, width=1000, height=500)
+    return fig
 
-    st.markdown("---")
 
-    # Heatmap
-    st.subheader("🌡️ HeatMap: Correlation with Total Emission")
-    columns_to_check = [
-        "total_emission",
-        "Rural population",
-        "Urban population",
-        "Total Population - Male",
-        "Total Population - Female",
-        "On-farm energy use"
-    ]
-    corr_df = filtered_df[columns_to_check].corr()
-    fig = px.imshow(corr_df, text_auto=True, title="Correlation with Total Emission", width=800, height=700)
-    st.plotly_chart(fig, use_container_width=True)
+# Columns of the default correlation heatmap
+CORRELATION_COLUMNS = [
+    "total_emission",
+    "Rural population",
+    "Urban population",
+    "Total Population - Male",
+    "Total Population - Female",
+    "On-farm energy use"
+]
 
-    st.markdown("---")
 
-    # Sunburst Chart
-    st.subheader("🌞 SunBurst Chart: Gender-wise Population Distribution Across TOP 500 Areas")
-    filtered_df["Total Population"] = filtered_df["Total Population - Male"] + filtered_df["Total Population - Female"]
-    top500_df = filtered_df.sort_values("Total Population", ascending=False).head(500)
-    population_melted = top500_df[["Area", "Total Population - Male", "Total Population - Female"]]\
-        .melt(id_vars="Area", var_name="Gender", value_name="Population")
+def build_correlation_heatmap(backend, selection, columns=CORRELATION_COLUMNS):
+    corr_df = backend.correlation(list(columns), selection)
+    return px.imshow(corr_df, text_auto=True, title="Correlation with Total Emission", width=800, height=700)
+
+
+def build_population_sunburst(backend, selection):
+    top500_df = top_n(
+        backend, "Total Population", ["Area", "Total Population - Male", "Total Population - Female"], 500, selection
+    )
+    population_melted = top500_df.melt(id_vars="Area", var_name="Gender", value_name="Population")
 
     fig = px.sunburst(
         population_melted,
@@ -174,15 +116,12 @@ def show_visualization():
         title="Top 500 Population Records by Area and Gender"
     )
     fig.update_layout(width=900, height=600, title_x=0.3)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-    st.markdown("---")
 
-    # Stacked Bar Chart
-    st.subheader("🏘️ Bar Chart: Top 50 Areas by Rural vs Urban Population")
-    df_grouped = df.groupby("Area")[["Rural population", "Urban population"]].sum().reset_index()
-    df_grouped["total"] = df_grouped["Rural population"] + df_grouped["Urban population"]
-    df_top = df_grouped.sort_values(by="total", ascending=False).head(50)
+def build_rural_urban_bar(backend, selection):
+    population_columns = ["Rural population", "Urban population"]
+    df_top = top_n(backend, population_columns, ["Area"] + population_columns, 50, selection, per_area="sum")
 
     fig = px.bar(
         df_top,
@@ -193,37 +132,366 @@ def show_visualization():
         labels={"value": "Population", "Area": "Area/Region"},
     )
     fig.update_layout(height=700, title_x=0.5)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+def build_agri_scatter(backend, selection):
+    labels = {
+        "Pesticides Manufacturing": "Pesticides CO₂ (kt)",
+        "Fertilizers Manufacturing": "Fertilizers CO₂ (kt)",
+        "Food Transport": "Transport CO₂ (kt)"
+    }
+    top40_df = top_n(backend, "Agri_total_Emission", ["Area"] + list(labels), 3000, selection, ascending=True)
+
+    # Too many areas for a legend: one WebGL trace colored per Area
+    if merge_groups(top40_df["Area"].nunique()):
+        fig = merged_scatter(
+            top40_df.rename(columns=labels),
+            x=labels["Pesticides Manufacturing"],
+            y=labels["Fertilizers Manufacturing"],
+            size=labels["Food Transport"],
+            group="Area"
+        )
+        fig.update_layout(title="Top 40 Areas by Agricultural Emissions")
+    else:
+        fig = px.scatter(
+            top40_df,
+            x="Pesticides Manufacturing",
+            y="Fertilizers Manufacturing",
+            size="Food Transport",
+            color="Area",
+            hover_name="Area",
+            title="Top 40 Areas by Agricultural Emissions",
+            labels=labels,
+            render_mode=render_mode(len(top40_df))
+        )
+    fig.update_layout(width=1000, height=500, title_x=0.3)
+    return fig
 
-    st.markdown("---")
 
-    # Scatter Plot
-    st.subheader("🚜 Scatter Plot: Top Mid Areas by Agricultural Emissions")
-    filtered_df["Agri_total_Emission"] = (
-        filtered_df["Pesticides Manufacturing"] +
-        filtered_df["Fertilizers Manufacturing"] +
-        filtered_df["Food Transport"]
+# Data overview sections
+def show_null_counts(view):
+    st.write(view["backend"].null_counts(view["selection"]))
+
+
+def show_data_preview(view):
+    backend = view["backend"]
+    if not backend.in_memory:
+        st.caption(f"First {PAGE_SIZE} matching rows ({backend.name} backend)")
+        st.dataframe(backend.head(PAGE_SIZE, view["selection"]))
+        return
+    show_paginated_table(backend.frame, "viz_preview", positions=backend.positions(view["selection"]),
+                         sort_order=sort_order)
+
+
+def show_summary_statistics(view):
+    st.write(view["backend"].summary(view["selection"]))
+
+
+def show_head_tail(view):
+    st.write("🔼 Head")
+    st.write(view["backend"].head(5, view["selection"]))
+    st.write("🔽 Tail")
+    st.write(view["backend"].tail(5, view["selection"]))
+
+
+def show_dataset_info(view):
+    backend = view["backend"]
+    if not backend.in_memory:
+        schema = backend.schema_table()
+        st.write((view["count"], len(schema)))
+        st.dataframe(schema, hide_index=True)
+        return
+
+    rows = backend.rows(view["selection"])
+    st.write(rows.shape)
+    buffer = io.StringIO()
+    rows.info(buf=buffer)
+    st.text(buffer.getvalue())
+
+    # Compact schema applied at load time, with any precision given up for float32
+    schema = backend.schema()
+    memory = memory_summary(schema)
+    st.write(
+        f"Shared dataset memory: {memory['after'] / 1e6:.2f} MB "
+        f"(raw dtypes: {memory['before'] / 1e6:.2f} MB, saved {memory['saved'] / 1e6:.2f} MB)"
     )
-    top40_df = filtered_df.sort_values("Agri_total_Emission", ascending=True).head(3000).reset_index()
-
-    fig = px.scatter(
-        top40_df,
-        x="Pesticides Manufacturing",
-        y="Fertilizers Manufacturing",
-        size="Food Transport",
-        color="Area",
-        hover_name="Area",
-        title="Top 40 Areas by Agricultural Emissions",
-        labels={
-            "Pesticides Manufacturing": "Pesticides CO₂ (kt)",
-            "Fertilizers Manufacturing": "Fertilizers CO₂ (kt)",
-            "Food Transport": "Transport CO₂ (kt)"
-        }
+    st.dataframe(schema)
+
+
+EXPORT_LABELS = {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet"}
+
+
+# Download of the filtered rows (export.py). The file is written, or taken
+# from the export cache, only when the button is clicked; Streamlit then reads
+# all of it into memory and keeps it for the session, so selections whose file
+# would be over EXPORT_SERVE_BYTES are steered to a compressed format.
+def show_export(view):
+    backend = view["backend"]
+    path, selection = backend.path, view["selection"]
+    fmt = st.radio("Format", list(EXPORT_FORMATS), format_func=EXPORT_LABELS.get, horizontal=True,
+                   key="viz_export_format")
+    extension, mime = EXPORT_FORMATS[fmt]
+    cached = " (cached)" if is_exported(path, selection, fmt) else ""
+    st.caption(f"{view['count']:,} matching rows{cached}")
+    size = export_size(path, selection, fmt, view["count"], backend.count((ALL, ALL)))
+    too_big = size > EXPORT_SERVE_BYTES
+    if too_big:
+        st.warning(f"About {size / 1e6:,.1f} MB as {EXPORT_LABELS[fmt]}, over the "
+                   f"{EXPORT_SERVE_BYTES / 1e6:,.1f} MB download limit. Pick a compressed format "
+                   "or narrow the filters.")
+
+    def data():
+        with open(export_file(path, selection, fmt), "rb") as f:
+            return f.read()
+
+    st.download_button("⬇️ Download", data, file_name=f"carbonivore_filtered.{extension}", mime=mime,
+                       on_click="ignore", key="viz_export_download", disabled=too_big)
+
+
+# Charts in display order: (id, title, builder, filtered). Unfiltered charts
+# always cover the whole dataset, independent of the sidebar filters.
+CHARTS = [
+    ("choropleth", "🌍 Choropleth: Total Emissions by Area", build_choropleth, True),
+    ("rice_line", "📈 Line Chart: Rice Cultivation Emissions Over Time", build_rice_line, True),
+    ("fire_bar", "🔥 Bar Chart: Top 50 Areas by Fire-Based Emissions", build_fire_bar, True),
+    ("industrial_pie", "🏭 Pie Chart: Industrial Emission Composition", build_industrial_pie, True),
+    ("correlation_heatmap", "🌡️ HeatMap: Correlation with Total Emission", build_correlation_heatmap, True),
+    ("population_sunburst", "🌞 SunBurst Chart: Gender-wise Population Distribution Across TOP 500 Areas",
+     build_population_sunburst, True),
+    ("rural_urban_bar", "🏘️ Bar Chart: Top 50 Areas by Rural vs Urban Population", build_rural_urban_bar, False),
+    ("agri_scatter", "🚜 Scatter Plot: Top Mid Areas by Agricultural Emissions", build_agri_scatter, True),
+]
+# Charts whose section is open when the page first loads
+DEFAULT_OPEN_CHARTS = {"choropleth"}
+
+
+# Query backend for the dataset (pandas in memory unless configured or too big,
+# see query_backend.py)
+def load_backend():
+    return get_backend(DATA_FILE)
+
+
+# Ascending row order of the shared frame by column, built on first use per dataset version
+def sort_order(column):
+    build = lambda df: column_sort_order(with_derived_columns(df), column)
+    return get_derived(DATA_FILE, f"sort_order:{column}", build, compact=True)
+
+
+# Everything a section may need for one Area/Year selection, shared read-only
+# across the page's sections. Kept per session while the selection stands
+# (session_data.py), so reruns reuse its row positions and gathered rows.
+def build_view(backend, selected_areas, selected_years):
+    selection = (
+        selection_key(selected_areas, backend.distinct("Area")),
+        selection_key(selected_years, backend.distinct("Year")),
     )
-    fig.update_layout(width=1000, height=500, title_x=0.3)
-    st.plotly_chart(fig, use_container_width=True)
+    build = lambda: {
+        "backend": backend,
+        "version": f"{backend.name}-{backend.version}",
+        "selection": selection,
+        "count": backend.count(selection),
+    }
+    key = (backend.name, backend.path, backend.version, selection)
+    return session_artifact("visualization.view", key, build, view_bytes)
+
+
+# Approximate bytes a view holds beyond the shared dataset
+def view_bytes(view) -> int:
+    held = getattr(view["backend"], "held_bytes", None)
+    return held() if held else 0
+
+
+CHART_BUILDERS = {chart_id: (build, filtered) for chart_id, _, build, filtered in CHARTS}
+
+
+# A declared figure job: one chart (with builder keyword parameters) over the
+# view's selection. Plain data, so it can run on any pool (figure_pipeline.py).
+def chart_job(view, chart_id, params=None):
+    params = params or {}
+    _, filtered = CHART_BUILDERS[chart_id]
+    values = ["|".join(map(str, v)) if isinstance(v, (list, tuple)) else str(v) for _, v in sorted(params.items())]
+    return {
+        "id": ":".join([chart_id] + values),
+        "chart": chart_id,
+        "params": params,
+        "selection": view["selection"] if filtered else (ALL, ALL),
+        "version": view["version"],
+        "path": view["backend"].path,
+        "kind": view["backend"].name,
+        "empty": filtered and view["count"] == 0,
+    }
+
+
+# Build a job's figure (runs on pool threads and in worker processes, which
+# pass backend=None)
+def build_job(job, backend=None):
+    if backend is None:
+        backend = get_backend(job["path"], job["kind"])
+    build, _ = CHART_BUILDERS[job["chart"]]
+    return build(backend, job["selection"], **job["params"])
+
+
+# Figure for one chart (None if the selection is empty): the one the page
+# started for it, else built now through the figure cache
+def chart_figure(view, chart_id, params=None):
+    job = chart_job(view, chart_id, params)
+    handle = view.get("figures", {}).get(job["id"])
+    if handle is None:
+        handle = start_figures([job], build_job, view["backend"])[job["id"]]
+    return handle.result()
+
+
+def show_chart(view, chart_id, params=None):
+    with span(f"visualization.figure.{chart_id}"):
+        fig = chart_figure(view, chart_id, params)
+    if fig is None:
+        st.info("No data for the current selection.")
+        return
+    with span(f"visualization.plotly_chart.{chart_id}"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def chart_section(chart_id):
+    return lambda view: show_chart(view, chart_id)
+
+
+# Builder parameters for a set of heatmap columns (none for the default set;
+# None when there are too few columns to correlate)
+def correlation_params(columns):
+    if len(columns) < 2:
+        return None
+    return {} if list(columns) == CORRELATION_COLUMNS else {"columns": tuple(columns)}
+
+
+# Heatmap over the default columns or any numeric columns picked here; the
+# backend assembles each matrix from stored statistics, so a new column set
+# costs no rescan
+def show_correlation_section(view):
+    options = view["backend"].numeric_columns()
+    columns = st.multiselect(
+        "Columns to correlate", options,
+        default=[c for c in CORRELATION_COLUMNS if c in options], key="correlation_columns",
+    )
+    params = correlation_params(columns)
+    if params is None:
+        st.info("Select at least two columns.")
+        return
+    show_chart(view, "correlation_heatmap", params)
+
+
+# The map, plus the selected areas it cannot draw
+def show_choropleth_section(view):
+    show_chart(view, "choropleth")
+    unmatched = unmatched_areas(geo_index(view["backend"]))
+    areas, _ = view["selection"]
+    if areas != ALL:
+        unmatched = unmatched[unmatched["Area"].isin(areas)]
+    if len(unmatched):
+        with st.expander(f"{len(unmatched)} area(s) not shown on the map"):
+            st.dataframe(unmatched, hide_index=True)
+
+
+# Sections whose renderer is more than the plain chart, and where their
+# builder parameters come from in the session
+CHART_SECTIONS = {"choropleth": show_choropleth_section, "correlation_heatmap": show_correlation_section}
+CHART_PARAMS = {
+    "correlation_heatmap": lambda: correlation_params(st.session_state.get("correlation_columns", CORRELATION_COLUMNS)),
+}
+
+
+# Jobs for the charts whose sections are open in this session
+def open_chart_jobs(view):
+    jobs = []
+    for chart_id, _, _, _ in CHARTS:
+        if not st.session_state.get(f"viz_section_{chart_id}", chart_id in DEFAULT_OPEN_CHARTS):
+            continue
+        params = CHART_PARAMS[chart_id]() if chart_id in CHART_PARAMS else {}
+        if params is not None:
+            jobs.append(chart_job(view, chart_id, params))
+    return jobs
+
+
+# Build the default all-areas/all-years figures into the shared cache
+def prime_figures():
+    backend = load_backend()
+    view = build_view(backend, backend.distinct("Area"), backend.distinct("Year"))
+    jobs = [chart_job(view, chart_id) for chart_id, _, _, _ in CHARTS]
+    for handle in start_figures(jobs, build_job, backend).values():
+        handle.result()
+
+
+# Page sections in display order: (id, title, renderer, open by default)
+SECTIONS = [
+    ("nulls", "Cleaned Null Values", show_null_counts, False),
+    ("preview", "Data Preview", show_data_preview, False),
+    ("describe", "Summary Statistics", show_summary_statistics, False),
+    ("head_tail", "Head & Tail", show_head_tail, False),
+    ("info", "Dataset Shape & Info", show_dataset_info, False),
+    ("export", "Download Filtered Data", show_export, False),
+] + [
+    (chart_id, title, CHART_SECTIONS.get(chart_id) or chart_section(chart_id), chart_id in DEFAULT_OPEN_CHARTS)
+    for chart_id, title, _, _ in CHARTS
+]
+
+
+# A section is a fragment: flipping its toggle reruns only that section
+@st.fragment
+def show_section(section_id, title, render, view, expanded):
+    if st.toggle(title, value=expanded, key=f"viz_section_{section_id}"):
+        with span(f"visualization.section.{section_id}"):
+            render(view)
+
 
+# Main visualization function
+def show_visualization():
+    st.set_page_config(page_title="Carbonivore Dashboard", layout="wide")
+    st.title("📊 Visualization of Data")
+
+    # Load animation
+    lottie_preprocessing = load_lottie("analytics.json")
+    st_lottie(
+        lottie_preprocessing,
+        speed=1,
+        reverse=False,
+        loop=True,
+        quality="high",
+        width=300,
+        height=300
+    )
+
+    # Load CSV
+    try:
+        with span("visualization.load_backend"):
+            backend = load_backend()
+    except FileNotFoundError:
+        st.error(f"⚠️ The file '{DATA_FILE}' was not found. Please place it in the same directory as your Streamlit script.")
+        return
+    
     st.markdown("---")
+
+
+    # Sidebar Filters
+    st.sidebar.header("🔍 Filter Options")
+    with span("visualization.filter_widgets"):
+        area_list = backend.distinct("Area")
+        selected_areas = st.sidebar.multiselect("Select Area(s)", area_list, default=area_list)
+
+        year_list = backend.distinct("Year")
+        selected_years = st.sidebar.multiselect("Select Year(s)", year_list, default=year_list)
+
+    # Apply filters
+    with span("visualization.build_view"):
+        view = build_view(backend, selected_areas, selected_years)
+    # Every open chart starts building now; each section below waits for its own
+    with span("visualization.start_figures"):
+        view = dict(view, figures=start_figures(open_chart_jobs(view), build_job, view["backend"]))
+
+    # Sections compute only while their toggle is on, and each one reruns on its own
+    for section_id, title, render, expanded in SECTIONS:
+        show_section(section_id, title, render, view, expanded)
+        st.markdown("---")
+
     st.markdown(
         "<p style='text-align: center; color: gray;'>Made with ❤️ by sukhman.singh.codes</p>",
         unsafe_allow_html=True
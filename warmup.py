@@ -0,0 +1,104 @@
+import importlib
+import json
+import logging
+import threading
+import time
+
+# Process warm-up run behind the splash screen: parses the Lottie assets, loads
+# both datasets (plus derived artifacts and the data-quality profile), primes
+# the default figures and opens (migrating) the contact store. It runs once per
+# process; later sessions find everything cached. Page modules stay lazily
+# imported by the menu; the ones the data steps need are imported by them. A
+# failing step is logged and recorded, and the rest still run.
+LOTTIE_FILES = [
+    "splash.json",
+    "signin.json",
+    "signup.json",
+    "data_preprocessing.json",
+    "analytics.json",
+    "contact us.json",
+]
+
+_LOCK = threading.Lock()
+_WARM = False
+# Seconds per startup step (None when a step was skipped, e.g. missing data
+# file; the error text when it failed)
+STARTUP_TIMINGS = {}
+_log = logging.getLogger("carbonivore.warmup")
+
+
+def _timed(step: str, run):
+    start = time.perf_counter()
+    try:
+        run()
+    except FileNotFoundError:
+        STARTUP_TIMINGS[step] = None
+        return
+    except Exception as e:
+        # The session still opens; the page hitting the same problem reports it
+        _log.exception("Warm-up step %r failed", step)
+        STARTUP_TIMINGS[step] = f"failed: {type(e).__name__}: {e}"
+        return
+    STARTUP_TIMINGS[step] = time.perf_counter() - start
+
+
+def _load_assets():
+    from assets import load_lottie
+    for filepath in LOTTIE_FILES:
+        load_lottie(filepath)
+
+
+def _load_raw_dataset():
+    from data_store import load_dataset
+    from profiling import load_profile
+    load_dataset("the_Carbonivore.csv")
+    load_profile("the_Carbonivore.csv")
+
+
+def _load_visualization_dataset():
+    from geo_keys import geo_index
+    from visualization import load_backend
+    geo_index(load_backend())
+
+
+def _open_contact_store():
+    from contact_store import get_contact_store
+    get_contact_store()
+
+
+def _prime_figures():
+    from visualization import prime_figures
+    prime_figures()
+
+
+def is_warm() -> bool:
+    return _WARM
+
+
+# Run the warm-up once per process; concurrent callers wait for the first one
+def warm_up():
+    global _WARM
+    with _LOCK:
+        if _WARM:
+            return
+        start = time.perf_counter()
+        _timed("lottie assets", _load_assets)
+        _timed("dataset the_Carbonivore.csv", _load_raw_dataset)
+        _timed("dataset cleaned_data.csv", _load_visualization_dataset)
+        _timed("default figures", _prime_figures)
+        _timed("contact store", _open_contact_store)
+        STARTUP_TIMINGS["warm-up total"] = time.perf_counter() - start
+        _WARM = True
+
+
+def startup_report() -> dict:
+    return dict(STARTUP_TIMINGS)
+
+
+# python warmup.py prints a cold-start timing report for this host
+if __name__ == "__main__":
+    _timed("import app", lambda: importlib.import_module("app"))
+    warm_up()
+    print(json.dumps({
+        step: round(t, 4) if isinstance(t, float) else t for step, t in startup_report().items()
+    }, indent=2))